@@ -0,0 +1,198 @@
+"""
+Benchmark: busqueda de ofertas con el SDK de Amadeus frente al transporte HTTP directo.
+
+Levanta un servidor local que imita Amadeus (token + Flight Offers Search,
+con gzip si se pide) y mide por consulta:
+
+- Decodificacion: json (SDK) frente a orjson (transporte, si esta instalado)
+- Parseo completo: cuerpo -> FlightOption con el mismo _parse_offer
+- Consulta de extremo a extremo: peticion HTTP + decodificacion + parseo
+
+En local no hay latencia, asi que el servidor simula la red: cada conexion
+nueva espera --handshake-ms (TCP + TLS) y cada respuesta tarda segun su
+tamaño y --kbps. Con --handshake-ms 0 --kbps 0 se mide solo el coste de
+cada cliente HTTP en loopback.
+
+No necesita credenciales ni red. Ejemplo:
+    python benchmarks/bench_transport.py --queries 200 --offers 10
+"""
+
+import argparse
+import gzip
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest.mock import patch
+
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from amadeus import Client
+
+from src import http_transport
+from src.amadeus_client import AmadeusClient
+from src.http_transport import AmadeusHttpTransport
+
+
+def make_offer(i: int) -> dict:
+    """Oferta con la estructura completa de Amadeus (la mayoria de campos no se usan)."""
+    hour = 6 + i % 14
+    segment = {
+        "departure": {"iataCode": "MAD", "terminal": "4", "at": f"2026-01-26T{hour:02d}:00:00"},
+        "arrival": {"iataCode": "BCN", "terminal": "1", "at": f"2026-01-26T{hour + 1:02d}:15:00"},
+        "carrierCode": "VY",
+        "number": str(1000 + i),
+        "aircraft": {"code": "320"},
+        "operating": {"carrierCode": "VY"},
+        "duration": "PT1H15M",
+        "id": str(i),
+        "numberOfStops": 0,
+        "blacklistedInEU": False,
+    }
+    return {
+        "type": "flight-offer",
+        "id": str(i),
+        "source": "GDS",
+        "instantTicketingRequired": False,
+        "nonHomogeneous": False,
+        "oneWay": False,
+        "lastTicketingDate": "2026-01-20",
+        "numberOfBookableSeats": 9,
+        "itineraries": [{"duration": "PT1H15M", "segments": [segment]}],
+        "price": {
+            "currency": "EUR", "total": f"{30 + i}.50", "base": f"{20 + i}.00",
+            "fees": [{"amount": "0.00", "type": "SUPPLIER"}, {"amount": "0.00", "type": "TICKETING"}],
+            "grandTotal": f"{30 + i}.50",
+            "additionalServices": [{"amount": "25.00", "type": "CHECKED_BAGS"}],
+        },
+        "pricingOptions": {"fareType": ["PUBLISHED"], "includedCheckedBagsOnly": False},
+        "validatingAirlineCodes": ["VY"],
+        "travelerPricings": [{
+            "travelerId": "1",
+            "fareOption": "STANDARD",
+            "travelerType": "ADULT",
+            "price": {"currency": "EUR", "total": f"{30 + i}.50", "base": f"{20 + i}.00"},
+            "fareDetailsBySegment": [{
+                "segmentId": str(i),
+                "cabin": "ECONOMY",
+                "fareBasis": "PROMO",
+                "brandedFare": "BASIC",
+                "class": "P",
+                "includedCheckedBags": {"quantity": 0},
+                "amenities": [
+                    {"description": f"AMENITY {n}", "isChargeable": True, "amenityType": "BAGGAGE",
+                     "amenityProvider": {"name": "BrandedFare"}}
+                    for n in range(6)
+                ],
+            }],
+        }],
+    }
+
+
+def make_body(offers: int) -> bytes:
+    return json.dumps({
+        "meta": {"count": offers},
+        "data": [make_offer(i) for i in range(offers)],
+        "dictionaries": {
+            "locations": {"MAD": {"cityCode": "MAD", "countryCode": "ES"}, "BCN": {"cityCode": "BCN", "countryCode": "ES"}},
+            "aircraft": {"320": "AIRBUS A320"},
+            "currencies": {"EUR": "EURO"},
+            "carriers": {"VY": "VUELING AIRLINES"},
+        },
+    }).encode("utf-8")
+
+
+def serve(body: bytes, handshake_ms: float, kbps: float) -> ThreadingHTTPServer:
+    token = json.dumps({"access_token": "token", "expires_in": 1799}).encode("utf-8")
+    compressed = gzip.compress(body)
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive para quien lo pida
+        disable_nagle_algorithm = True  # Sin esperas de 40 ms entre cabeceras y cuerpo
+
+        def setup(self):
+            super().setup()
+            time.sleep(handshake_ms / 1000)  # Conexion nueva
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            self._send(token, gzip_ok=False)
+
+        def do_GET(self):
+            self._send(body, gzip_ok="gzip" in self.headers.get("Accept-Encoding", ""))
+
+        def _send(self, payload: bytes, gzip_ok: bool):
+            self.send_response(200)
+            self.send_header("Content-Type", "application/vnd.amadeus+json")
+            if gzip_ok and payload is body:
+                payload = compressed
+                self.send_header("Content-Encoding", "gzip")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            if kbps:
+                time.sleep(len(payload) * 8 / (kbps * 1000))  # Transferencia
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def timed(func, repeat: int) -> float:
+    """Milisegundos medios por llamada."""
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - started) * 1000 / repeat
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="SDK de Amadeus frente a transporte HTTP directo")
+    parser.add_argument("--queries", type=int, default=200, help="Consultas por medicion")
+    parser.add_argument("--offers", type=int, default=10, help="Ofertas por respuesta")
+    parser.add_argument("--handshake-ms", type=float, default=50, help="Coste simulado de cada conexion nueva")
+    parser.add_argument("--kbps", type=float, default=10000, help="Ancho de banda simulado (0 = sin limite)")
+    args = parser.parse_args(argv)
+
+    body = make_body(args.offers)
+    server = serve(body, args.handshake_ms, args.kbps)
+    port = server.server_address[1]
+
+    with patch("src.amadeus_client.AMADEUS_API_KEY", "key"), patch("src.amadeus_client.AMADEUS_API_SECRET", "secret"):
+        sdk = AmadeusClient()
+        sdk.client = Client(client_id="key", client_secret="secret", host="127.0.0.1", port=port, ssl=False)
+        fast = AmadeusClient(transport=AmadeusHttpTransport("key", "secret", base_url=f"http://127.0.0.1:{port}"))
+
+    # Mismo resultado por los dos caminos
+    assert sdk._fetch_offers("MAD", "BCN", "2026-01-26") == fast._fetch_offers("MAD", "BCN", "2026-01-26")
+
+    decoder = http_transport.loads.__module__
+    text = body.decode("utf-8")
+    rows = [
+        ("Decodificar JSON", timed(lambda: json.loads(text), args.queries),
+         timed(lambda: http_transport.loads(body), args.queries)),
+        ("Decodificar + parsear", timed(lambda: [sdk._parse_offer(o) for o in json.loads(text)["data"]], args.queries),
+         timed(lambda: [fast._parse_offer(o) for o in http_transport.lean_body(http_transport.loads(body))["data"]],
+               args.queries)),
+        ("Consulta completa", timed(lambda: sdk._fetch_offers("MAD", "BCN", "2026-01-26"), args.queries),
+         timed(lambda: fast._fetch_offers("MAD", "BCN", "2026-01-26"), args.queries)),
+    ]
+    server.shutdown()
+
+    print(f"{args.offers} ofertas por respuesta, {len(body) / 1024:.1f} KiB "
+          f"({len(gzip.compress(body)) / 1024:.1f} KiB con gzip), decodificador rapido: {decoder}")
+    print(f"Red simulada: {args.handshake_ms:g} ms por conexion nueva, {args.kbps:g} kbps")
+    print(f"{'':24}{'SDK (ms)':>10}{'HTTP (ms)':>11}{'ahorro':>9}")
+    for name, slow, quick in rows:
+        print(f"{name:24}{slow:10.3f}{quick:11.3f}{(1 - quick / slow) * 100:8.0f}%")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,6 +2,7 @@
 
 import os
 from datetime import time
+from pathlib import Path
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -12,6 +13,16 @@ MAX_ARRIVAL_TIME = time(10, 0)       # Llegada ida <= 10:00
 MIN_DEPARTURE_TIME = time(17, 0)     # Salida vuelta >= 17:00
 RELAXED_MARGIN_MINUTES = 60          # Margen fijo para filtros relajados
 
+# Ranking de combos: "cheapest" (solo el mas barato) o "pareto"
+# (frente de precio vs horario, incluye opciones fuera de horario)
+RANKING_MODE = "pareto"
+PARETO_MAX_OPTIONS = 3
+
+# Historico de precios: ventana movil (en ejecuciones) y minimo de muestras
+# para anotar un precio como barato/caro respecto a lo habitual
+HISTORY_WINDOW = 12
+HISTORY_MIN_SAMPLES = 3
+
 # Umbral para mostrar legs sueltos (parametrizable)
 SINGLE_LEG_THRESHOLD = 45  # euros
 
@@ -24,6 +35,9 @@ ROUTES = [
 # Rutas con opcion de legs sueltos (para combinar con tren)
 ROUTES_WITH_SINGLE_LEGS = ["MAD"]
 
+# Viajes mixtos: ida desde un origen y vuelta a otro (ej: MAD->BCN->OVD)
+MIXED_TRIPS_ENABLED = True
+
 # Configuracion de busqueda
 WEEKS_AHEAD = 2
 MAX_RESULTS_PER_SEARCH = 10
@@ -36,14 +50,92 @@ DAY_PAIRS = [
     (3, 4),  # Jueves-Viernes
 ]
 
+# Plan de consultas por par de dias:
+#   "oneway"    dos busquedas de ida (ida y vuelta por separado) y se suman
+#   "roundtrip" una busqueda ida y vuelta (returnDate), a veces mas barata;
+#               sin legs sueltos ni viajes mixtos (necesitan busquedas de ida)
+#   "mixed"     ida y vuelta en todas las rutas y ademas busquedas de ida en
+#               ROUTES_WITH_SINGLE_LEGS; el combo es el mas barato de los dos planes
+QUERY_PLAN = "oneway"
+QUERY_PLANS = ("oneway", "roundtrip", "mixed")
+
 DAY_NAMES = ["Lun", "Mar", "Mie", "Jue", "Vie", "Sab", "Dom"]
 
+# Modo "a cualquier sitio" (--anywhere): destinos a verificar con busqueda completa
+ANYWHERE_TOP_N = 5
+
+# Busquedas en paralelo (hilos) y modo streaming (--stream)
+SEARCH_MAX_WORKERS = 4
+STREAM_QUEUE_SIZE = 2      # Capacidad de cada cola entre etapas
+STREAM_SUMMARY = True      # Enviar un resumen final tras los mensajes por ruta
+
+# Secciones de mensaje ya formateadas que se reutilizan (por contenido) entre
+# mensajes, rutas en streaming y respuestas del bot
+FORMATTER_CACHE_SIZE = 256
+
+# Perfilado (--profile): lineas de cada informe
+PROFILE_TOP_N = 30
+
 # Reintentos
 MAX_RETRIES = 3
 RETRY_DELAY_SECONDS = 5
 
+# Circuit breaker de Amadeus: fallos seguidos para abrir y segundos hasta reintentar
+CIRCUIT_FAILURE_THRESHOLD = 3
+CIRCUIT_RESET_SECONDS = 60
+
+# Datos generados (historico, ofertas, caches)
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+HISTORY_FILE = DATA_DIR / "price_history.json"
+OFFERS_DIR = DATA_DIR / "offers"
+
+# Checkpoint de cada ejecucion (--resume): consultas terminadas y mensajes
+# formateados, para reanudar sin repetir llamadas ni reenviar lo ya enviado
+CHECKPOINT_DIR = DATA_DIR / "checkpoints"
+
+# Cola de trabajos (--queue plan/work/reduce): consultas repartidas entre
+# varios procesos o maquinas que comparten el archivo SQLite
+QUEUE_FILE = DATA_DIR / "queue.sqlite"
+QUEUE_WORKERS = 4              # Procesos worker por maquina
+QUEUE_LEASE_SECONDS = 120      # Si un worker no termina en este tiempo, otro retoma el trabajo
+QUEUE_MAX_ATTEMPTS = 3         # Intentos por consulta antes de darla por fallida
+QUEUE_RETRY_SECONDS = 30.0     # Espera antes de reintentar una consulta fallida (se duplica en cada intento)
+QUEUE_POLL_SECONDS = 2.0       # Espera de un worker sin trabajo mientras otros tienen trabajos en curso
+
+# API local de solo lectura (python src/api.py)
+API_HOST = "127.0.0.1"
+API_PORT = 8765
+
+# Proveedor de trenes (horario local, precios orientativos). Si se activa, los
+# combos mezclan tren y avion automaticamente (ej: ida en tren + vuelta en avion)
+RAIL_PROVIDER_ENABLED = False
+RAIL_TIMETABLE_FILE = DATA_DIR / "rail_timetable.json"
+RAIL_TIMETABLE_URL = os.getenv("RAIL_TIMETABLE_URL", "")  # Servicio local opcional
+
+# Datos de referencia (aerolineas, aeropuertos, ciudades de tren). El fichero
+# va con el repo; los codigos que falten se aprenden de Amadeus y se guardan
+# en la cache de referencia para las siguientes ejecuciones
+REFERENCE_DATA_FILE = Path(__file__).resolve().parent / "reference_data.json"
+REFERENCE_CACHE_FILE = DATA_DIR / "reference_cache.json"
+REFERENCE_REFRESH_ENABLED = True
+
+# Bot interactivo (--bot): responde desde las ofertas en memoria y la cache;
+# solo llama a Amadeus si no hay precios recientes, con pausa minima entre llamadas
+BOT_CACHE_MAX_AGE_HOURS = 6        # Antiguedad maxima de un precio para reutilizarlo
+BOT_MIN_CALL_SECONDS = 1.0         # Separacion minima entre llamadas a Amadeus
+BOT_POLL_TIMEOUT = 30              # Segundos de long polling por peticion a Telegram
+BOT_MAX_WEEKS_AHEAD = 8            # Semana mas lejana que se puede pedir (/semana N)
+BOT_RETRY_SECONDS = 5              # Espera tras un error de Telegram (se dobla en cada error seguido)
+BOT_RETRY_MAX_SECONDS = 300        # Espera maxima entre reintentos
+
 # API Keys (desde variables de entorno)
 AMADEUS_API_KEY = os.getenv("AMADEUS_API_KEY", "")
 AMADEUS_API_SECRET = os.getenv("AMADEUS_API_SECRET", "")
+AMADEUS_HOSTNAME = os.getenv("AMADEUS_HOSTNAME", "test")  # "test" o "production"
+# Transporte de la busqueda de ofertas: "sdk" (libreria amadeus) o "http"
+# (sesion HTTP con keep-alive y gzip, ver src/http_transport.py)
+AMADEUS_TRANSPORT = os.getenv("AMADEUS_TRANSPORT", "sdk")
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN", "")
 TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID", "")
+# Chats que pueden usar el bot, separados por comas (por defecto solo TELEGRAM_CHAT_ID)
+BOT_ALLOWED_CHAT_IDS = [c.strip() for c in os.getenv("BOT_ALLOWED_CHAT_IDS", TELEGRAM_CHAT_ID).split(",") if c.strip()]
@@ -1,17 +1,27 @@
 """Cliente para la API de Amadeus."""
 
 import logging
+import threading
 from dataclasses import dataclass
-from datetime import date, datetime, time
-from typing import Optional
+from datetime import date, datetime, time, timedelta
+from typing import Callable, Optional
 
 from amadeus import Client, ResponseError
 
 from config.settings import (
     AMADEUS_API_KEY,
     AMADEUS_API_SECRET,
+    AMADEUS_HOSTNAME,
+    AMADEUS_TRANSPORT,
+    CIRCUIT_FAILURE_THRESHOLD,
+    CIRCUIT_RESET_SECONDS,
+    DATA_DIR,
     MAX_RESULTS_PER_SEARCH,
 )
+from src.cache import PersistentCache
+from src.circuit_breaker import CircuitBreaker
+from src.http_transport import AmadeusHttpTransport
+from src.reference_data import Airport, ReferenceIndex, get_reference
 
 logger = logging.getLogger(__name__)
 
@@ -27,6 +37,8 @@ class FlightOption:
     carrier_code: str
     carrier_name: str
     flight_number: str
+    stale_since: Optional[datetime] = None  # Fecha de la cache si Amadeus no respondio
+    mode: str = "flight"                    # "flight" o "rail"
 
     @property
     def departure_time_str(self) -> str:
@@ -40,8 +52,116 @@ class FlightOption:
     def flight_date(self) -> date:
         return self.departure_time.date()
 
+    def to_dict(self) -> dict:
+        return {
+            "origin": self.origin,
+            "destination": self.destination,
+            "departure_time": self.departure_time.isoformat(),
+            "arrival_time": self.arrival_time.isoformat(),
+            "price": self.price,
+            "carrier_code": self.carrier_code,
+            "carrier_name": self.carrier_name,
+            "flight_number": self.flight_number,
+            "mode": self.mode,
+        }
 
-# Mapeo de codigos de aerolineas
+    @classmethod
+    def from_dict(cls, data: dict) -> "FlightOption":
+        return cls(
+            origin=data["origin"],
+            destination=data["destination"],
+            departure_time=datetime.fromisoformat(data["departure_time"]),
+            arrival_time=datetime.fromisoformat(data["arrival_time"]),
+            price=data["price"],
+            carrier_code=data["carrier_code"],
+            carrier_name=data["carrier_name"],
+            flight_number=data["flight_number"],
+            mode=data.get("mode", "flight"),
+        )
+
+
+@dataclass
+class RoundTripOffer:
+    """
+    Oferta ida y vuelta de una sola consulta (returnDate).
+
+    Amadeus solo da el precio conjunto; el precio de cada leg es la mitad
+    (ver split_price), asi lo que sume legs sigue cuadrando con el total.
+    """
+    outbound: FlightOption
+    return_flight: FlightOption
+    price: float
+
+    def to_dict(self) -> dict:
+        return {
+            "outbound": self.outbound.to_dict(),
+            "return": self.return_flight.to_dict(),
+            "price": self.price,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "RoundTripOffer":
+        return cls(
+            outbound=FlightOption.from_dict(data["outbound"]),
+            return_flight=FlightOption.from_dict(data["return"]),
+            price=data["price"],
+        )
+
+
+def split_price(total: float) -> tuple[float, float]:
+    """Reparte un precio ida y vuelta entre los dos legs (la vuelta se lleva el redondeo)."""
+    outbound = round(total / 2, 2)
+    return outbound, round(total - outbound, 2)
+
+
+@dataclass
+class DestinationQuote:
+    """Precio orientativo ida+vuelta a un destino (busqueda de inspiracion)."""
+    origin: str
+    destination: str
+    departure_date: date
+    return_date: Optional[date]
+    price: float
+
+    def to_dict(self) -> dict:
+        return {
+            "origin": self.origin,
+            "destination": self.destination,
+            "departure_date": self.departure_date.isoformat(),
+            "return_date": self.return_date.isoformat() if self.return_date else None,
+            "price": self.price,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "DestinationQuote":
+        return cls(
+            origin=data["origin"],
+            destination=data["destination"],
+            departure_date=date.fromisoformat(data["departure_date"]),
+            return_date=date.fromisoformat(data["return_date"]) if data["return_date"] else None,
+            price=data["price"],
+        )
+
+
+class AmadeusUnavailableError(Exception):
+    """Amadeus no responde y no hay ofertas en cache para la consulta."""
+
+
+def matches_time_filter(
+    option: FlightOption,
+    max_arrival_time: Optional[time] = None,
+    min_departure_time: Optional[time] = None,
+) -> bool:
+    """Verifica si la opcion cumple los filtros de horario."""
+    if max_arrival_time and option.arrival_time.time() > max_arrival_time:
+        return False
+    if min_departure_time and option.departure_time.time() < min_departure_time:
+        return False
+    return True
+
+
+# Aerolineas habituales; respaldo si no se pueden leer los datos de
+# referencia (config/reference_data.json)
 CARRIER_NAMES = {
     "IB": "Iberia",
     "VY": "Vueling",
@@ -53,16 +173,52 @@ CARRIER_NAMES = {
 
 
 class AmadeusClient:
-    """Cliente para buscar vuelos en Amadeus."""
+    """
+    Cliente para buscar vuelos en Amadeus.
+
+    Las llamadas pasan por un circuit breaker. Cada respuesta correcta se
+    guarda en una cache persistente; si Amadeus falla o el circuito esta
+    abierto se devuelven las ultimas ofertas guardadas marcadas como
+    obsoletas (stale_since), y al pasar a half_open se revalidan en
+    segundo plano sin hacer esperar a la busqueda.
+    """
 
-    def __init__(self):
+    def __init__(
+        self,
+        cache: Optional[PersistentCache] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        reference: Optional[ReferenceIndex] = None,
+        max_cache_age: Optional[timedelta] = None,
+        transport: Optional[AmadeusHttpTransport] = None,
+        before_request: Optional[Callable[[], None]] = None,
+    ):
+        """
+        Args:
+            max_cache_age: Si se indica, las ofertas en cache mas recientes que
+                esto se devuelven sin llamar a la API (ej: bot interactivo)
+            transport: Transporte HTTP directo para la busqueda de ofertas
+                (por defecto segun AMADEUS_TRANSPORT; None usa el SDK)
+            before_request: Se llama justo antes de cada peticion real a la
+                API, no en las respuestas de cache (ej: el bot espacia asi
+                sus llamadas)
+        """
         if not AMADEUS_API_KEY or not AMADEUS_API_SECRET:
             raise ValueError("Faltan credenciales de Amadeus. Configura AMADEUS_API_KEY y AMADEUS_API_SECRET")
 
         self.client = Client(
             client_id=AMADEUS_API_KEY,
             client_secret=AMADEUS_API_SECRET,
+            hostname=AMADEUS_HOSTNAME,
         )
+        if transport is None and AMADEUS_TRANSPORT == "http":
+            transport = AmadeusHttpTransport(AMADEUS_API_KEY, AMADEUS_API_SECRET)
+        self.transport = transport
+        self.cache = cache or PersistentCache(DATA_DIR / "offer_cache.json")
+        self.breaker = breaker or CircuitBreaker(CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_SECONDS)
+        self.reference = reference or get_reference()
+        self.max_cache_age = max_cache_age
+        self.before_request = before_request
+        self._revalidations: list[threading.Thread] = []
 
     def search_flights(
         self,
@@ -74,11 +230,190 @@ class AmadeusClient:
     ) -> list[FlightOption]:
         """
         Busca vuelos para una ruta y fecha.
+
+        Raises:
+            AmadeusUnavailableError: Si Amadeus falla y no hay cache para la consulta
         """
+        key = f"offers|{origin}|{destination}|{search_date}"
+        cached = self.cache.get(key)
+
+        if cached and self.max_cache_age and datetime.now() - cached.stored_at <= self.max_cache_age:
+            logger.info(f"Usando ofertas en cache del {cached.stored_at} para {origin}->{destination}")
+            options = [FlightOption.from_dict(data) for data in cached.value]
+            return [o for o in options if self._matches_time_filter(o, max_arrival_time, min_departure_time)]
+
+        # Circuito no cerrado y hay cache: responder ya y, si toca prueba, revalidar en segundo plano
+        if cached and self.breaker.state != CircuitBreaker.CLOSED:
+            if self.breaker.allow_request():
+                self._revalidate_in_background(
+                    key, f"{origin}->{destination}", lambda: self._fetch_offers(origin, destination, search_date),
+                )
+            return self._stale_options(cached, max_arrival_time, min_departure_time)
+
+        if not self.breaker.allow_request():
+            raise AmadeusUnavailableError(f"Circuito abierto y sin cache para {origin}->{destination} {search_date}")
+
         try:
             logger.info(f"Buscando {origin}->{destination} para {search_date}")
+            all_options = self._fetch_offers(origin, destination, search_date)
+        except Exception as e:
+            self.breaker.record_failure()
+            if isinstance(e, ResponseError):
+                logger.error(f"Error de Amadeus API: {e}")
+            else:
+                logger.error(f"Error inesperado buscando vuelos: {e}")
+            if cached:
+                logger.warning(f"Usando ofertas en cache del {cached.stored_at} para {origin}->{destination}")
+                return self._stale_options(cached, max_arrival_time, min_departure_time)
+            raise AmadeusUnavailableError(str(e)) from e
+
+        self.breaker.record_success()
+        self.cache.set(key, [o.to_dict() for o in all_options])
 
-            response = self.client.shopping.flight_offers_search.get(
+        options = [o for o in all_options if self._matches_time_filter(o, max_arrival_time, min_departure_time)]
+        logger.info(f"Encontradas {len(options)} opciones para {origin}->{destination}")
+        return options
+
+    def search_round_trips(
+        self,
+        origin: str,
+        destination: str,
+        departure_date: str,
+        return_date: str,
+    ) -> list[RoundTripOffer]:
+        """
+        Ofertas ida y vuelta para un par de fechas, en una sola llamada.
+
+        Mismo circuit breaker y cache que search_flights: si Amadeus falla
+        se devuelven las ultimas ofertas guardadas marcadas como obsoletas,
+        y al pasar a half_open se revalidan en segundo plano.
+
+        Raises:
+            AmadeusUnavailableError: Si Amadeus falla y no hay cache para la consulta
+        """
+        key = f"roundtrip|{origin}|{destination}|{departure_date}|{return_date}"
+        cached = self.cache.get(key)
+
+        if cached and self.breaker.state != CircuitBreaker.CLOSED:
+            if self.breaker.allow_request():
+                self._revalidate_in_background(
+                    key,
+                    f"{origin}<->{destination}",
+                    lambda: self._fetch_round_trips(origin, destination, departure_date, return_date),
+                )
+            return self._stale_round_trips(cached)
+
+        if not self.breaker.allow_request():
+            raise AmadeusUnavailableError(
+                f"Circuito abierto y sin cache para {origin}<->{destination} {departure_date}/{return_date}"
+            )
+
+        try:
+            logger.info(f"Buscando ida y vuelta {origin}<->{destination} para {departure_date}/{return_date}")
+            offers = self._fetch_round_trips(origin, destination, departure_date, return_date)
+        except Exception as e:
+            self.breaker.record_failure()
+            logger.error(f"Error buscando ida y vuelta {origin}<->{destination}: {e}")
+            if cached:
+                return self._stale_round_trips(cached)
+            raise AmadeusUnavailableError(str(e)) from e
+
+        self.breaker.record_success()
+        self.cache.set(key, [o.to_dict() for o in offers])
+        logger.info(f"Encontradas {len(offers)} ofertas ida y vuelta para {origin}<->{destination}")
+        return offers
+
+    def search_destinations(
+        self,
+        origin: str,
+        departure_dates: str,
+        duration: str,
+    ) -> list[DestinationQuote]:
+        """
+        Destinos mas baratos desde un origen (Flight Inspiration Search).
+
+        Una sola llamada cubre todos los destinos; los precios vienen de la
+        cache de Amadeus y son orientativos.
+
+        Args:
+            origin: Codigo IATA origen
+            departure_dates: Fecha o rango "YYYY-MM-DD,YYYY-MM-DD"
+            duration: Dias de estancia o rango "1,3"
+
+        Raises:
+            AmadeusUnavailableError: Si Amadeus falla y no hay cache para la consulta
+        """
+        key = f"destinations|{origin}|{departure_dates}|{duration}"
+        cached = self.cache.get(key)
+
+        if cached and self.breaker.state != CircuitBreaker.CLOSED:
+            if self.breaker.allow_request():
+                self._revalidate_in_background(
+                    key,
+                    f"destinos desde {origin}",
+                    lambda: self._fetch_destinations(origin, departure_dates, duration),
+                )
+            return [DestinationQuote.from_dict(q) for q in cached.value]
+
+        if not self.breaker.allow_request():
+            raise AmadeusUnavailableError(f"Circuito abierto y sin cache para destinos desde {origin}")
+
+        try:
+            logger.info(f"Buscando destinos desde {origin} para {departure_dates}")
+            quotes = self._fetch_destinations(origin, departure_dates, duration)
+        except Exception as e:
+            self.breaker.record_failure()
+            logger.error(f"Error buscando destinos desde {origin}: {e}")
+            if cached:
+                return [DestinationQuote.from_dict(q) for q in cached.value]
+            raise AmadeusUnavailableError(str(e)) from e
+
+        self.breaker.record_success()
+        self.cache.set(key, [q.to_dict() for q in quotes])
+        logger.info(f"Encontrados {len(quotes)} destinos desde {origin}")
+        return quotes
+
+    def _fetch_destinations(self, origin: str, departure_dates: str, duration: str) -> list[DestinationQuote]:
+        """Llama a Flight Inspiration Search y devuelve los destinos parseados, ordenados por precio."""
+        response = self.client.shopping.flight_destinations.get(
+            origin=origin,
+            departureDate=departure_dates,
+            duration=duration,
+            nonStop="true",
+        )
+        quotes = []
+        for item in response.data:
+            try:
+                quotes.append(DestinationQuote(
+                    origin=item["origin"],
+                    destination=item["destination"],
+                    departure_date=date.fromisoformat(item["departureDate"]),
+                    return_date=date.fromisoformat(item["returnDate"]) if item.get("returnDate") else None,
+                    price=float(item["price"]["total"]),
+                ))
+            except (KeyError, ValueError) as e:
+                logger.warning(f"Error parseando destino: {e}")
+
+        quotes.sort(key=lambda x: x.price)
+        return quotes
+
+    def _request_offers(
+        self,
+        origin: str,
+        destination: str,
+        search_date: str,
+        return_date: Optional[str] = None,
+    ) -> list[dict]:
+        """Llama a Flight Offers Search y devuelve las ofertas sin parsear."""
+        if self.before_request is not None:
+            self.before_request()
+        if self.transport is not None:
+            result = self.transport.flight_offers(
+                origin, destination, search_date, MAX_RESULTS_PER_SEARCH, return_date=return_date,
+            )
+            offers = result.get("data", [])
+        else:
+            params = dict(
                 originLocationCode=origin,
                 destinationLocationCode=destination,
                 departureDate=search_date,
@@ -87,57 +422,175 @@ class AmadeusClient:
                 currencyCode="EUR",
                 max=MAX_RESULTS_PER_SEARCH,
             )
+            if return_date:
+                params["returnDate"] = return_date
+            response = self.client.shopping.flight_offers_search.get(**params)
+            result = getattr(response, "result", None)
+            offers = response.data
 
-            options = []
-            for offer in response.data:
-                try:
-                    option = self._parse_offer(offer)
-                    if option and self._matches_time_filter(option, max_arrival_time, min_departure_time):
-                        options.append(option)
-                except Exception as e:
-                    logger.warning(f"Error parseando oferta: {e}")
-                    continue
-
-            options.sort(key=lambda x: x.price)
-            logger.info(f"Encontradas {len(options)} opciones para {origin}->{destination}")
-            return options
-
-        except ResponseError as e:
-            logger.error(f"Error de Amadeus API: {e}")
-            return []
-        except Exception as e:
-            logger.error(f"Error inesperado buscando vuelos: {e}")
-            return []
+        # Amadeus incluye los nombres de las aerolineas de la respuesta
+        if isinstance(result, dict):
+            carriers = result.get("dictionaries", {}).get("carriers", {})
+            if carriers:
+                self.reference.learn_carriers(carriers)
+        return offers
+
+    def _fetch_offers(self, origin: str, destination: str, search_date: str) -> list[FlightOption]:
+        """Llama a Amadeus y devuelve todas las ofertas parseadas, ordenadas por precio."""
+        options = []
+        for offer in self._request_offers(origin, destination, search_date):
+            try:
+                option = self._parse_offer(offer)
+                if option:
+                    options.append(option)
+            except Exception as e:
+                logger.warning(f"Error parseando oferta: {e}")
+                continue
+
+        options.sort(key=lambda x: x.price)
+        return options
+
+    def _fetch_round_trips(
+        self,
+        origin: str,
+        destination: str,
+        departure_date: str,
+        return_date: str,
+    ) -> list[RoundTripOffer]:
+        """Ofertas ida y vuelta parseadas, ordenadas por precio."""
+        offers = []
+        for offer in self._request_offers(origin, destination, departure_date, return_date):
+            round_trip = self._parse_round_trip(offer)
+            if round_trip:
+                offers.append(round_trip)
+        offers.sort(key=lambda x: x.price)
+        return offers
+
+    def _stale_round_trips(self, cached) -> list[RoundTripOffer]:
+        """Ofertas ida y vuelta de la cache marcadas como obsoletas."""
+        offers = [RoundTripOffer.from_dict(data) for data in cached.value]
+        for offer in offers:
+            offer.outbound.stale_since = offer.return_flight.stale_since = cached.stored_at
+        return offers
+
+    def _stale_options(
+        self,
+        cached,
+        max_arrival_time: Optional[time],
+        min_departure_time: Optional[time],
+    ) -> list[FlightOption]:
+        """Ofertas de la cache marcadas como obsoletas y filtradas por horario."""
+        options = []
+        for data in cached.value:
+            option = FlightOption.from_dict(data)
+            option.stale_since = cached.stored_at
+            if self._matches_time_filter(option, max_arrival_time, min_departure_time):
+                options.append(option)
+        return options
+
+    def _revalidate_in_background(self, key: str, label: str, fetch: Callable[[], list]) -> None:
+        """
+        Llamada de prueba del half_open en un hilo; actualiza cache y circuito.
+
+        Args:
+            key: Clave de cache de la consulta
+            label: Descripcion para el log (ej: "MAD->BCN")
+            fetch: Hace la llamada real y devuelve objetos con to_dict()
+        """
+        def revalidate():
+            try:
+                results = fetch()
+            except Exception as e:
+                logger.warning(f"Revalidacion fallida para {label}: {e}")
+                self.breaker.record_failure()
+                return
+            self.breaker.record_success()
+            self.cache.set(key, [r.to_dict() for r in results])
+            logger.info(f"Amadeus responde de nuevo, cache actualizada para {label}")
+
+        thread = threading.Thread(target=revalidate, daemon=True)
+        self._revalidations.append(thread)
+        thread.start()
+
+    def wait_for_revalidations(self, timeout: Optional[float] = None) -> None:
+        """Espera a que terminen las revalidaciones en segundo plano."""
+        for thread in self._revalidations:
+            thread.join(timeout)
+        self._revalidations = [t for t in self._revalidations if t.is_alive()]
+
+    def lookup_airlines(self, codes: list[str]) -> dict[str, str]:
+        """Nombres de aerolineas (Airline Code Lookup, una llamada para todas)."""
+        response = self.client.reference_data.airlines.get(airlineCodes=",".join(codes))
+        names = {}
+        for item in response.data:
+            name = item.get("commonName") or item.get("businessName")
+            code = item.get("iataCode")
+            if code and name:
+                names[code] = name
+        return names
+
+    def lookup_airport(self, code: str) -> Optional[Airport]:
+        """Ciudad y zona horaria de un aeropuerto (Airport & City Search)."""
+        response = self.client.reference_data.locations.get(keyword=code, subType="AIRPORT")
+        for item in response.data:
+            if item.get("iataCode") != code:
+                continue
+            city = item.get("address", {}).get("cityName")
+            if not city:
+                return None
+            return Airport(city=city.title(), timezone=item.get("timeZoneOffset", ""))
+        return None
 
     def _parse_offer(self, offer: dict) -> Optional[FlightOption]:
         """Parsea una oferta de Amadeus a FlightOption."""
         try:
             price = float(offer["price"]["total"])
-            itinerary = offer["itineraries"][0]
-            segment = itinerary["segments"][0]
-
-            carrier_code = segment["carrierCode"]
-            flight_number = segment.get("number", "")
-            departure = datetime.fromisoformat(segment["departure"]["at"])
-            arrival = datetime.fromisoformat(segment["arrival"]["at"])
-            origin = segment["departure"]["iataCode"]
-            destination = segment["arrival"]["iataCode"]
-            carrier_name = CARRIER_NAMES.get(carrier_code, carrier_code)
-
-            return FlightOption(
-                origin=origin,
-                destination=destination,
-                departure_time=departure,
-                arrival_time=arrival,
-                price=price,
-                carrier_code=carrier_code,
-                carrier_name=carrier_name,
-                flight_number=flight_number,
-            )
+            return self._parse_segment(offer["itineraries"][0]["segments"][0], price)
         except (KeyError, IndexError, ValueError) as e:
             logger.warning(f"Error parseando oferta: {e}")
             return None
 
+    def _parse_round_trip(self, offer: dict) -> Optional[RoundTripOffer]:
+        """Parsea una oferta ida y vuelta (dos itinerarios, un precio)."""
+        try:
+            price = float(offer["price"]["total"])
+            outbound_price, return_price = split_price(price)
+            outbound = self._parse_segment(offer["itineraries"][0]["segments"][0], outbound_price)
+            return_flight = self._parse_segment(offer["itineraries"][1]["segments"][0], return_price)
+            return RoundTripOffer(outbound=outbound, return_flight=return_flight, price=price)
+        except (KeyError, IndexError, ValueError) as e:
+            logger.warning(f"Error parseando oferta ida y vuelta: {e}")
+            return None
+
+    def _parse_segment(self, segment: dict, price: float) -> FlightOption:
+        """
+        FlightOption de un segmento de itinerario.
+
+        Raises:
+            KeyError, ValueError: Si faltan datos o tienen otro formato
+        """
+        carrier_code = segment["carrierCode"]
+        flight_number = segment.get("number", "")
+        departure = datetime.fromisoformat(segment["departure"]["at"])
+        arrival = datetime.fromisoformat(segment["arrival"]["at"])
+        origin = segment["departure"]["iataCode"]
+        destination = segment["arrival"]["iataCode"]
+        carrier_name = (
+            self.reference.carrier_name(carrier_code)
+            or CARRIER_NAMES.get(carrier_code, carrier_code)
+        )
+
+        return FlightOption(
+            origin=origin,
+            destination=destination,
+            departure_time=departure,
+            arrival_time=arrival,
+            price=price,
+            carrier_code=carrier_code,
+            carrier_name=carrier_name,
+            flight_number=flight_number,
+        )
+
     def _matches_time_filter(
         self,
         option: FlightOption,
@@ -145,8 +598,4 @@ class AmadeusClient:
         min_departure_time: Optional[time],
     ) -> bool:
         """Verifica si la opcion cumple los filtros de horario."""
-        if max_arrival_time and option.arrival_time.time() > max_arrival_time:
-            return False
-        if min_departure_time and option.departure_time.time() < min_departure_time:
-            return False
-        return True
+        return matches_time_filter(option, max_arrival_time, min_departure_time)
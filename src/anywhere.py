@@ -0,0 +1,82 @@
+"""Modo "a cualquier sitio": destinos mas baratos desde los origenes configurados."""
+
+import logging
+from datetime import date, timedelta
+from typing import Optional
+
+from config.settings import ANYWHERE_TOP_N, DAY_PAIRS
+from src.amadeus_client import AmadeusUnavailableError, DestinationQuote
+from src.planner import run_concurrently
+from src.search import FlightSearcher, RouteResult
+
+logger = logging.getLogger(__name__)
+
+
+def rank_destinations(
+    client,
+    origins: list[str],
+    week_start: date,
+    day_pairs: Optional[list[tuple[int, int]]] = None,
+) -> list[DestinationQuote]:
+    """
+    Mejor precio orientativo por (origen, destino) para los pares de dias.
+
+    Hace una sola llamada de inspiracion por origen, cubriendo toda la
+    semana, y se queda con las cotizaciones cuyo dia de ida y vuelta
+    coinciden con algun par de DAY_PAIRS.
+
+    Returns:
+        Cotizaciones ordenadas por precio, una por (origen, destino)
+    """
+    day_pairs = day_pairs or DAY_PAIRS
+    wanted = {(week_start + timedelta(days=out), week_start + timedelta(days=ret)) for out, ret in day_pairs}
+    first = min(out for out, _ in day_pairs)
+    last = max(out for out, _ in day_pairs)
+    durations = sorted({ret - out for out, ret in day_pairs})
+    departure_dates = f"{week_start + timedelta(days=first)},{week_start + timedelta(days=last)}"
+    duration = f"{durations[0]},{durations[-1]}" if len(durations) > 1 else str(durations[0])
+
+    best: dict[tuple[str, str], DestinationQuote] = {}
+    for origin in origins:
+        try:
+            quotes = client.search_destinations(origin, departure_dates, duration)
+        except AmadeusUnavailableError as e:
+            logger.error(f"Sin destinos para {origin}: {e}")
+            continue
+
+        for quote in quotes:
+            if (quote.departure_date, quote.return_date) not in wanted or quote.destination in origins:
+                continue
+            key = (quote.origin, quote.destination)
+            if key not in best or quote.price < best[key].price:
+                best[key] = quote
+
+    return sorted(best.values(), key=lambda x: x.price)
+
+
+def search_anywhere(
+    searcher: FlightSearcher,
+    origins: list[str],
+    target_date: date,
+    top_n: int = ANYWHERE_TOP_N,
+) -> tuple[list[DestinationQuote], list[RouteResult]]:
+    """
+    Rankea destinos con la busqueda de inspiracion y verifica solo los mejores.
+
+    Las busquedas completas (con filtros de horario) se hacen solo para los
+    top_n candidatos, en paralelo con el planificador compartido.
+
+    Returns:
+        (candidatos verificados, RouteResult de cada uno ordenados por precio)
+    """
+    week_start = target_date - timedelta(days=target_date.weekday())
+    candidates = rank_destinations(searcher.client, origins, week_start, searcher.day_pairs)[:top_n]
+
+    results = [
+        result for _, result in run_concurrently(
+            lambda quote: searcher.search_route(quote.origin, quote.destination, target_date),
+            candidates,
+        )
+    ]
+    results.sort(key=lambda r: r.best_combo.total_price if r.best_combo else float("inf"))
+    return candidates, results
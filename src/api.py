@@ -0,0 +1,258 @@
+"""
+API HTTP local de solo lectura con los resultados de la ultima ejecucion.
+
+Ejemplo:
+    python src/api.py --port 8765
+    curl http://127.0.0.1:8765/combos
+
+Rutas:
+    /combos              Mejor combo, opciones Pareto y legs sueltos por ruta
+    /minimums            Precio minimo por ruta y fecha
+    /history             Historico de precios (todas las rutas)
+    /history/MAD-BCN     Historico de una ruta
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import sys
+import threading
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Optional
+
+# Añadir el directorio raíz al path para imports
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from config.settings import API_HOST, API_PORT, HISTORY_FILE, OFFERS_DIR, ROUTES
+from src.amadeus_client import FlightOption
+from src.offer_store import latest_run, run_paths
+from src.price_history import PriceHistory
+from src.replay import ReplayClient
+from src.search import FlightSearcher, RouteResult, TripOption
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Response:
+    """Cuerpo JSON ya serializado y su ETag."""
+    body: bytes
+    etag: str
+
+
+def _leg_dict(leg: Optional[FlightOption]) -> Optional[dict]:
+    return leg.to_dict() if leg else None
+
+
+def _trip_dict(trip: Optional[TripOption]) -> Optional[dict]:
+    if trip is None:
+        return None
+    return {
+        "outbound_date": trip.outbound_date.isoformat(),
+        "return_date": trip.return_date.isoformat(),
+        "total_price": trip.total_price,
+        "bundle_price": trip.bundle_price,
+        "outbound": trip.outbound.to_dict(),
+        "return": trip.return_flight.to_dict(),
+    }
+
+
+def _route_dict(result: RouteResult) -> dict:
+    return {
+        "origin": result.origin,
+        "destination": result.destination,
+        "week_start": result.week_start.isoformat(),
+        "relaxed_filters": result.relaxed_filters,
+        "api_unavailable": result.api_unavailable,
+        "stale_since": result.stale_since.isoformat() if result.stale_since else None,
+        "best_combo": _trip_dict(result.best_combo),
+        "pareto_options": [_trip_dict(trip) for trip in result.pareto_options],
+        "best_outbound": _leg_dict(result.best_outbound),
+        "best_return": _leg_dict(result.best_return),
+    }
+
+
+def _history_dict(history: PriceHistory, route: Optional[str] = None) -> list[dict]:
+    rows = []
+    for key, stats in history.to_dict().items():
+        key_route, weekday, days_before = key.split("|")
+        if route and key_route != route:
+            continue
+        rows.append({
+            "route": key_route,
+            "weekday": int(weekday),
+            "days_before": int(days_before),
+            "count": stats["count"],
+            "median": stats["median"],
+            "p25": stats["p25"],
+            "p75": stats["p75"],
+        })
+    return rows
+
+
+def _response(payload) -> Response:
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    return Response(body=body, etag=f'"{hashlib.sha1(body).hexdigest()}"')
+
+
+class ResultsStore:
+    """
+    Respuestas de la API precalculadas.
+
+    Se calculan todas juntas a partir de la ultima ejecucion guardada y del
+    historico, y no se vuelven a calcular hasta que cambian esos archivos
+    (ejecucion nueva). Las peticiones solo comprueban fecha y tamaño.
+
+    El snapshot de la ultima ejecucion se lee con mmap; se cierra el
+    anterior al recalcular y en close().
+    """
+
+    def __init__(self, offers_dir: Path = OFFERS_DIR, history_file: Path = HISTORY_FILE):
+        self.offers_dir = offers_dir
+        self.history_file = history_file
+        self.builds = 0
+        self._lock = threading.Lock()
+        self._signature: Optional[tuple] = None
+        self._responses: dict[str, Response] = {}
+        self._index = None  # SnapshotIndex de la ejecucion en uso
+
+    def get(self, path: str) -> Optional[Response]:
+        """Respuesta para una ruta de la API, o None si no existe."""
+        signature = self._current_signature()
+        with self._lock:
+            if signature != self._signature:
+                self._responses = self._build()
+                self._signature = signature
+                self.builds += 1
+            return self._responses.get(path)
+
+    def paths(self) -> list[str]:
+        """Rutas disponibles en la API."""
+        with self._lock:
+            return sorted(self._responses)
+
+    def close(self) -> None:
+        """Cierra el snapshot de la ejecucion en uso."""
+        with self._lock:
+            self._close_index()
+
+    def _close_index(self) -> None:
+        if self._index is not None:
+            self._index.close()
+            self._index = None
+
+    def _current_signature(self) -> tuple:
+        files = run_paths(self.offers_dir)[-1:] + [self.history_file]
+        signature = []
+        for path in files:
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            signature.append((path.name, stat.st_mtime_ns, stat.st_size))
+        return tuple(signature)
+
+    def _build(self) -> dict[str, Response]:
+        run = latest_run(self.offers_dir, lazy=True)
+        self._close_index()
+        self._index = run.index if run else None
+        history = PriceHistory.load(self.history_file)
+        logger.info(f"Recalculando respuestas de la API (ejecucion del {run.search_date if run else '-'})")
+
+        routes = []
+        minimums = []
+        if run:
+            searcher = FlightSearcher(client=ReplayClient(run.index, run.round_trips))
+            routes = [_route_dict(searcher.search_route(o, d, run.week_start)) for o, d in ROUTES]
+            for origin, destination, flight_date in sorted(run.index.keys()):
+                cheapest = run.index.cheapest(origin, destination, flight_date)
+                minimums.append({
+                    "origin": origin,
+                    "destination": destination,
+                    "date": flight_date.isoformat(),
+                    "price": cheapest.price if cheapest else None,
+                    "offer": _leg_dict(cheapest),
+                })
+
+        meta = {
+            "search_date": run.search_date.isoformat() if run else None,
+            "week_start": run.week_start.isoformat() if run else None,
+        }
+        responses = {
+            "/combos": _response({**meta, "routes": routes}),
+            "/minimums": _response({**meta, "minimums": minimums}),
+            "/history": _response({"history": _history_dict(history)}),
+        }
+        for origin, destination in ROUTES:
+            for route in (f"{origin}-{destination}", f"{destination}-{origin}"):
+                responses[f"/history/{route}"] = _response({"history": _history_dict(history, route)})
+        return responses
+
+
+def make_handler(store: ResultsStore) -> type[BaseHTTPRequestHandler]:
+    """Handler HTTP que sirve las respuestas de store con ETag / If-None-Match."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self._respond(send_body=True)
+
+        def do_HEAD(self):
+            self._respond(send_body=False)
+
+        def _respond(self, send_body: bool):
+            path = self.path.split("?", 1)[0].rstrip("/") or "/"
+            response = store.get(path)
+            if response is None:
+                response = _response({"error": "not found", "paths": store.paths()})
+                self._send(404, response, send_body)
+                return
+
+            if self.headers.get("If-None-Match") == response.etag:
+                self.send_response(304)
+                self.send_header("ETag", response.etag)
+                self.end_headers()
+                return
+            self._send(200, response, send_body)
+
+        def _send(self, status: int, response: Response, send_body: bool):
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(response.body)))
+            self.send_header("ETag", response.etag)
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            if send_body:
+                self.wfile.write(response.body)
+
+        def log_message(self, format, *args):
+            logger.debug(f"{self.address_string()} {format % args}")
+
+    return Handler
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="API local de solo lectura con los ultimos resultados")
+    parser.add_argument("--host", default=API_HOST, help="Direccion de escucha")
+    parser.add_argument("--port", type=int, default=API_PORT, help="Puerto")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    store = ResultsStore()
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(store))
+    logger.info(f"API escuchando en http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
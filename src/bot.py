@@ -0,0 +1,328 @@
+"""Bot interactivo de Telegram (long polling) que responde desde las ofertas ya consultadas."""
+
+import html
+import logging
+import threading
+import time as clock
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from typing import Callable, Optional
+
+from config.settings import (
+    BOT_ALLOWED_CHAT_IDS,
+    BOT_CACHE_MAX_AGE_HOURS,
+    BOT_MAX_WEEKS_AHEAD,
+    BOT_MIN_CALL_SECONDS,
+    BOT_POLL_TIMEOUT,
+    BOT_RETRY_MAX_SECONDS,
+    BOT_RETRY_SECONDS,
+    DAY_NAMES,
+    DAY_PAIRS,
+    ROUTES,
+    ROUTES_WITH_SINGLE_LEGS,
+    WEEKS_AHEAD,
+)
+from src.amadeus_client import AmadeusClient, FlightOption, matches_time_filter
+from src.formatter import format_route_message, format_summary_message
+from src.offer_index import OfferIndex, OfferKey
+from src.offer_store import StoredRun
+from src.planner import run_concurrently
+from src.providers import TransportProvider
+from src.search import FlightSearcher
+from src.telegram import TelegramClient
+
+logger = logging.getLogger(__name__)
+
+WEEKDAYS = {
+    "lunes": 0, "martes": 1, "miercoles": 2, "miércoles": 2,
+    "jueves": 3, "viernes": 4, "sabado": 5, "sábado": 5, "domingo": 6,
+}
+
+HELP_TEXT = "\n".join([
+    "Comandos:",
+    *(f"/{origin.lower()} [día] [semanas] - {origin}↔{destination}" for origin, destination in ROUTES),
+    "/semana N - Resumen de todas las rutas dentro de N semanas",
+    "",
+    f"Ej: /mad jueves, /ovd 3, /semana {WEEKS_AHEAD}",
+])
+
+
+@dataclass(frozen=True)
+class BotQuery:
+    """Consulta pedida al bot."""
+    routes: tuple[tuple[str, str], ...]
+    week_start: date
+    weekday: Optional[int] = None  # Dia de ida pedido (None = todos los configurados)
+
+
+def parse_command(text: str, today: date) -> Optional[BotQuery]:
+    """
+    Interpreta un comando del bot.
+
+    Args:
+        text: Texto del mensaje (ej: "/mad jueves", "/semana 3")
+        today: Fecha de hoy, para calcular la semana
+
+    Returns:
+        BotQuery o None si el comando no es valido
+    """
+    parts = text.strip().lower().split()
+    if not parts or not parts[0].startswith("/"):
+        return None
+    command = parts[0][1:].split("@")[0]  # En grupos llega como /mad@nombre_bot
+    args = parts[1:]
+
+    weeks = WEEKS_AHEAD
+    weekday = None
+    if command == "semana":
+        if len(args) != 1 or not args[0].isdigit():
+            return None
+        weeks = int(args[0])
+        routes = tuple(ROUTES)
+    else:
+        routes = tuple(route for route in ROUTES if route[0].lower() == command)
+        if not routes:
+            return None
+        for arg in args:
+            if arg in WEEKDAYS:
+                weekday = WEEKDAYS[arg]
+            elif arg.isdigit():
+                weeks = int(arg)
+            else:
+                return None
+
+    # La semana 0 ya ha empezado (o esta a punto): no se busca
+    if not 1 <= weeks <= BOT_MAX_WEEKS_AHEAD:
+        return None
+    target = today + timedelta(weeks=weeks)
+    return BotQuery(routes=routes, week_start=target - timedelta(days=target.weekday()), weekday=weekday)
+
+
+class _Flight:
+    """Consulta a la API en curso; las peticiones iguales esperan a su resultado."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.options: list[FlightOption] = []
+        self.error: Optional[Exception] = None
+
+
+class SharedOffers:
+    """
+    search_flights compartido por todas las consultas del bot.
+
+    Responde desde un OfferIndex en memoria mientras las ofertas no pasen de
+    max_age. Si faltan, una sola consulta va al cliente (que a su vez mira su
+    cache persistente) y las peticiones iguales que lleguen mientras tanto
+    esperan a esa misma respuesta. Las llamadas a Amadeus se espacian al
+    menos min_interval segundos, asi varios usuarios a la vez no las
+    multiplican. Con AmadeusClient solo esperan las peticiones que llegan a
+    la API (via before_request), no las que contesta su cache; con otros
+    clientes espera cada llamada.
+    """
+
+    def __init__(
+        self,
+        client,
+        max_age: timedelta = timedelta(hours=BOT_CACHE_MAX_AGE_HOURS),
+        min_interval: float = BOT_MIN_CALL_SECONDS,
+        now: Callable[[], datetime] = datetime.now,
+        sleep: Callable[[float], None] = clock.sleep,
+    ):
+        self.client = client
+        self.max_age = max_age
+        self.min_interval = min_interval
+        self.now = now
+        self.sleep = sleep
+        self.index = OfferIndex()
+        self.calls = 0
+        self._fetched_at: dict[OfferKey, datetime] = {}
+        self._inflight: dict[OfferKey, _Flight] = {}
+        self._lock = threading.Lock()
+        self._call_lock = threading.Lock()
+        self._last_call: Optional[float] = None
+        self._client_throttles = isinstance(client, AmadeusClient)
+        if self._client_throttles:
+            client.before_request = self._throttle
+
+    def warm(self, run: StoredRun) -> None:
+        """
+        Carga las ofertas de una ejecucion guardada (con la antiguedad de esa ejecucion).
+
+        La hora de la consulta es la de escritura del archivo, acotada al dia
+        de la ejecucion (una copia o un checkout posterior no la rejuvenece).
+        """
+        fetched_at = datetime.combine(run.search_date, time.max)
+        if run.saved_at is not None:
+            fetched_at = min(run.saved_at, fetched_at)
+        with self._lock:
+            for key in run.index.keys():
+                self.index.add(*key, run.index.get(*key))
+                self._fetched_at[key] = fetched_at
+        logger.info(f"Bot precargado con {len(run.index)} consultas del {run.search_date}")
+
+    def search_flights(
+        self,
+        origin: str,
+        destination: str,
+        search_date: str,
+        max_arrival_time: Optional[time] = None,
+        min_departure_time: Optional[time] = None,
+    ) -> list[FlightOption]:
+        """Misma firma que AmadeusClient.search_flights."""
+        key = (origin, destination, date.fromisoformat(search_date))
+        with self._lock:
+            offers = self._fresh(key)
+            flight = None
+            leader = False
+            if offers is None:
+                flight = self._inflight.get(key)
+                if flight is None:
+                    flight = self._inflight[key] = _Flight()
+                    leader = True
+
+        if offers is None:
+            if leader:
+                self._fetch(key, flight)
+            else:
+                flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            offers = flight.options
+
+        return [o for o in offers if matches_time_filter(o, max_arrival_time, min_departure_time)]
+
+    def _fresh(self, key: OfferKey) -> Optional[list[FlightOption]]:
+        fetched_at = self._fetched_at.get(key)
+        if fetched_at is None or self.now() - fetched_at > self.max_age:
+            return None
+        return self.index.get(*key)
+
+    def _fetch(self, key: OfferKey, flight: _Flight) -> None:
+        origin, destination, flight_date = key
+        try:
+            if not self._client_throttles:
+                self._throttle()
+            flight.options = self.client.search_flights(origin, destination, flight_date.isoformat())
+            with self._lock:
+                self.index.add(origin, destination, flight_date, flight.options)
+                self._fetched_at[key] = self.now()
+        except Exception as e:
+            flight.error = e
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.done.set()
+
+    def _throttle(self) -> None:
+        with self._call_lock:
+            if self._last_call is not None:
+                wait = self.min_interval - (clock.monotonic() - self._last_call)
+                if wait > 0:
+                    self.sleep(wait)
+            self._last_call = clock.monotonic()
+            self.calls += 1
+
+
+class FlightBot:
+    """Bot de Telegram que contesta consultas de precios."""
+
+    def __init__(
+        self,
+        telegram: TelegramClient,
+        offers: SharedOffers,
+        extra_providers: Optional[list[TransportProvider]] = None,
+        allowed_chats: Optional[list[str]] = None,
+        today: Callable[[], date] = date.today,
+        sleep: Callable[[float], None] = clock.sleep,
+    ):
+        """
+        Args:
+            telegram: Cliente de Telegram (get_updates / send_message)
+            offers: Ofertas compartidas entre consultas
+            extra_providers: Otros proveedores a mezclar (ej: trenes)
+            allowed_chats: Chats autorizados (por defecto BOT_ALLOWED_CHAT_IDS)
+        """
+        self.telegram = telegram
+        self.offers = offers
+        self.extra_providers = extra_providers or []
+        self.allowed_chats = set(allowed_chats if allowed_chats is not None else BOT_ALLOWED_CHAT_IDS)
+        self.today = today
+        self.sleep = sleep
+        self._retry_delay = 0.0
+
+    def answer(self, text: str) -> str:
+        """Respuesta a un mensaje."""
+        command = text.strip().lower().split()[0].split("@")[0] if text.strip() else ""
+        if command in ("/start", "/ayuda", "/help"):
+            return HELP_TEXT
+
+        query = parse_command(text, self.today())
+        if query is None:
+            # Se envia con parse_mode HTML: escapar <, > y & del usuario
+            return f"No entiendo \"{html.escape(text.strip())}\".\n\n{HELP_TEXT}"
+
+        day_pairs = DAY_PAIRS
+        if query.weekday is not None:
+            day_pairs = [pair for pair in DAY_PAIRS if pair[0] == query.weekday]
+            if not day_pairs:
+                return f"No se buscan idas en {DAY_NAMES[query.weekday]}."
+
+        searcher = FlightSearcher(
+            client=self.offers,
+            day_pairs=day_pairs,
+            providers=[self.offers, *self.extra_providers],
+        )
+        results = [searcher.search_route(origin, destination, query.week_start) for origin, destination in query.routes]
+
+        if len(results) == 1:
+            result = results[0]
+            return format_route_message(result, include_single_legs=result.origin in ROUTES_WITH_SINGLE_LEGS)
+        return format_summary_message(results)
+
+    def handle_update(self, update: dict) -> bool:
+        """Contesta un update de Telegram. Devuelve True si se envio respuesta."""
+        message = update.get("message") or {}
+        text = message.get("text")
+        chat_id = str(message.get("chat", {}).get("id", ""))
+        if not text:
+            return False
+        if chat_id not in self.allowed_chats:
+            logger.warning(f"Mensaje ignorado de chat no autorizado {chat_id}")
+            return False
+
+        started = clock.monotonic()
+        reply = self.answer(text)
+        logger.info(f"Respuesta a \"{text}\" en {clock.monotonic() - started:.2f}s")
+        return self.telegram.send_message(reply, chat_id=chat_id)
+
+    def poll_once(self, offset: Optional[int] = None) -> Optional[int]:
+        """
+        Recibe y contesta un lote de mensajes (en paralelo).
+
+        Si Telegram falla espera antes de volver, cada vez el doble hasta
+        BOT_RETRY_MAX_SECONDS, para no reintentar en bucle mientras no responde.
+
+        Returns:
+            Offset para la siguiente llamada
+        """
+        updates = self.telegram.get_updates(offset=offset, timeout=BOT_POLL_TIMEOUT)
+        if updates is None:
+            self._retry_delay = min(self._retry_delay * 2 or BOT_RETRY_SECONDS, BOT_RETRY_MAX_SECONDS)
+            logger.warning(f"Telegram no responde, reintento en {self._retry_delay:.0f}s")
+            self.sleep(self._retry_delay)
+            return offset
+        self._retry_delay = 0.0
+
+        for _ in run_concurrently(self.handle_update, updates):
+            pass
+        if updates:
+            offset = max(u["update_id"] for u in updates) + 1
+        return offset
+
+    def run(self) -> None:
+        """Bucle de long polling (hasta Ctrl+C)."""
+        logger.info("Bot escuchando mensajes")
+        offset = None
+        while True:
+            offset = self.poll_once(offset)
@@ -0,0 +1,106 @@
+"""Cache persistente en disco (clave -> valor JSON)."""
+
+import json
+import logging
+import os
+import re
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Iterator, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin bloqueo entre procesos
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Fechas de vuelo dentro de una clave (offers|MAD|BCN|2026-01-26, roundtrip|...|ida|vuelta)
+_KEY_DATE = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+
+def _expired(key: str, today: date) -> bool:
+    """True si todas las fechas de la clave ya pasaron (las claves sin fecha no caducan)."""
+    dates = _KEY_DATE.findall(key)
+    return bool(dates) and max(dates) < today.isoformat()
+
+
+@dataclass
+class CacheEntry:
+    """Valor guardado y cuando se guardo."""
+    value: Any
+    stored_at: datetime
+
+
+class PersistentCache:
+    """
+    Cache clave -> valor JSON guardada en un archivo.
+
+    Se carga al primer acceso y se reescribe en cada set(), para que los
+    datos sobrevivan aunque la ejecucion termine mal. Varios procesos
+    (workers de la cola) pueden compartir el archivo: cada set() bloquea
+    <archivo>.lock, vuelve a leer el archivo y escribe lo leido mas su
+    clave, asi no pisa lo que otro proceso guardo despues de cargarlo.
+
+    Las entradas de vuelos que ya salieron se descartan al cargar y al
+    escribir, para que el archivo no crezca sin limite semana a semana.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._data: Optional[dict[str, dict]] = None
+
+    def _read(self) -> Optional[dict[str, dict]]:
+        """Contenido vigente del archivo, {} si no existe o None si esta ilegible."""
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return {}
+        except ValueError as e:
+            logger.warning(f"Cache ilegible ({self.path.name}): {e}")
+            return None
+        today = date.today()
+        return {key: item for key, item in data.items() if not _expired(key, today)}
+
+    def _load(self) -> dict[str, dict]:
+        if self._data is None:
+            self._data = self._read() or {}
+        return self._data
+
+    @contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        """Bloqueo exclusivo entre procesos mientras se lee y reescribe el archivo."""
+        if fcntl is None:
+            yield
+            return
+        with open(self.path.with_name(f"{self.path.name}.lock"), "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            item = self._load().get(key)
+        if item is None:
+            return None
+        return CacheEntry(value=item["value"], stored_at=datetime.fromisoformat(item["stored_at"]))
+
+    def set(self, key: str, value: Any) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock, self._file_lock():
+            # Lo que hayan guardado otros procesos desde que se cargo, mas lo de este
+            data = self._read()
+            if data is None:
+                data = self._load()
+            data[key] = {"value": value, "stored_at": datetime.now().isoformat(timespec="seconds")}
+            self._data = data
+            # Escritura atomica: quien lee sin bloqueo (get) nunca ve un archivo a medias
+            tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+            tmp.write_text(json.dumps(data), encoding="utf-8")
+            os.replace(tmp, self.path)
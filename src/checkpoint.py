@@ -0,0 +1,178 @@
+"""Checkpoint en disco de una ejecucion, para reanudarla sin repetir consultas."""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from datetime import date, datetime
+from pathlib import Path
+
+from src.amadeus_client import FlightOption, RoundTripOffer
+from src.offer_index import OfferIndex, RoundTripKey
+
+logger = logging.getLogger(__name__)
+
+
+def _digest(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class RunCheckpoint:
+    """
+    Registro JSONL de lo ya hecho en una ejecucion (run_id + semana).
+
+    Cada consulta terminada (solo ida o ida y vuelta), el guardado del historico, cada mensaje
+    formateado y cada envio correcto se añaden como una linea y se fuerzan
+    a disco. Si la ejecucion muere, --resume reutiliza las consultas y solo
+    envia los mensajes que faltan; si ya se habian guardado las ofertas
+    (stored), --resume reenvia los mensajes pendientes sin volver a buscar.
+    """
+
+    def __init__(self, path: Path, run_id: str, week_start: date):
+        self.path = path
+        self.run_id = run_id
+        self.week_start = week_start
+        self.queries = OfferIndex()
+        self.round_trips: dict[RoundTripKey, list[RoundTripOffer]] = {}
+        self.stored = False
+        self.messages: list[str] = []
+        self._sent: set[str] = set()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def open(cls, directory: Path, run_id: str, week_start: date, resume: bool = False) -> "RunCheckpoint":
+        """
+        Checkpoint de la ejecucion: el existente si resume, o uno nuevo.
+
+        Si el checkpoint guardado es de otra semana se empieza de cero.
+        """
+        path = directory / f"run_{run_id}.jsonl"
+        if resume and path.exists():
+            checkpoint = cls.load(path)
+            if checkpoint.week_start == week_start:
+                logger.info(
+                    f"Reanudando {run_id}: {len(checkpoint.queries)} consultas hechas, "
+                    f"{len(checkpoint.pending_messages())} mensajes por enviar"
+                )
+                return checkpoint
+            logger.warning(f"El checkpoint de {run_id} es de la semana {checkpoint.week_start}, se empieza de cero")
+
+        checkpoint = cls(path, run_id, week_start)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("", encoding="utf-8")
+        checkpoint._append({
+            "event": "run",
+            "run_id": run_id,
+            "week_start": week_start.isoformat(),
+            "started": datetime.now().isoformat(timespec="seconds"),
+        })
+        return checkpoint
+
+    @classmethod
+    def load(cls, path: Path) -> "RunCheckpoint":
+        """
+        Lee un checkpoint.
+
+        Raises:
+            ValueError: Si el archivo no empieza con la cabecera de la ejecucion
+        """
+        checkpoint = None
+        with open(path, encoding="utf-8") as f:
+            for number, line in enumerate(f, start=1):
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    # Ultima linea a medias si el proceso murio escribiendola
+                    logger.warning(f"Linea {number} ilegible en {path.name}, se ignora")
+                    continue
+
+                kind = event.get("event")
+                if checkpoint is None:
+                    if kind != "run":
+                        raise ValueError(f"{path.name} no es un checkpoint de ejecucion")
+                    checkpoint = cls(path, event["run_id"], date.fromisoformat(event["week_start"]))
+                elif kind == "query":
+                    checkpoint.queries.add(
+                        event["origin"],
+                        event["destination"],
+                        date.fromisoformat(event["date"]),
+                        [FlightOption.from_dict(o) for o in event["offers"]],
+                    )
+                elif kind == "roundtrip":
+                    key = (
+                        event["origin"],
+                        event["destination"],
+                        date.fromisoformat(event["outbound_date"]),
+                        date.fromisoformat(event["return_date"]),
+                    )
+                    checkpoint.round_trips[key] = [RoundTripOffer.from_dict(o) for o in event["offers"]]
+                elif kind == "stored":
+                    checkpoint.stored = True
+                elif kind == "message":
+                    checkpoint.messages.append(event["text"])
+                elif kind == "sent":
+                    checkpoint._sent.add(event["sha1"])
+
+        if checkpoint is None:
+            raise ValueError(f"{path.name} esta vacio")
+        return checkpoint
+
+    def _append(self, event: dict) -> None:
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(event, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+    def record_query(self, origin: str, destination: str, flight_date: date, options: list[FlightOption]) -> None:
+        """Guarda una consulta terminada (las respuestas de cache obsoleta no, se reintentan)."""
+        if any(o.stale_since for o in options):
+            return
+        self.queries.add(origin, destination, flight_date, options)
+        self._append({
+            "event": "query",
+            "origin": origin,
+            "destination": destination,
+            "date": flight_date.isoformat(),
+            "offers": [o.to_dict() for o in options],
+        })
+
+    def record_round_trip(self, key: RoundTripKey, offers: list[RoundTripOffer]) -> None:
+        """Guarda una busqueda ida y vuelta terminada (igual que record_query)."""
+        if any(o.outbound.stale_since for o in offers):
+            return
+        origin, destination, outbound_date, return_date = key
+        self.round_trips[key] = list(offers)
+        self._append({
+            "event": "roundtrip",
+            "origin": origin,
+            "destination": destination,
+            "outbound_date": outbound_date.isoformat(),
+            "return_date": return_date.isoformat(),
+            "offers": [o.to_dict() for o in offers],
+        })
+
+    def mark_stored(self) -> None:
+        """Ofertas e historico de la ejecucion ya guardados."""
+        self.stored = True
+        self._append({"event": "stored"})
+
+    def record_message(self, text: str) -> None:
+        """Guarda un mensaje formateado antes de enviarlo."""
+        if text in self.messages:
+            return
+        self.messages.append(text)
+        self._append({"event": "message", "text": text})
+
+    def mark_sent(self, text: str) -> None:
+        self._sent.add(_digest(text))
+        self._append({"event": "sent", "sha1": _digest(text)})
+
+    def was_sent(self, text: str) -> bool:
+        return _digest(text) in self._sent
+
+    def pending_messages(self) -> list[str]:
+        """Mensajes formateados que no se llegaron a enviar."""
+        return [text for text in self.messages if not self.was_sent(text)]
+
@@ -0,0 +1,70 @@
+"""Combinaciones de vuelos entre rutas (viajes mixtos)."""
+
+from datetime import date, time, timedelta
+from typing import Optional
+
+from config.settings import DAY_PAIRS, MAX_ARRIVAL_TIME, MIN_DEPARTURE_TIME
+from src.offer_index import OfferIndex
+from src.search import TripOption
+
+
+def find_mixed_trips(
+    index: OfferIndex,
+    origins: list[str],
+    destination: str,
+    week_start: date,
+    day_pairs: Optional[list[tuple[int, int]]] = None,
+    max_arrival_time: Optional[time] = MAX_ARRIVAL_TIME,
+    min_departure_time: Optional[time] = MIN_DEPARTURE_TIME,
+) -> list[TripOption]:
+    """
+    Busca el mejor viaje mixto (ida desde X, vuelta a Y con X != Y).
+
+    Solo usa ofertas ya consultadas, asi que no gasta llamadas a la API.
+    Para cada par de dias cruza la oferta mas barata de cada fecha que
+    cumple los filtros (OfferIndex.cheapest la guarda por filtros), en vez
+    de comparar todas las ofertas entre si.
+
+    Args:
+        index: Ofertas ya consultadas
+        origins: Codigos IATA de los origenes configurados
+        destination: Codigo IATA destino comun (ej: "BCN")
+        week_start: Lunes de la semana buscada
+        day_pairs: Pares de dias (por defecto DAY_PAIRS)
+        max_arrival_time: Hora maxima de llegada de la ida
+        min_departure_time: Hora minima de salida de la vuelta
+
+    Returns:
+        Mejor TripOption para cada par (X, Y), ordenados por precio
+    """
+    best: dict[tuple[str, str], TripOption] = {}
+
+    for day_out, day_ret in day_pairs or DAY_PAIRS:
+        outbound_date = week_start + timedelta(days=day_out)
+        return_date = week_start + timedelta(days=day_ret)
+
+        outbounds = {}
+        returns = {}
+        for origin in origins:
+            out = index.cheapest(origin, destination, outbound_date, max_arrival_time=max_arrival_time)
+            if out:
+                outbounds[origin] = out
+            ret = index.cheapest(destination, origin, return_date, min_departure_time=min_departure_time)
+            if ret:
+                returns[origin] = ret
+
+        for out_origin, out in outbounds.items():
+            for ret_origin, ret in returns.items():
+                if out_origin == ret_origin:
+                    continue
+                trip = TripOption(
+                    outbound=out,
+                    return_flight=ret,
+                    outbound_date=outbound_date,
+                    return_date=return_date,
+                )
+                current = best.get((out_origin, ret_origin))
+                if current is None or trip.total_price < current.total_price:
+                    best[(out_origin, ret_origin)] = trip
+
+    return sorted(best.values(), key=lambda x: x.total_price)
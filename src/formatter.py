@@ -1,8 +1,15 @@
 # src/formatter.py
 """Formateador de mensajes para Telegram."""
 
-from config.settings import DAY_NAMES
-from src.search import RouteResult
+from datetime import date
+from typing import Optional
+
+from config.settings import DAY_NAMES, FORMATTER_CACHE_SIZE, MAX_ARRIVAL_TIME, MIN_DEPARTURE_TIME
+from src.amadeus_client import DestinationQuote, FlightOption
+from src.price_history import PriceHistory
+from src.reference_data import get_reference
+from src.render_cache import RenderCache, content_key
+from src.search import RouteResult, TripOption
 from src.url_builder import skyscanner_url, trainline_url
 
 
@@ -12,36 +19,50 @@ MONTH_NAMES = {
     9: "sep", 10: "oct", 11: "nov", 12: "dic"
 }
 
+# Secciones ya formateadas, compartidas por todos los mensajes del proceso
+SECTIONS = RenderCache(FORMATTER_CACHE_SIZE)
+
 
-def format_telegram_message(mad_result: RouteResult, ovd_result: RouteResult) -> str:
+def format_telegram_message(
+    mad_result: RouteResult,
+    ovd_result: RouteResult,
+    mixed_trips: Optional[list[TripOption]] = None,
+    history: Optional[PriceHistory] = None,
+    as_of: Optional[date] = None,
+) -> str:
     """
     Formatea el mensaje completo para Telegram.
 
     Args:
         mad_result: Resultado de busqueda MAD<->BCN
         ovd_result: Resultado de busqueda OVD<->BCN
+        mixed_trips: Viajes mixtos (ida y vuelta por origenes distintos)
+        history: Historico de precios para anotar si un precio es barato o caro
+        as_of: Fecha de la busqueda (por defecto hoy)
 
     Returns:
         Mensaje formateado para Telegram
     """
-    week_start = mad_result.week_start
-    month_name = MONTH_NAMES.get(week_start.month, str(week_start.month))
-
-    lines = [
-        f"✈️ VUELOS BCN - Semana del {week_start.day} {month_name}",
-        "",
-    ]
+    lines = [_header(mad_result.week_start), ""]
 
     # Seccion MAD <-> BCN
-    lines.append("🛫 MADRID ↔ BARCELONA")
-    lines.extend(_format_route_section(mad_result, include_single_legs=True))
+    lines.append(_route_title(mad_result))
+    as_of = as_of or date.today()
+    lines.extend(_format_route_section(mad_result, include_single_legs=True, history=history, as_of=as_of))
     lines.append("")
 
     # Seccion OVD <-> BCN
-    lines.append("🛫 OVIEDO ↔ BARCELONA")
-    lines.extend(_format_route_section(ovd_result, include_single_legs=False))
+    lines.append(_route_title(ovd_result))
+    lines.extend(_format_route_section(ovd_result, include_single_legs=False, history=history, as_of=as_of))
     lines.append("")
 
+    # Viajes mixtos (ej: MAD->BCN->OVD)
+    if mixed_trips:
+        lines.append("🔀 VIAJES MIXTOS")
+        for trip in mixed_trips:
+            lines.extend(_format_mixed_trip(trip))
+        lines.append("")
+
     # Enlace a Trainline (solo MAD<->BCN)
     trainline = trainline_url("MAD", "BCN")
     if trainline:
@@ -51,8 +72,165 @@ def format_telegram_message(mad_result: RouteResult, ovd_result: RouteResult) ->
     return "\n".join(lines)
 
 
-def _format_route_section(result: RouteResult, include_single_legs: bool) -> list[str]:
-    """Formatea una seccion de ruta."""
+def format_route_message(
+    result: RouteResult,
+    include_single_legs: bool,
+    history: Optional[PriceHistory] = None,
+    as_of: Optional[date] = None,
+) -> str:
+    """
+    Formatea el mensaje de una sola ruta (modo streaming).
+
+    Args:
+        result: Resultado de busqueda de la ruta
+        include_single_legs: Mostrar legs sueltos
+        history: Historico de precios para anotar si un precio es barato o caro
+        as_of: Fecha de la busqueda (por defecto hoy)
+
+    Returns:
+        Mensaje formateado para Telegram
+    """
+    lines = [_header(result.week_start), "", _route_title(result)]
+    lines.extend(_format_route_section(
+        result, include_single_legs=include_single_legs, history=history, as_of=as_of or date.today(),
+    ))
+    return "\n".join(lines)
+
+
+def format_summary_message(
+    results: list[RouteResult],
+    mixed_trips: Optional[list[TripOption]] = None,
+) -> str:
+    """Resumen final con el mejor combo de cada ruta y los viajes mixtos."""
+    lines = [f"📋 RESUMEN - {_header(results[0].week_start)}", ""] if results else ["📋 RESUMEN", ""]
+
+    for result in results:
+        if result.best_combo:
+            combo = result.best_combo
+            out_day = DAY_NAMES[combo.outbound_date.weekday()]
+            ret_day = DAY_NAMES[combo.return_date.weekday()]
+            lines.append(
+                f"{result.origin}↔{result.destination}: {combo.total_price:.0f}€ "
+                f"({out_day} {combo.outbound_date.day} → {ret_day} {combo.return_date.day})"
+            )
+        else:
+            lines.append(f"{result.origin}↔{result.destination}: sin opciones")
+
+    for trip in mixed_trips or []:
+        lines.append(
+            f"{trip.outbound.origin}→{trip.outbound.destination}→{trip.return_flight.destination}: "
+            f"{trip.total_price:.0f}€"
+        )
+
+    return "\n".join(lines)
+
+
+def format_anywhere_message(candidates: list[DestinationQuote], results: list[RouteResult]) -> str:
+    """
+    Formatea el ranking de destinos del modo "a cualquier sitio".
+
+    Args:
+        candidates: Cotizaciones orientativas de los destinos verificados
+        results: Busqueda completa de cada candidato, ordenada por precio
+
+    Returns:
+        Mensaje formateado para Telegram
+    """
+    if not candidates:
+        return "🌍 DESTINOS MÁS BARATOS\n\n   Sin destinos disponibles"
+
+    quotes = {(q.origin, q.destination): q for q in candidates}
+    lines = [f"🌍 DESTINOS MÁS BARATOS - {_header(results[0].week_start if results else candidates[0].departure_date)}", ""]
+
+    for result in results:
+        quote = quotes.get((result.origin, result.destination))
+        title = f"{_city(result.origin)} → {_city(result.destination)}"
+        if quote:
+            title += f" (desde {quote.price:.0f}€ orientativo)"
+        lines.append(f"📍 {title}")
+
+        if result.best_combo:
+            combo = result.best_combo
+            out_day = DAY_NAMES[combo.outbound_date.weekday()]
+            ret_day = DAY_NAMES[combo.return_date.weekday()]
+            lines.append(
+                f"   Mejor combo: {combo.total_price:.0f}€ "
+                f"{out_day} {combo.outbound_date.day} → {ret_day} {combo.return_date.day}"
+            )
+            lines.append(
+                f"   🔗 {skyscanner_url(result.origin, result.destination, combo.outbound_date, combo.return_date)}"
+            )
+            if result.relaxed_filters:
+                lines.append("   ⚠️ Horarios ampliados")
+        else:
+            lines.append("   Sin opciones en horario")
+        lines.append("")
+
+    return "\n".join(lines).rstrip()
+
+
+def _header(week_start: date) -> str:
+    month_name = MONTH_NAMES.get(week_start.month, str(week_start.month))
+    return f"✈️ VUELOS BCN - Semana del {week_start.day} {month_name}"
+
+
+def _city(code: str) -> str:
+    """Nombre de la ciudad en mayúsculas (o el código si no se conoce)."""
+    return (get_reference().city_name(code) or code).upper()
+
+
+def _route_title(result: RouteResult) -> str:
+    origin = _city(result.origin)
+    destination = _city(result.destination)
+    return f"🛫 {origin} ↔ {destination}"
+
+
+def _format_route_section(
+    result: RouteResult,
+    include_single_legs: bool,
+    history: Optional[PriceHistory] = None,
+    as_of: Optional[date] = None,
+) -> list[str]:
+    """
+    Formatea una seccion de ruta.
+
+    Las notas del historico se calculan en cada llamada; el resto se
+    reutiliza si ya se formateo una seccion con los mismos datos.
+    """
+    notes = _route_notes(result, include_single_legs, history, as_of)
+    key = ("route", content_key(result), include_single_legs, notes)
+    return list(SECTIONS.get_or_render(key, lambda: _render_route_section(result, include_single_legs, notes)))
+
+
+def _route_notes(
+    result: RouteResult,
+    include_single_legs: bool,
+    history: Optional[PriceHistory],
+    as_of: Optional[date],
+) -> tuple[str, str, str]:
+    """Notas del historico para el combo, la ida suelta y la vuelta suelta."""
+    combo_note = out_note = ret_note = ""
+    if history is None or as_of is None:
+        return combo_note, out_note, ret_note
+
+    if result.best_combo:
+        combo = result.best_combo
+        combo_note = _history_note(history, [
+            (combo.outbound.origin, combo.outbound.destination, combo.outbound_date),
+            (combo.return_flight.origin, combo.return_flight.destination, combo.return_date),
+        ], combo.total_price, as_of)
+    if include_single_legs and result.best_outbound:
+        out = result.best_outbound
+        out_note = _history_note(history, [(out.origin, out.destination, out.flight_date)], out.price, as_of)
+    if include_single_legs and result.best_return:
+        ret = result.best_return
+        ret_note = _history_note(history, [(ret.origin, ret.destination, ret.flight_date)], ret.price, as_of)
+    return combo_note, out_note, ret_note
+
+
+def _render_route_section(result: RouteResult, include_single_legs: bool, notes: tuple[str, str, str]) -> tuple[str, ...]:
+    """Lineas de una seccion de ruta con las notas del historico ya calculadas."""
+    combo_note, out_note, ret_note = notes
     lines = []
 
     if result.best_combo:
@@ -60,31 +238,54 @@ def _format_route_section(result: RouteResult, include_single_legs: bool) -> lis
         out_day = DAY_NAMES[combo.outbound_date.weekday()]
         ret_day = DAY_NAMES[combo.return_date.weekday()]
 
-        lines.append(f"   Mejor combo: {combo.total_price:.0f}€")
+        # Las ofertas ida y vuelta solo tienen precio conjunto: sin precio por leg
+        bundle = " (ida y vuelta juntas)" if combo.is_bundle else ""
+        out_price = "" if combo.is_bundle else f" {combo.outbound.price:.0f}€"
+        ret_price = "" if combo.is_bundle else f" {combo.return_flight.price:.0f}€"
+        lines.append(f"   Mejor combo: {combo.total_price:.0f}€{bundle}{combo_note}")
         lines.append(f"   {out_day} {combo.outbound_date.day} → {ret_day} {combo.return_date.day}")
         lines.append(
-            f"   {combo.outbound.origin}→{combo.outbound.destination} "
-            f"{combo.outbound.departure_time_str} ({combo.outbound.carrier_name}) "
-            f"{combo.outbound.price:.0f}€"
+            f"   {_mode_icon(combo.outbound)}{combo.outbound.origin}→{combo.outbound.destination} "
+            f"{combo.outbound.departure_time_str} ({combo.outbound.carrier_name}){out_price}"
         )
         lines.append(
-            f"   {combo.return_flight.origin}→{combo.return_flight.destination} "
-            f"{combo.return_flight.departure_time_str} ({combo.return_flight.carrier_name}) "
-            f"{combo.return_flight.price:.0f}€"
+            f"   {_mode_icon(combo.return_flight)}{combo.return_flight.origin}→{combo.return_flight.destination} "
+            f"{combo.return_flight.departure_time_str} ({combo.return_flight.carrier_name}){ret_price}"
         )
 
-        # URL del combo
-        url = skyscanner_url(
-            result.origin, result.destination,
-            combo.outbound_date, combo.return_date
-        )
-        lines.append(f"   🔗 {url}")
+        # URL del combo (una por leg si alguno es en tren)
+        if combo.outbound.mode == "flight" and combo.return_flight.mode == "flight":
+            url = skyscanner_url(
+                result.origin, result.destination,
+                combo.outbound_date, combo.return_date
+            )
+            lines.append(f"   🔗 {url}")
+        else:
+            for leg in (combo.outbound, combo.return_flight):
+                url = _leg_url(leg)
+                if url:
+                    lines.append(f"   🔗 {url}")
 
         if result.relaxed_filters:
             lines.append("   ⚠️ Horarios ampliados (sin opciones en horario ideal)")
+    elif result.api_unavailable:
+        lines.append("   ⚠️ Amadeus no responde: sin datos para esta ruta")
     else:
         lines.append("   Sin opciones disponibles")
 
+    if result.stale_since:
+        stale = result.stale_since
+        month_name = MONTH_NAMES.get(stale.month, str(stale.month))
+        lines.append(f"   ⚠️ Precios guardados del {stale.day} {month_name} (Amadeus no responde)")
+
+    # Alternativas no dominadas (precio vs horario)
+    alternatives = [t for t in result.pareto_options if t != result.best_combo]
+    if alternatives:
+        lines.append("")
+        lines.append("   📊 Alternativas (precio vs horario):")
+        for trip in alternatives:
+            lines.append(_format_pareto_option(trip))
+
     # Single legs (solo si esta habilitado para esta ruta)
     if include_single_legs:
         if result.best_outbound:
@@ -93,10 +294,11 @@ def _format_route_section(result: RouteResult, include_single_legs: bool) -> lis
             lines.append("")
             lines.append(
                 f"   📤 Ida suelta: {out.price:.0f}€ "
-                f"{out_day} {out.flight_date.day} {out.departure_time_str} ({out.carrier_name})"
+                f"{out_day} {out.flight_date.day} {out.departure_time_str} ({out.carrier_name}){out_note}"
             )
-            url = skyscanner_url(result.origin, result.destination, out.flight_date)
-            lines.append(f"   🔗 {url}")
+            url = _leg_url(out)
+            if url:
+                lines.append(f"   🔗 {url}")
 
         if result.best_return:
             ret = result.best_return
@@ -104,9 +306,80 @@ def _format_route_section(result: RouteResult, include_single_legs: bool) -> lis
             lines.append("")
             lines.append(
                 f"   📥 Vuelta suelta: {ret.price:.0f}€ "
-                f"{ret_day} {ret.flight_date.day} {ret.departure_time_str} ({ret.carrier_name})"
+                f"{ret_day} {ret.flight_date.day} {ret.departure_time_str} ({ret.carrier_name}){ret_note}"
             )
-            url = skyscanner_url(result.destination, result.origin, ret.flight_date)
-            lines.append(f"   🔗 {url}")
+            url = _leg_url(ret)
+            if url:
+                lines.append(f"   🔗 {url}")
+
+    return tuple(lines)
+
+
+def _mode_icon(leg: FlightOption) -> str:
+    """Marca los legs en tren."""
+    return "🚄 " if leg.mode == "rail" else ""
+
+
+def _leg_url(leg: FlightOption) -> Optional[str]:
+    """Enlace para reservar un leg suelto (Skyscanner o Trainline)."""
+    if leg.mode == "rail":
+        return trainline_url(leg.origin, leg.destination)
+    return skyscanner_url(leg.origin, leg.destination, leg.flight_date)
+
+
+def _history_note(
+    history: Optional[PriceHistory],
+    legs: list[tuple[str, str, date]],
+    price: float,
+    as_of: Optional[date],
+) -> str:
+    """Anotacion de precio respecto al historico (vacia si no hay datos)."""
+    if history is None or as_of is None:
+        return ""
+    comparison = history.compare(legs, price, as_of)
+    if comparison is None or comparison.level == "normal":
+        return ""
+
+    pct = abs(comparison.pct_vs_median) * 100
+    if comparison.level == "cheap":
+        return f" (📉 {pct:.0f}% por debajo de lo habitual)"
+    return f" (📈 {pct:.0f}% por encima de lo habitual)"
+
 
-    return lines
+def _format_pareto_option(trip: TripOption) -> str:
+    """Formatea una alternativa del frente de Pareto en una linea."""
+    out_day = DAY_NAMES[trip.outbound_date.weekday()]
+    ret_day = DAY_NAMES[trip.return_date.weekday()]
+    line = (
+        f"   · {trip.total_price:.0f}€ {out_day} {trip.outbound_date.day} → {ret_day} {trip.return_date.day}"
+        f" · llega {trip.outbound.arrival_time_str} · vuelve {trip.return_flight.departure_time_str}"
+    )
+    if not trip.within_time_filters(MAX_ARRIVAL_TIME, MIN_DEPARTURE_TIME):
+        line += " ⚠️"
+    return line
+
+
+def _format_mixed_trip(trip: TripOption) -> list[str]:
+    """Formatea un viaje mixto (ida y vuelta con origenes distintos), reutilizando el ya formateado."""
+    return list(SECTIONS.get_or_render(("mixed", content_key(trip)), lambda: _render_mixed_trip(trip)))
+
+
+def _render_mixed_trip(trip: TripOption) -> tuple[str, ...]:
+    out = trip.outbound
+    ret = trip.return_flight
+    out_day = DAY_NAMES[trip.outbound_date.weekday()]
+    ret_day = DAY_NAMES[trip.return_date.weekday()]
+
+    lines = [
+        f"   {out.origin}→{out.destination}→{ret.destination}: {trip.total_price:.0f}€",
+        f"   {out_day} {trip.outbound_date.day} → {ret_day} {trip.return_date.day}",
+    ]
+    for leg in (out, ret):
+        lines.append(
+            f"   {_mode_icon(leg)}{leg.origin}→{leg.destination} {leg.departure_time_str} "
+            f"({leg.carrier_name}) {leg.price:.0f}€"
+        )
+        url = _leg_url(leg)
+        if url:
+            lines.append(f"   🔗 {url}")
+    return tuple(lines)
@@ -0,0 +1,174 @@
+"""
+Transporte HTTP directo al endpoint de ofertas de Amadeus (sin el SDK).
+
+El SDK abre una conexion nueva por peticion (urllib), sin compresion, y
+envuelve cada respuesta en sus propios objetos. Este transporte reutiliza
+conexiones (keep-alive) con una requests.Session, pide gzip y decodifica
+el JSON con orjson si esta instalado (opcional, si no se usa json).
+
+De cada oferta solo se conservan los campos que lee AmadeusClient (precio
+y primer segmento de cada itinerario), mas los nombres de aerolineas. El
+cuerpo se decodifica entero (no hay decodificador JSON incremental entre
+las dependencias); lo que se ahorra es que el resto de la respuesta
+(tarifas, equipaje, fareDetails...) se suelta en cuanto se extrae.
+"""
+
+import logging
+import threading
+import time
+from typing import Callable, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config.settings import AMADEUS_HOSTNAME, MAX_RESULTS_PER_SEARCH, SEARCH_MAX_WORKERS
+
+try:
+    from orjson import loads
+except ImportError:  # orjson es opcional: json da el mismo resultado, mas despacio
+    from json import loads
+
+logger = logging.getLogger(__name__)
+
+HOSTS = {
+    "test": "https://test.api.amadeus.com",
+    "production": "https://api.amadeus.com",
+}
+
+TOKEN_PATH = "/v1/security/oauth2/token"
+OFFERS_PATH = "/v2/shopping/flight-offers"
+TOKEN_MARGIN_SECONDS = 30  # Renovar el token un poco antes de que caduque
+
+
+def _lean_segment(segment: dict) -> dict:
+    lean = {
+        "carrierCode": segment["carrierCode"],
+        "departure": {"iataCode": segment["departure"]["iataCode"], "at": segment["departure"]["at"]},
+        "arrival": {"iataCode": segment["arrival"]["iataCode"], "at": segment["arrival"]["at"]},
+    }
+    if "number" in segment:
+        lean["number"] = segment["number"]
+    return lean
+
+
+def _lean_offer(offer: dict) -> dict:
+    try:
+        return {
+            "price": {"total": offer["price"]["total"]},
+            "itineraries": [{"segments": [_lean_segment(it["segments"][0])]} for it in offer["itineraries"]],
+        }
+    except (KeyError, IndexError, TypeError):
+        return offer  # Incompleta: la descarta _parse_offer con su aviso
+
+
+def lean_body(body: dict) -> dict:
+    """Respuesta de Flight Offers Search reducida a lo que parsea AmadeusClient."""
+    carriers = body.get("dictionaries", {}).get("carriers", {})
+    return {
+        "data": [_lean_offer(offer) for offer in body.get("data", [])],
+        "dictionaries": {"carriers": carriers},
+    }
+
+
+class AmadeusHttpTransport:
+    """
+    Cliente HTTP minimo para Flight Offers Search.
+
+    Devuelve el cuerpo decodificado y reducido (ver lean_body);
+    AmadeusClient lo convierte en FlightOption con el mismo _parse_offer
+    que usa con el SDK.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        api_secret: str,
+        base_url: Optional[str] = None,
+        session: Optional[requests.Session] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.base_url = base_url or HOSTS[AMADEUS_HOSTNAME]
+        self.clock = clock
+        self.session = session or requests.Session()
+        if session is None:
+            # Una conexion por hilo de busqueda, reutilizadas entre peticiones
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=SEARCH_MAX_WORKERS)
+            self.session.mount("https://", adapter)
+            self.session.mount("http://", adapter)
+        self.session.headers.update({
+            "Accept": "application/vnd.amadeus+json, application/json",
+            "Accept-Encoding": "gzip",
+        })
+        self._token: Optional[str] = None
+        self._token_expires = 0.0
+        self._token_lock = threading.Lock()
+
+    def _access_token(self, force: bool = False) -> str:
+        with self._token_lock:
+            if force or self._token is None or self.clock() >= self._token_expires:
+                response = self.session.post(
+                    f"{self.base_url}{TOKEN_PATH}",
+                    data={
+                        "grant_type": "client_credentials",
+                        "client_id": self.api_key,
+                        "client_secret": self.api_secret,
+                    },
+                    timeout=30,
+                )
+                response.raise_for_status()
+                data = loads(response.content)
+                self._token = data["access_token"]
+                self._token_expires = self.clock() + int(data.get("expires_in", 0)) - TOKEN_MARGIN_SECONDS
+                logger.debug("Token de Amadeus renovado")
+            return self._token
+
+    def flight_offers(
+        self,
+        origin: str,
+        destination: str,
+        search_date: str,
+        max_results: int = MAX_RESULTS_PER_SEARCH,
+        return_date: Optional[str] = None,
+    ) -> dict:
+        """
+        Ofertas directas para una ruta y fecha (mismos parametros que el SDK).
+
+        Con return_date cada oferta es ida y vuelta (dos itinerarios, un precio).
+
+        Returns:
+            {"data": ofertas reducidas, "dictionaries": {"carriers": nombres}}
+
+        Raises:
+            requests.RequestException: Si la peticion falla
+        """
+        params = {
+            "originLocationCode": origin,
+            "destinationLocationCode": destination,
+            "departureDate": search_date,
+            "adults": 1,
+            "nonStop": "true",
+            "currencyCode": "EUR",
+            "max": max_results,
+        }
+        if return_date:
+            params["returnDate"] = return_date
+        response = self._get(OFFERS_PATH, params)
+        if response.status_code == 401:
+            # Token revocado o caducado antes de tiempo: renovar una vez
+            response = self._get(OFFERS_PATH, params, force_token=True)
+        response.raise_for_status()
+        return lean_body(loads(response.content))
+
+    def _get(self, path: str, params: dict, force_token: bool = False) -> requests.Response:
+        token = self._access_token(force=force_token)
+        return self.session.get(
+            f"{self.base_url}{path}",
+            params=params,
+            headers={"Authorization": f"Bearer {token}"},
+            timeout=30,
+        )
+
+    def close(self) -> None:
+        self.session.close()
@@ -1,19 +1,59 @@
 """Punto de entrada principal del buscador de vuelos."""
 
+import argparse
 import logging
 import sys
+from contextlib import nullcontext
 from datetime import date, datetime, timedelta
 from pathlib import Path
+from typing import Optional
 
 # Añadir el directorio raíz al path para imports
 ROOT_DIR = Path(__file__).parent.parent
 sys.path.insert(0, str(ROOT_DIR))
 
-from config.settings import WEEKS_AHEAD
+from config.settings import (
+    ANYWHERE_TOP_N,
+    BOT_CACHE_MAX_AGE_HOURS,
+    CHECKPOINT_DIR,
+    HISTORY_FILE,
+    MAX_ARRIVAL_TIME,
+    MIN_DEPARTURE_TIME,
+    MIXED_TRIPS_ENABLED,
+    OFFERS_DIR,
+    QUERY_PLAN,
+    QUEUE_FILE,
+    QUEUE_WORKERS,
+    RAIL_PROVIDER_ENABLED,
+    RAIL_TIMETABLE_FILE,
+    RAIL_TIMETABLE_URL,
+    REFERENCE_REFRESH_ENABLED,
+    ROUTES,
+    ROUTES_WITH_SINGLE_LEGS,
+    STREAM_SUMMARY,
+    WEEKS_AHEAD,
+)
 from src.amadeus_client import AmadeusClient
-from src.formatter import format_telegram_message
-from src.search import FlightSearcher, RouteResult
+from src.anywhere import search_anywhere
+from src.bot import FlightBot, SharedOffers
+from src.checkpoint import RunCheckpoint
+from src.combos import find_mixed_trips
+from src.formatter import (
+    format_anywhere_message,
+    format_route_message,
+    format_summary_message,
+    format_telegram_message,
+)
+from src.offer_store import latest_run, load_offers, save_offers
+from src.pipeline import run_pipeline
+from src.profiling import profile_run
+from src.providers import RailTimetableProvider
+from src.price_history import PriceHistory
+from src.reference_data import get_reference
+from src.replay import ReplayClient
+from src.search import FlightSearcher, RouteResult, TripOption
 from src.telegram import TelegramClient
+from src.work_queue import WorkQueue, plan_jobs, reduce_run, run_workers
 
 # Configurar logging
 logging.basicConfig(
@@ -25,88 +65,472 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+LOG_DIR = ROOT_DIR / "logs"
+
 
-def save_log(mad_result: RouteResult, ovd_result: RouteResult, log_dir: Path) -> None:
-    """Guarda el resultado en un archivo de log."""
+def _new_log_file(log_dir: Path, week_start: date, prefix: str = "search") -> Path:
+    """
+    Crea el archivo de log de la ejecución con su cabecera.
+
+    Las repeticiones (--replay) usan prefix="replay", para no mezclarse
+    con los logs de las búsquedas reales.
+    """
     log_dir.mkdir(parents=True, exist_ok=True)
 
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    log_file = log_dir / f"search_{timestamp}.log"
+    log_file = log_dir / f"{prefix}_{timestamp}.log"
 
     with open(log_file, "w", encoding="utf-8") as f:
         f.write(f"Búsqueda realizada: {datetime.now().isoformat()}\n")
-        f.write(f"Semana objetivo: {mad_result.week_start}\n\n")
-
-        for result in [mad_result, ovd_result]:
-            f.write(f"--- {result.origin} ↔ {result.destination} ---\n")
-            f.write(f"Filtros relajados: {result.relaxed_filters}\n")
-            if result.best_combo:
-                f.write(f"Mejor combo: {result.best_combo.total_price:.0f}€\n")
-                f.write(f"  Ida: {result.best_combo.outbound.origin}→{result.best_combo.outbound.destination} ")
-                f.write(f"{result.best_combo.outbound.departure_time_str} {result.best_combo.outbound.price:.0f}€\n")
-                f.write(f"  Vuelta: {result.best_combo.return_flight.origin}→{result.best_combo.return_flight.destination} ")
-                f.write(f"{result.best_combo.return_flight.departure_time_str} {result.best_combo.return_flight.price:.0f}€\n")
-            if result.best_outbound:
-                f.write(f"Mejor ida suelta: {result.best_outbound.price:.0f}€\n")
-            if result.best_return:
-                f.write(f"Mejor vuelta suelta: {result.best_return.price:.0f}€\n")
-            f.write("\n")
+        f.write(f"Semana objetivo: {week_start}\n\n")
+
+    return log_file
+
+
+def append_route_log(result: RouteResult, log_file: Path) -> None:
+    """Añade el resultado de una ruta al log."""
+    with open(log_file, "a", encoding="utf-8") as f:
+        f.write(f"--- {result.origin} ↔ {result.destination} ---\n")
+        f.write(f"Filtros relajados: {result.relaxed_filters}\n")
+        if result.api_unavailable:
+            f.write("Amadeus no disponible (consultas sin datos)\n")
+        if result.stale_since:
+            f.write(f"Ofertas en caché desde: {result.stale_since.isoformat()}\n")
+        if result.best_combo:
+            bundle = " (ida y vuelta juntas)" if result.best_combo.is_bundle else ""
+            f.write(f"Mejor combo: {result.best_combo.total_price:.0f}€{bundle}\n")
+            f.write(f"  Ida: {result.best_combo.outbound.origin}→{result.best_combo.outbound.destination} ")
+            f.write(f"{result.best_combo.outbound.departure_time_str} {result.best_combo.outbound.price:.0f}€\n")
+            f.write(f"  Vuelta: {result.best_combo.return_flight.origin}→{result.best_combo.return_flight.destination} ")
+            f.write(f"{result.best_combo.return_flight.departure_time_str} {result.best_combo.return_flight.price:.0f}€\n")
+        if "roundtrip" in result.plan_prices:
+            prices = ", ".join(f"{plan} {price:.0f}€" for plan, price in sorted(result.plan_prices.items()))
+            f.write(f"Mejor combo por plan: {prices}\n")
+        if result.best_outbound:
+            f.write(f"Mejor ida suelta: {result.best_outbound.price:.0f}€\n")
+        if result.best_return:
+            f.write(f"Mejor vuelta suelta: {result.best_return.price:.0f}€\n")
+        f.write("\n")
+
+
+def append_mixed_log(mixed_trips: list[TripOption], log_file: Path) -> None:
+    """Añade los viajes mixtos al log."""
+    with open(log_file, "a", encoding="utf-8") as f:
+        for trip in mixed_trips:
+            f.write(f"--- Mixto {trip.outbound.origin} → {trip.outbound.destination} → {trip.return_flight.destination} ---\n")
+            f.write(f"Precio: {trip.total_price:.0f}€ ({trip.outbound_date} → {trip.return_date})\n\n")
+
+
+def append_plan_log(searcher: FlightSearcher, log_file: Path) -> None:
+    """Añade al log el plan de consultas y las llamadas hechas con cada plan."""
+    calls = ", ".join(f"{plan} {count}" for plan, count in sorted(searcher.calls.items())) or "ninguna"
+    line = f"Plan de consultas: {searcher.query_plan} (consultas: {calls})"
+    logger.info(line)
+    with open(log_file, "a", encoding="utf-8") as f:
+        f.write(f"{line}\n")
+
+
+def save_log(
+    mad_result: RouteResult,
+    ovd_result: RouteResult,
+    log_dir: Path,
+    mixed_trips: Optional[list[TripOption]] = None,
+    prefix: str = "search",
+) -> Path:
+    """Guarda el resultado en un archivo de log (prefix como en _new_log_file)."""
+    log_file = _new_log_file(log_dir, mad_result.week_start, prefix)
+    for result in [mad_result, ovd_result]:
+        append_route_log(result, log_file)
+    append_mixed_log(mixed_trips or [], log_file)
 
     logger.info(f"Log guardado en {log_file}")
+    return log_file
 
 
-def main() -> int:
-    """Función principal."""
-    logger.info("Iniciando búsqueda de vuelos BCN")
+def _find_mixed_trips(searcher: FlightSearcher, week_start: date) -> Optional[list[TripOption]]:
+    """Viajes mixtos con las ofertas ya consultadas (sin llamadas extra)."""
+    if not MIXED_TRIPS_ENABLED:
+        return None
+    origins = [origin for origin, _ in ROUTES]
+    return find_mixed_trips(searcher.offer_index, origins, "BCN", week_start)
+
+
+def _store_run(
+    searcher: FlightSearcher,
+    week_start: date,
+    history: PriceHistory,
+    checkpoint: Optional[RunCheckpoint] = None,
+) -> None:
+    """Guarda las ofertas de la ejecución y actualiza el histórico de precios."""
+    # Todas las ofertas, para simulaciones (src/whatif.py)
+    save_offers(searcher.offer_index, date.today(), week_start, OFFERS_DIR, searcher.round_trip_offers())
+
+    recorded = history.record_run(
+        searcher.offer_index, ROUTES, date.today(), MAX_ARRIVAL_TIME, MIN_DEPARTURE_TIME,
+    )
+    history.save(HISTORY_FILE)
+    logger.info(f"Histórico de precios actualizado ({recorded} precios)")
+    if checkpoint is not None:
+        checkpoint.mark_stored()
+
+
+def _deliver(telegram: TelegramClient, text: str, checkpoint: Optional[RunCheckpoint]) -> bool:
+    """Envía un mensaje salvo que el checkpoint diga que ya se envió."""
+    if checkpoint is not None and checkpoint.was_sent(text):
+        logger.info("Mensaje ya enviado en la ejecución anterior")
+        return True
+    if not telegram.send_message(text):
+        return False
+    if checkpoint is not None:
+        checkpoint.mark_sent(text)
+    return True
+
+
+def send_pending(checkpoint: RunCheckpoint) -> int:
+    """Reenvía los mensajes guardados en el checkpoint que no llegaron a enviarse."""
+    pending = checkpoint.pending_messages()
+    if not pending:
+        logger.info(f"Ejecución {checkpoint.run_id} completa: no hay mensajes pendientes")
+        return 0
 
     try:
-        # Inicializar cliente de búsqueda
-        amadeus = AmadeusClient()
-        searcher = FlightSearcher(client=amadeus)
+        telegram = TelegramClient()
+    except ValueError as e:
+        logger.error(f"Telegram no configurado: {e}")
+        return 1
 
-        # Calcular fecha objetivo
-        target_date = date.today() + timedelta(weeks=WEEKS_AHEAD)
-        logger.info(f"Buscando para semana del {target_date}")
+    sent = sum(_deliver(telegram, text, checkpoint) for text in pending)
+    if sent == len(pending):
+        logger.info(f"Reenviados {sent} mensajes pendientes de {checkpoint.run_id}")
+        return 0
+    logger.error(f"Reenviados {sent} de {len(pending)} mensajes pendientes")
+    return 1
+
+
+def run_batch(
+    searcher: FlightSearcher,
+    target_date: date,
+    as_of: Optional[date] = None,
+    offline: bool = False,
+    checkpoint: Optional[RunCheckpoint] = None,
+) -> int:
+    """
+    Busca todas las rutas y envía un único mensaje al final.
+
+    Args:
+        as_of: Fecha de la búsqueda para comparar con el histórico (por defecto hoy)
+        offline: No guardar ofertas ni histórico ni enviar a Telegram, y
+            escribir el log como replay_*.log (--replay)
+        checkpoint: Guarda el mensaje antes de enviarlo, para reenviarlo con
+            --resume si falla el envío
+    """
+    # Buscar cada ruta
+    mad_result = searcher.search_route("MAD", "BCN", target_date)
+    ovd_result = searcher.search_route("OVD", "BCN", target_date)
+
+    mixed_trips = _find_mixed_trips(searcher, mad_result.week_start)
+
+    # Guardar log
+    log_file = save_log(mad_result, ovd_result, LOG_DIR, mixed_trips, prefix="replay" if offline else "search")
+    append_plan_log(searcher, log_file)
+
+    # Comparar con el histórico antes de añadir esta ejecución
+    history = PriceHistory.load(HISTORY_FILE)
 
-        # Buscar cada ruta
-        mad_result = searcher.search_route("MAD", "BCN", target_date)
-        ovd_result = searcher.search_route("OVD", "BCN", target_date)
+    # Formatear mensaje
+    message = format_telegram_message(mad_result, ovd_result, mixed_trips, history=history, as_of=as_of)
+    logger.info(f"Mensaje a enviar:\n{message}")
+    if offline:
+        return 0
+    if checkpoint is not None:
+        checkpoint.record_message(message)
+    _store_run(searcher, mad_result.week_start, history, checkpoint)
 
-        # Guardar log
-        log_dir = ROOT_DIR / "logs"
-        save_log(mad_result, ovd_result, log_dir)
+    # Enviar por Telegram
+    try:
+        telegram = TelegramClient()
+    except ValueError as e:
+        logger.warning(f"Telegram no configurado: {e}")
+        logger.info("El mensaje se ha generado pero no se ha enviado")
+        return 0
+
+    if _deliver(telegram, message, checkpoint):
+        logger.info("Proceso completado correctamente")
+        return 0
+    else:
+        logger.error("Error enviando mensaje a Telegram")
+        return 1
 
-        # Formatear mensaje
-        message = format_telegram_message(mad_result, ovd_result)
-        logger.info(f"Mensaje a enviar:\n{message}")
 
-        # Enviar por Telegram
+def run_stream(
+    searcher: FlightSearcher,
+    target_date: date,
+    as_of: Optional[date] = None,
+    offline: bool = False,
+    checkpoint: Optional[RunCheckpoint] = None,
+) -> int:
+    """
+    Busca las rutas en paralelo y envía cada una en cuanto termina.
+
+    Opcionalmente envía al final un resumen con todas las rutas. as_of,
+    offline y checkpoint funcionan como en run_batch.
+    """
+    telegram = None
+    if not offline:
         try:
             telegram = TelegramClient()
-            success = telegram.send_message(message)
         except ValueError as e:
             logger.warning(f"Telegram no configurado: {e}")
-            logger.info("El mensaje se ha generado pero no se ha enviado")
+
+    def send(text: str) -> bool:
+        logger.info(f"Mensaje a enviar:\n{text}")
+        if checkpoint is not None:
+            checkpoint.record_message(text)
+        return _deliver(telegram, text, checkpoint) if telegram else True
+
+    week_start = target_date - timedelta(days=target_date.weekday())
+    log_file = _new_log_file(LOG_DIR, week_start, prefix="replay" if offline else "search")
+    history = PriceHistory.load(HISTORY_FILE)
+    as_of = as_of or date.today()
+
+    results, sent = run_pipeline(
+        search=lambda route: searcher.search_route(route[0], route[1], target_date),
+        routes=ROUTES,
+        write_log=lambda result: append_route_log(result, log_file),
+        render=lambda result: format_route_message(
+            result,
+            include_single_legs=result.origin in ROUTES_WITH_SINGLE_LEGS,
+            history=history,
+            as_of=as_of,
+        ),
+        send=send,
+    )
+
+    mixed_trips = _find_mixed_trips(searcher, week_start)
+    append_mixed_log(mixed_trips or [], log_file)
+    append_plan_log(searcher, log_file)
+    logger.info(f"Log guardado en {log_file}")
+
+    expected = len(ROUTES)
+    if STREAM_SUMMARY and results:
+        expected += 1
+        if send(format_summary_message(results, mixed_trips)):
+            sent += 1
+
+    if not offline:
+        _store_run(searcher, week_start, history, checkpoint)
+
+    if sent == expected:
+        logger.info("Proceso completado correctamente")
+        return 0
+    logger.error(f"Enviados {sent} de {expected} mensajes")
+    return 1
+
+
+def run_anywhere(searcher: FlightSearcher, target_date: date, top_n: int) -> int:
+    """Rankea destinos desde los orígenes configurados y envía los mejores."""
+    origins = [origin for origin, _ in ROUTES]
+    candidates, results = search_anywhere(searcher, origins, target_date, top_n)
+
+    # Nombres de ciudad para destinos que no están en los datos de referencia
+    if REFERENCE_REFRESH_ENABLED:
+        get_reference().refresh(searcher.client, airports=[q.destination for q in candidates])
+
+    message = format_anywhere_message(candidates, results)
+    logger.info(f"Mensaje a enviar:\n{message}")
+
+    try:
+        telegram = TelegramClient()
+    except ValueError as e:
+        logger.warning(f"Telegram no configurado: {e}")
+        return 0
+    return 0 if telegram.send_message(message) else 1
+
+
+def run_bot(amadeus: AmadeusClient, extra_providers: list) -> int:
+    """Bot interactivo: contesta comandos hasta que se interrumpe."""
+    offers = SharedOffers(amadeus)
+    run = latest_run(OFFERS_DIR)
+    if run:
+        offers.warm(run)
+
+    try:
+        telegram = TelegramClient()
+    except ValueError as e:
+        logger.error(f"Telegram no configurado: {e}")
+        return 1
+
+    try:
+        FlightBot(telegram, offers, extra_providers=extra_providers).run()
+    except KeyboardInterrupt:
+        logger.info(f"Bot detenido ({offers.calls} llamadas a Amadeus)")
+    return 0
+
+
+def _run_replay(args: argparse.Namespace) -> int:
+    """Repite una ejecución guardada con las mismas ofertas (reproducible y sin red)."""
+    run = load_offers(args.replay)
+    logger.info(
+        f"Repitiendo ejecución del {run.search_date} ({len(run.index)} consultas guardadas, "
+        f"{len(run.round_trips)} ida y vuelta)"
+    )
+    searcher = FlightSearcher(client=ReplayClient(run.index, run.round_trips))
+    if args.stream:
+        return run_stream(searcher, run.week_start, as_of=run.search_date, offline=True)
+    return run_batch(searcher, run.week_start, as_of=run.search_date, offline=True)
+
+
+def _run_queue(args: argparse.Namespace) -> int:
+    """
+    Modo cola: planificar, procesar o reducir una ejecución repartida.
+
+    plan encola las consultas de la semana objetivo, work lanza --workers
+    procesos (se puede repetir en otras máquinas con el mismo QUEUE_FILE)
+    y reduce construye los resultados y envía el mensaje como en modo normal.
+    """
+    target_date = date.today() + timedelta(weeks=WEEKS_AHEAD)
+    week_start = target_date - timedelta(days=target_date.weekday())
+    run_id = args.run_id or week_start.isoformat()
+    queue = WorkQueue(QUEUE_FILE)
+
+    try:
+        if args.queue == "plan":
+            if QUERY_PLAN != "oneway":
+                logger.warning(f"La cola solo reparte consultas de solo ida; se ignora QUERY_PLAN={QUERY_PLAN}")
+            queue.enqueue(run_id, plan_jobs(ROUTES, week_start))
+            logger.info(f"Cola {run_id}: {queue.progress(run_id)}")
             return 0
 
-        if success:
-            logger.info("Proceso completado correctamente")
+        if args.queue == "work":
+            done = run_workers(QUEUE_FILE, run_id, args.workers, AmadeusClient)
+            logger.info(f"Cola {run_id}: {done} consultas en esta máquina, estado {queue.progress(run_id)}")
             return 0
+
+        searcher, run_week = reduce_run(queue, run_id)
+        return run_batch(searcher, run_week)
+    finally:
+        queue.close()
+
+
+def _run(args: argparse.Namespace) -> int:
+    """Ejecuta el modo elegido; los errores se avisan por Telegram."""
+    logger.info("Iniciando búsqueda de vuelos BCN")
+    checkpoint = None
+
+    try:
+        if args.replay:
+            return _run_replay(args)
+        if args.queue:
+            return _run_queue(args)
+
+        # Inicializar cliente de búsqueda
+        # El bot reutiliza precios recientes de la caché en vez de llamar a Amadeus
+        max_cache_age = timedelta(hours=BOT_CACHE_MAX_AGE_HOURS) if args.bot else None
+        amadeus = AmadeusClient(max_cache_age=max_cache_age)
+        extra_providers = []
+        if RAIL_PROVIDER_ENABLED:
+            extra_providers.append(RailTimetableProvider(path=RAIL_TIMETABLE_FILE, url=RAIL_TIMETABLE_URL or None))
+
+        if args.bot:
+            return run_bot(amadeus, extra_providers)
+
+        # Calcular fecha objetivo
+        target_date = date.today() + timedelta(weeks=WEEKS_AHEAD)
+        logger.info(f"Buscando para semana del {target_date}")
+
+        if not args.anywhere:
+            # Cada consulta se guarda al terminar; --resume reutiliza las de la misma semana
+            week_start = target_date - timedelta(days=target_date.weekday())
+            run_id = args.run_id or week_start.isoformat()
+            checkpoint = RunCheckpoint.open(CHECKPOINT_DIR, run_id, week_start, resume=args.resume)
+            if checkpoint.stored:
+                # La ejecución anterior terminó la búsqueda: solo falta enviar
+                return send_pending(checkpoint)
+
+        searcher = FlightSearcher(client=amadeus, providers=[amadeus, *extra_providers], checkpoint=checkpoint)
+        if args.anywhere:
+            code = run_anywhere(searcher, target_date, args.top)
+        elif args.stream:
+            code = run_stream(searcher, target_date, checkpoint=checkpoint)
         else:
-            logger.error("Error enviando mensaje a Telegram")
-            return 1
+            code = run_batch(searcher, target_date, checkpoint=checkpoint)
+
+        # Dejar que terminen las revalidaciones de caché pendientes
+        amadeus.wait_for_revalidations(timeout=30)
+        return code
 
     except Exception as e:
         logger.exception(f"Error crítico: {e}")
+        if args.replay:
+            return 1
+
+        error = str(e)
+        if checkpoint is not None:
+            error += f"\nReanudar con --resume --run-id {checkpoint.run_id}"
 
         try:
             telegram = TelegramClient()
-            telegram.send_error_alert(str(e))
+            telegram.send_error_alert(error)
         except Exception as alert_error:
             logger.warning(f"No se pudo enviar alerta a Telegram: {alert_error}")
 
         return 1
 
 
+def main(argv: Optional[list[str]] = None) -> int:
+    """Función principal."""
+    parser = argparse.ArgumentParser(description="Buscador de vuelos BCN")
+    parser.add_argument(
+        "--stream", action="store_true",
+        help="Enviar cada ruta en cuanto termina su búsqueda (en vez de un único mensaje)",
+    )
+    parser.add_argument(
+        "--anywhere", action="store_true",
+        help="Buscar los destinos más baratos desde los orígenes configurados",
+    )
+    parser.add_argument(
+        "--top", type=int, default=ANYWHERE_TOP_N,
+        help="Destinos a verificar con búsqueda completa en modo --anywhere",
+    )
+    parser.add_argument(
+        "--bot", action="store_true",
+        help="Bot interactivo de Telegram (/mad jueves, /semana 3...)",
+    )
+    parser.add_argument(
+        "--replay", type=Path, metavar="SNAPSHOT",
+        help="Repetir una ejecución guardada (data/offers/offers_YYYYMMDD.bin) sin llamar a "
+             "Amadeus, sin guardar nada y sin enviar a Telegram",
+    )
+    parser.add_argument(
+        "--profile", action="store_true",
+        help="Perfilar la ejecución (cProfile + tracemalloc); los informes van a logs/",
+    )
+    parser.add_argument(
+        "--queue", choices=["plan", "work", "reduce"],
+        help="Repartir las consultas en una cola SQLite: plan (encolar), work (procesar) o reduce (mensaje)",
+    )
+    parser.add_argument(
+        "--resume", action="store_true",
+        help="Reanudar la ejecución de la semana objetivo: reutiliza las consultas ya hechas "
+             "y envía solo los mensajes pendientes",
+    )
+    parser.add_argument(
+        "--run-id",
+        help="Ejecución de la cola o a reanudar (por defecto el lunes de la semana objetivo, ej: 2026-01-26)",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=QUEUE_WORKERS,
+        help="Procesos worker en esta máquina con --queue work",
+    )
+    args = parser.parse_args(argv)
+    if args.replay and (args.anywhere or args.bot):
+        parser.error("--replay solo funciona con el modo normal o --stream")
+    if args.resume and (args.replay or args.queue or args.anywhere or args.bot):
+        parser.error("--resume solo funciona con el modo normal o --stream")
+
+    with profile_run(LOG_DIR) if args.profile else nullcontext():
+        return _run(args)
+
+
 if __name__ == "__main__":
     sys.exit(main())
@@ -0,0 +1,74 @@
+"""Indice en memoria de las ofertas ya consultadas."""
+
+from datetime import date, time
+from typing import Optional
+
+from src.amadeus_client import FlightOption, matches_time_filter
+
+OfferKey = tuple[str, str, date]
+# (origen, destino, fecha de ida, fecha de vuelta) de una busqueda ida y vuelta
+RoundTripKey = tuple[str, str, date, date]
+
+
+class OfferIndex:
+    """
+    Guarda las ofertas por (origen, destino, fecha) y el minimo de cada fecha.
+
+    El minimo de cada fecha se guarda por filtros de horario la primera vez
+    que se pide y se descarta al cambiar las ofertas, asi los viajes mixtos
+    y el historico (que piden la misma fecha con los mismos filtros varias
+    veces) no recorren las ofertas de nuevo.
+    """
+
+    def __init__(self):
+        self._offers: dict[OfferKey, list[FlightOption]] = {}
+        self._cheapest: dict[OfferKey, dict[tuple, Optional[FlightOption]]] = {}
+
+    def add(self, origin: str, destination: str, flight_date: date, options: list[FlightOption]) -> None:
+        """Registra (o reemplaza) las ofertas de una consulta."""
+        key = (origin, destination, flight_date)
+        self._offers[key] = list(options)
+        self._cheapest.pop(key, None)
+
+    def get(self, origin: str, destination: str, flight_date: date) -> Optional[list[FlightOption]]:
+        """Ofertas de una consulta, o None si no se ha consultado."""
+        return self._offers.get((origin, destination, flight_date))
+
+    def cheapest(
+        self,
+        origin: str,
+        destination: str,
+        flight_date: date,
+        max_arrival_time: Optional[time] = None,
+        min_departure_time: Optional[time] = None,
+        mode: Optional[str] = None,
+    ) -> Optional[FlightOption]:
+        """
+        Oferta mas barata de una consulta, o None si no hay.
+
+        La primera vez con unos filtros se recorren las ofertas de esa
+        consulta; las siguientes es una lectura del minimo guardado.
+
+        Args:
+            mode: Solo opciones de ese tipo ("flight", "rail"); por defecto todas
+        """
+        key = (origin, destination, flight_date)
+        filters = (max_arrival_time, min_departure_time, mode)
+        minima = self._cheapest.setdefault(key, {})
+        if filters not in minima:
+            matching = [
+                option for option in self._offers.get(key, [])
+                if matches_time_filter(option, max_arrival_time, min_departure_time)
+                and (mode is None or option.mode == mode)
+            ]
+            minima[filters] = min(matching, key=lambda x: x.price) if matching else None
+        return minima[filters]
+
+    def keys(self) -> list[OfferKey]:
+        return list(self._offers)
+
+    def __contains__(self, key: OfferKey) -> bool:
+        return key in self._offers
+
+    def __len__(self) -> int:
+        return len(self._offers)
@@ -0,0 +1,164 @@
+"""Almacen en disco de las ofertas consultadas en cada ejecucion."""
+
+import json
+import logging
+import struct
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from pathlib import Path
+from typing import Optional, Union
+
+from src.amadeus_client import FlightOption, RoundTripOffer
+from src.offer_index import OfferIndex, RoundTripKey
+from src.snapshot import OfferSnapshot, SnapshotIndex, write_snapshot
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class StoredRun:
+    """Ofertas de una ejecucion pasada."""
+    search_date: date
+    week_start: date
+    index: Union[OfferIndex, SnapshotIndex]
+    saved_at: Optional[datetime] = None  # Hora de escritura del archivo
+    round_trips: dict[RoundTripKey, list[RoundTripOffer]] = field(default_factory=dict)
+
+
+def _round_trips_path(path: Path) -> Path:
+    """Archivo con las ofertas ida y vuelta de una ejecucion (roundtrips_AAAAMMDD.json)."""
+    return path.with_name(f"roundtrips_{path.stem.removeprefix('offers_')}.json")
+
+
+def _load_round_trips(path: Path) -> dict[RoundTripKey, list[RoundTripOffer]]:
+    try:
+        data = json.loads(_round_trips_path(path).read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return {}
+    return {
+        (
+            query["origin"],
+            query["destination"],
+            date.fromisoformat(query["outbound_date"]),
+            date.fromisoformat(query["return_date"]),
+        ): [RoundTripOffer.from_dict(o) for o in query["offers"]]
+        for query in data["queries"]
+    }
+
+
+def save_offers(
+    index: OfferIndex,
+    search_date: date,
+    week_start: date,
+    store_dir: Path,
+    round_trips: Optional[dict[RoundTripKey, list[RoundTripOffer]]] = None,
+) -> Path:
+    """
+    Guarda todas las ofertas de una ejecucion (sin filtros de horario).
+
+    Las ofertas de solo ida van a un snapshot binario (ver src/snapshot.py);
+    las ida y vuelta (aunque no haya) a un JSON al lado (roundtrips_AAAAMMDD.json),
+    porque un registro del snapshot es un solo vuelo.
+
+    Returns:
+        Ruta del snapshot
+    """
+    path = write_snapshot(index, search_date, week_start, store_dir / f"offers_{search_date.strftime('%Y%m%d')}.bin")
+    # Siempre se reescribe: si no, quedaria el de otra ejecucion del mismo dia
+    _round_trips_path(path).write_text(json.dumps({
+        "search_date": search_date.isoformat(),
+        "week_start": week_start.isoformat(),
+        "queries": [
+            {
+                "origin": origin,
+                "destination": destination,
+                "outbound_date": outbound_date.isoformat(),
+                "return_date": return_date.isoformat(),
+                "offers": [o.to_dict() for o in offers],
+            }
+            for (origin, destination, outbound_date, return_date), offers in (round_trips or {}).items()
+        ],
+    }, ensure_ascii=False), encoding="utf-8")
+    logger.info(f"Ofertas guardadas en {path}")
+    return path
+
+
+def load_offers(path: Path, lazy: bool = False) -> StoredRun:
+    """
+    Carga las ofertas de una ejecucion (snapshot binario o JSON de versiones anteriores).
+
+    Args:
+        lazy: Con un snapshot binario, dejarlo mapeado y decodificar cada
+            consulta al pedirla (SnapshotIndex) en vez de todas al cargar
+    """
+    saved_at = datetime.fromtimestamp(path.stat().st_mtime)
+    round_trips = _load_round_trips(path)
+    if path.suffix == ".bin":
+        if lazy:
+            snapshot = OfferSnapshot(path)
+            return StoredRun(
+                search_date=snapshot.search_date,
+                week_start=snapshot.week_start,
+                index=SnapshotIndex(snapshot),
+                saved_at=saved_at,
+                round_trips=round_trips,
+            )
+        with OfferSnapshot(path) as snapshot:
+            return StoredRun(
+                search_date=snapshot.search_date,
+                week_start=snapshot.week_start,
+                index=snapshot.to_index(),
+                saved_at=saved_at,
+                round_trips=round_trips,
+            )
+
+    data = json.loads(path.read_text(encoding="utf-8"))
+    index = OfferIndex()
+    for query in data["queries"]:
+        index.add(
+            query["origin"],
+            query["destination"],
+            date.fromisoformat(query["date"]),
+            [FlightOption.from_dict(o) for o in query["offers"]],
+        )
+    return StoredRun(
+        search_date=date.fromisoformat(data["search_date"]),
+        week_start=date.fromisoformat(data["week_start"]),
+        index=index,
+        saved_at=saved_at,
+        round_trips=round_trips,
+    )
+
+
+def run_paths(store_dir: Path) -> list[Path]:
+    """Archivos de cada ejecucion, de la mas antigua a la mas reciente (binario si hay ambos)."""
+    paths: dict[str, Path] = {}
+    for path in sorted(store_dir.glob("offers_*.json")) + sorted(store_dir.glob("offers_*.bin")):
+        paths[path.stem] = path
+    return [path for _, path in sorted(paths.items())]
+
+
+def latest_run(store_dir: Path, lazy: bool = False) -> Optional[StoredRun]:
+    """Ultima ejecucion guardada, o None si no hay ninguna legible (lazy como en load_offers)."""
+    for path in reversed(run_paths(store_dir)):
+        try:
+            return load_offers(path, lazy=lazy)
+        except (ValueError, KeyError, struct.error) as e:
+            logger.warning(f"Ignorando {path.name}: {e}")
+    return None
+
+
+def load_runs(store_dir: Path, lazy: bool = False) -> list[StoredRun]:
+    """
+    Carga todas las ejecuciones guardadas, de la mas antigua a la mas reciente.
+
+    Si una ejecucion tiene snapshot binario y JSON, se usa el binario
+    (lazy como en load_offers).
+    """
+    runs = []
+    for path in run_paths(store_dir):
+        try:
+            runs.append(load_offers(path, lazy=lazy))
+        except (ValueError, KeyError, struct.error) as e:
+            logger.warning(f"Ignorando {path.name}: {e}")
+    return runs
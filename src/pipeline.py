@@ -0,0 +1,94 @@
+"""Pipeline en streaming: cada ruta se registra, formatea y envia al terminar."""
+
+import logging
+import queue
+import threading
+from typing import Callable, Optional
+
+from config.settings import STREAM_QUEUE_SIZE
+from src.planner import run_concurrently
+from src.search import RouteResult
+
+logger = logging.getLogger(__name__)
+
+# Marca de fin de datos entre etapas
+_DONE = object()
+
+
+def _stage(name: str, func: Callable, inbox: queue.Queue, outbox: Optional[queue.Queue]) -> None:
+    """Consume inbox, aplica func y pasa el resultado a la siguiente etapa."""
+    while True:
+        item = inbox.get()
+        if item is _DONE:
+            if outbox is not None:
+                outbox.put(_DONE)
+            return
+        try:
+            output = func(item)
+        except Exception as e:
+            logger.error(f"Error en etapa {name}: {e}")
+            continue
+        if outbox is not None:
+            outbox.put(output)
+
+
+def run_pipeline(
+    search: Callable[[tuple[str, str]], RouteResult],
+    routes: list[tuple[str, str]],
+    write_log: Callable[[RouteResult], None],
+    render: Callable[[RouteResult], str],
+    send: Callable[[str], bool],
+    queue_size: int = STREAM_QUEUE_SIZE,
+) -> tuple[list[RouteResult], int]:
+    """
+    Busca las rutas en paralelo y entrega cada una en cuanto termina.
+
+    Etapas: busqueda -> log -> formato -> envio, conectadas por colas
+    acotadas. Una etapa lenta frena a las anteriores en vez de acumular
+    resultados, y la primera notificacion no espera a la ruta mas lenta.
+
+    Args:
+        search: Busca una ruta (origen, destino)
+        routes: Rutas a buscar
+        write_log: Registra un resultado
+        render: Formatea un resultado como mensaje
+        send: Envia un mensaje; devuelve True si se envio
+        queue_size: Capacidad de cada cola entre etapas
+
+    Returns:
+        (resultados en orden de llegada, mensajes enviados correctamente)
+    """
+    to_log: queue.Queue = queue.Queue(maxsize=queue_size)
+    to_render: queue.Queue = queue.Queue(maxsize=queue_size)
+    to_send: queue.Queue = queue.Queue(maxsize=queue_size)
+    sent = 0
+
+    def log_and_forward(result: RouteResult) -> RouteResult:
+        write_log(result)
+        return result
+
+    def send_and_count(text: str) -> None:
+        nonlocal sent
+        if send(text):
+            sent += 1
+
+    threads = [
+        threading.Thread(target=_stage, args=("log", log_and_forward, to_log, to_render), daemon=True),
+        threading.Thread(target=_stage, args=("formato", render, to_render, to_send), daemon=True),
+        threading.Thread(target=_stage, args=("envio", send_and_count, to_send, None), daemon=True),
+    ]
+    for thread in threads:
+        thread.start()
+
+    results = []
+    try:
+        for route, result in run_concurrently(search, routes):
+            logger.info(f"Ruta {route[0]}->{route[1]} completada")
+            results.append(result)
+            to_log.put(result)
+    finally:
+        to_log.put(_DONE)
+        for thread in threads:
+            thread.join()
+
+    return results, sent
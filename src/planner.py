@@ -0,0 +1,36 @@
+"""Planificador de consultas concurrentes."""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Iterable, Iterator, TypeVar
+
+from config.settings import SEARCH_MAX_WORKERS
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def run_concurrently(
+    func: Callable[[T], R],
+    items: Iterable[T],
+    max_workers: int = SEARCH_MAX_WORKERS,
+) -> Iterator[tuple[T, R]]:
+    """
+    Ejecuta func(item) en paralelo y devuelve los resultados segun terminan.
+
+    Las llamadas a la API son I/O, asi que basta con hilos. Si una tarea
+    falla se registra el error y se sigue con las demas.
+
+    Yields:
+        (item, resultado) en orden de finalizacion
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(func, item): item for item in items}
+        for future in as_completed(futures):
+            item = futures[future]
+            try:
+                yield item, future.result()
+            except Exception as e:
+                logger.error(f"Error en tarea {item}: {e}")
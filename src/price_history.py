@@ -0,0 +1,179 @@
+"""Indice historico de precios por ruta, dia de la semana y antelacion."""
+
+import json
+import logging
+from dataclasses import asdict, dataclass
+from datetime import date, time
+from pathlib import Path
+from typing import Optional
+
+from config.settings import HISTORY_MIN_SAMPLES, HISTORY_WINDOW
+from src.offer_index import OfferIndex
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PriceStats:
+    """Estadisticos precalculados de una clave del indice."""
+    window: list[float]  # Ultimos precios, del mas antiguo al mas reciente
+    count: int           # Observaciones totales (incluidas las que ya salieron de la ventana)
+    median: float
+    p25: float
+    p75: float
+
+
+@dataclass
+class PriceComparison:
+    """Comparacion de un precio con lo habitual."""
+    pct_vs_median: float  # -0.23 = 23% por debajo de la mediana
+    level: str            # "cheap", "normal" o "expensive"
+
+
+def _quantile(sorted_values: list[float], q: float) -> float:
+    """Cuantil con interpolacion lineal sobre valores ya ordenados."""
+    pos = (len(sorted_values) - 1) * q
+    low = int(pos)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (pos - low)
+
+
+def _key(origin: str, destination: str, weekday: int, days_before: int) -> str:
+    return f"{origin}-{destination}|{weekday}|{days_before}"
+
+
+class PriceHistory:
+    """
+    Precios historicos por (ruta, dia de la semana, dias de antelacion).
+
+    Cada clave guarda una ventana movil de los ultimos HISTORY_WINDOW
+    precios y sus cuantiles ya calculados. Registrar una ejecucion solo
+    recalcula las claves que cambian, y consultar es una lectura de dict.
+    """
+
+    def __init__(self, entries: Optional[dict[str, PriceStats]] = None):
+        self._entries = entries or {}
+
+    @classmethod
+    def load(cls, path: Path) -> "PriceHistory":
+        """Carga el indice desde disco (vacio si no existe)."""
+        if not path.exists():
+            return cls()
+        try:
+            raw = json.loads(path.read_text(encoding="utf-8"))
+            return cls({key: PriceStats(**value) for key, value in raw.items()})
+        except (ValueError, TypeError) as e:
+            logger.warning(f"Historico de precios ilegible, se empieza de cero: {e}")
+            return cls()
+
+    def save(self, path: Path) -> None:
+        """Guarda el indice en disco."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.to_dict(), indent=1), encoding="utf-8")
+
+    def to_dict(self) -> dict[str, dict]:
+        """Claves del indice y sus estadisticos, ordenadas."""
+        return {key: asdict(stats) for key, stats in sorted(self._entries.items())}
+
+    def record(self, origin: str, destination: str, flight_date: date, price: float, as_of: date) -> None:
+        """Anade un precio observado y actualiza los estadisticos de su clave."""
+        key = _key(origin, destination, flight_date.weekday(), (flight_date - as_of).days)
+        previous = self._entries.get(key)
+        window = (previous.window if previous else []) + [round(price, 2)]
+        window = window[-HISTORY_WINDOW:]
+        ordered = sorted(window)
+
+        self._entries[key] = PriceStats(
+            window=window,
+            count=(previous.count if previous else 0) + 1,
+            median=_quantile(ordered, 0.5),
+            p25=_quantile(ordered, 0.25),
+            p75=_quantile(ordered, 0.75),
+        )
+
+    def record_run(
+        self,
+        index: OfferIndex,
+        routes: list[tuple[str, str]],
+        as_of: date,
+        max_arrival_time: time,
+        min_departure_time: time,
+    ) -> int:
+        """
+        Registra el precio minimo de cada (ruta, fecha) consultada en la ejecucion.
+
+        Se usa el minimo que cumple los filtros estrictos de su sentido
+        (llegada para la ida, salida para la vuelta), que es lo que se
+        compara despues en el mensaje. Solo cuentan los vuelos: los trenes
+        tienen tarifa fija de horario, no precio observado. Las ofertas
+        sacadas de cache (Amadeus caido) no se registran, porque ya se
+        observaron en su dia.
+
+        Returns:
+            Numero de precios registrados
+        """
+        recorded = 0
+        for origin, destination, flight_date in index.keys():
+            if (origin, destination) in routes:
+                cheapest = index.cheapest(
+                    origin, destination, flight_date, max_arrival_time=max_arrival_time, mode="flight",
+                )
+            elif (destination, origin) in routes:
+                cheapest = index.cheapest(
+                    origin, destination, flight_date, min_departure_time=min_departure_time, mode="flight",
+                )
+            else:
+                continue
+            if cheapest and cheapest.stale_since is None:
+                self.record(origin, destination, flight_date, cheapest.price, as_of)
+                recorded += 1
+        return recorded
+
+    def stats(self, origin: str, destination: str, flight_date: date, as_of: date) -> Optional[PriceStats]:
+        """Estadisticos de un leg, o None si no hay historico suficiente."""
+        stats = self._entries.get(_key(origin, destination, flight_date.weekday(), (flight_date - as_of).days))
+        if stats is None or len(stats.window) < HISTORY_MIN_SAMPLES:
+            return None
+        return stats
+
+    def compare(
+        self,
+        legs: list[tuple[str, str, date]],
+        price: float,
+        as_of: date,
+    ) -> Optional[PriceComparison]:
+        """
+        Compara el precio de uno o varios legs con su historico.
+
+        Para un combo se suman mediana y cuantiles de cada leg.
+
+        Args:
+            legs: (origen, destino, fecha) de cada leg
+            price: Precio total de los legs
+            as_of: Fecha de la busqueda (para calcular la antelacion)
+
+        Returns:
+            PriceComparison, o None si algun leg no tiene historico
+        """
+        median = p25 = p75 = 0.0
+        for origin, destination, flight_date in legs:
+            stats = self.stats(origin, destination, flight_date, as_of)
+            if stats is None:
+                return None
+            median += stats.median
+            p25 += stats.p25
+            p75 += stats.p75
+
+        if median <= 0:
+            return None
+
+        if price < p25:
+            level = "cheap"
+        elif price > p75:
+            level = "expensive"
+        else:
+            level = "normal"
+        return PriceComparison(pct_vs_median=(price - median) / median, level=level)
+
+    def __len__(self) -> int:
+        return len(self._entries)
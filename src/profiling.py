@@ -0,0 +1,117 @@
+"""Perfilado de una ejecucion completa: CPU (cProfile) y memoria (tracemalloc)."""
+
+import cProfile
+import io
+import logging
+import pstats
+import sys
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator
+
+from config.settings import PROFILE_TOP_N
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ProfileReport:
+    """Archivos generados por profile_run."""
+    cpu: Path      # Funciones ordenadas por tiempo acumulado y propio
+    memory: Path   # Lineas que mas memoria reservan
+    stats: Path    # Volcado de pstats (para snakeviz, pstats, etc.)
+
+
+def _cpu_report(stats: pstats.Stats, top: int) -> str:
+    out = io.StringIO()
+    stats.stream = out
+    out.write("=== Tiempo acumulado (funcion + llamadas) ===\n")
+    stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(top)
+    out.write("\n=== Tiempo propio (sin llamadas) ===\n")
+    stats.sort_stats(pstats.SortKey.TIME).print_stats(top)
+    return out.getvalue()
+
+
+def _memory_report(snapshot: tracemalloc.Snapshot, current: int, peak: int, top: int) -> str:
+    snapshot = snapshot.filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+    ])
+    lines = [
+        f"Memoria al terminar: {current / 1024:.1f} KiB",
+        f"Pico: {peak / 1024:.1f} KiB",
+        "",
+        f"=== Top {top} lineas por memoria reservada (sin liberar) ===",
+    ]
+    for stat in snapshot.statistics("lineno")[:top]:
+        frame = stat.traceback[0]
+        lines.append(f"{stat.size / 1024:9.1f} KiB {stat.count:7d} bloques  {frame.filename}:{frame.lineno}")
+    return "\n".join(lines) + "\n"
+
+
+@contextmanager
+def profile_run(report_dir: Path, top: int = PROFILE_TOP_N) -> Iterator[ProfileReport]:
+    """
+    Perfila el bloque con cProfile y tracemalloc y escribe los informes.
+
+    Los informes van a report_dir (junto a los logs de ejecucion) con el
+    mismo sello de tiempo que estos.
+
+    cProfile solo perfila el hilo que lo activa, asi que cada hilo que se
+    crea dentro del bloque (busquedas en paralelo, pipeline de --stream)
+    arranca su propio perfilador y el informe de CPU suma todos. Los hilos
+    creados antes del bloque no se perfilan. tracemalloc ya cubre todos
+    los hilos.
+
+    Args:
+        report_dir: Directorio de los informes
+        top: Lineas de cada informe
+
+    Yields:
+        ProfileReport con las rutas (se escriben al salir del bloque)
+    """
+    report_dir.mkdir(parents=True, exist_ok=True)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    report = ProfileReport(
+        cpu=report_dir / f"profile_{timestamp}_cpu.txt",
+        memory=report_dir / f"profile_{timestamp}_memory.txt",
+        stats=report_dir / f"profile_{timestamp}.prof",
+    )
+
+    thread_profilers: list[cProfile.Profile] = []
+
+    def profile_thread(frame, event, arg):
+        # Primer evento del hilo nuevo: enable() sustituye este hook por el perfilador
+        thread_profiler = cProfile.Profile()
+        try:
+            thread_profiler.enable()
+        except ValueError:
+            # Versiones donde un solo perfilador ya ve todos los hilos
+            sys.setprofile(None)
+            return
+        thread_profilers.append(thread_profiler)
+
+    tracemalloc.start()
+    profiler = cProfile.Profile()
+    threading.setprofile(profile_thread)
+    profiler.enable()
+    try:
+        yield report
+    finally:
+        profiler.disable()
+        threading.setprofile(None)
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        stats = pstats.Stats(profiler)
+        if thread_profilers:
+            stats.add(*thread_profilers)
+        stats.dump_stats(report.stats)
+        report.cpu.write_text(_cpu_report(stats.strip_dirs(), top), encoding="utf-8")
+        report.memory.write_text(_memory_report(snapshot, current, peak, top), encoding="utf-8")
+        logger.info(f"Perfil guardado en {report.cpu} y {report.memory} ({len(thread_profilers)} hilos)")
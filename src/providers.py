@@ -0,0 +1,124 @@
+"""Proveedores de transporte que el buscador consulta en paralelo."""
+
+import json
+import logging
+from datetime import date, datetime, time, timedelta
+from pathlib import Path
+from typing import Optional, Protocol
+
+import requests
+
+from src.amadeus_client import FlightOption, matches_time_filter
+
+logger = logging.getLogger(__name__)
+
+
+class ProviderUnavailableError(Exception):
+    """Un proveedor no ha podido responder (horario ilegible, servicio caido...)."""
+
+
+class TransportProvider(Protocol):
+    """
+    Interfaz comun de proveedores (vuelos, tren...).
+
+    El metodo conserva el nombre de AmadeusClient.search_flights, asi que
+    AmadeusClient y ReplayClient ya son proveedores. Cada opcion indica su
+    tipo en FlightOption.mode.
+    """
+
+    def search_flights(
+        self,
+        origin: str,
+        destination: str,
+        search_date: str,
+        max_arrival_time: Optional[time] = None,
+        min_departure_time: Optional[time] = None,
+    ) -> list[FlightOption]:
+        ...
+
+
+class RailTimetableProvider:
+    """
+    Trenes a partir de un horario local (Amadeus Rail no esta disponible).
+
+    El horario sale de un JSON en disco o de un servicio local que devuelve
+    el mismo formato:
+
+        {"services": [{"origin": "MAD", "destination": "BCN", "operator": "iryo",
+                       "train_number": "6123", "departure": "07:00", "arrival": "09:45",
+                       "weekdays": [0, 1, 2, 3, 4], "price": 35.0}]}
+
+    Los precios son orientativos (tarifa habitual), no precios en vivo. Si el
+    horario no se puede leer se lanza ProviderUnavailableError, para que el
+    buscador marque la respuesta como parcial en vez de "sin trenes".
+    """
+
+    def __init__(self, path: Optional[Path] = None, url: Optional[str] = None):
+        if not path and not url:
+            raise ValueError("RailTimetableProvider necesita un archivo o una URL de horarios")
+        self.path = path
+        self.url = url
+        self._services: Optional[list[dict]] = None
+
+    def _load_services(self, origin: str, destination: str, search_date: str) -> list[dict]:
+        if self.url:
+            response = requests.get(
+                self.url,
+                params={"origin": origin, "destination": destination, "date": search_date},
+                timeout=10,
+            )
+            response.raise_for_status()
+            return response.json().get("services", [])
+
+        if self._services is None:
+            self._services = json.loads(self.path.read_text(encoding="utf-8")).get("services", [])
+        return self._services
+
+    def search_flights(
+        self,
+        origin: str,
+        destination: str,
+        search_date: str,
+        max_arrival_time: Optional[time] = None,
+        min_departure_time: Optional[time] = None,
+    ) -> list[FlightOption]:
+        """
+        Trenes de la ruta y fecha que cumplen los filtros de horario.
+
+        Raises:
+            ProviderUnavailableError: Si no se puede leer el horario
+        """
+        try:
+            services = self._load_services(origin, destination, search_date)
+        except (OSError, ValueError, requests.exceptions.RequestException) as e:
+            raise ProviderUnavailableError(f"Horario de trenes no disponible: {e}") from e
+
+        day = date.fromisoformat(search_date)
+        options = []
+        for service in services:
+            if service["origin"] != origin or service["destination"] != destination:
+                continue
+            if day.weekday() not in service.get("weekdays", range(7)):
+                continue
+
+            departure = datetime.combine(day, time.fromisoformat(service["departure"]))
+            arrival = datetime.combine(day, time.fromisoformat(service["arrival"]))
+            if arrival < departure:
+                arrival += timedelta(days=1)
+
+            option = FlightOption(
+                origin=origin,
+                destination=destination,
+                departure_time=departure,
+                arrival_time=arrival,
+                price=float(service["price"]),
+                carrier_code=service["operator"],
+                carrier_name=service["operator"],
+                flight_number=service.get("train_number", ""),
+                mode="rail",
+            )
+            if matches_time_filter(option, max_arrival_time, min_departure_time):
+                options.append(option)
+
+        options.sort(key=lambda x: x.price)
+        return options
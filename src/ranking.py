@@ -0,0 +1,45 @@
+"""Ranking de opciones por frente de Pareto (precio vs horario)."""
+
+from datetime import datetime
+from typing import Callable, TypeVar
+
+T = TypeVar("T")
+
+
+def minutes_of_day(dt: datetime) -> int:
+    """Minutos desde medianoche."""
+    return dt.hour * 60 + dt.minute
+
+
+def dominates(a: tuple, b: tuple) -> bool:
+    """True si a es igual o mejor que b en todo y distinto (todo se minimiza)."""
+    return a != b and all(x <= y for x, y in zip(a, b))
+
+
+def pareto_front(candidates: list[T], objectives: Callable[[T], tuple]) -> list[T]:
+    """
+    Devuelve las opciones no dominadas (todos los objetivos se minimizan).
+
+    Usa sort-filter-skyline: tras ordenar lexicograficamente, una opcion
+    solo puede estar dominada por otra anterior, asi que basta con
+    compararla con el frente acumulado. Opciones con objetivos identicos
+    se quedan una sola vez.
+
+    Args:
+        candidates: Opciones a evaluar
+        objectives: Funcion que da la tupla de objetivos de una opcion
+
+    Returns:
+        Frente de Pareto, en orden lexicografico de objetivos
+    """
+    scored = sorted(((objectives(c), c) for c in candidates), key=lambda x: x[0])
+
+    front: list[tuple[tuple, T]] = []
+    for score, candidate in scored:
+        if front and front[-1][0] == score:
+            continue
+        if any(dominates(kept, score) for kept, _ in front):
+            continue
+        front.append((score, candidate))
+
+    return [candidate for _, candidate in front]
@@ -0,0 +1,160 @@
+"""Datos de referencia: aerolineas, aeropuertos y ciudades de tren."""
+
+import json
+import logging
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Optional
+
+from config.settings import REFERENCE_CACHE_FILE, REFERENCE_DATA_FILE
+from src.cache import PersistentCache
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Airport:
+    """Ciudad y zona horaria de un aeropuerto."""
+    city: str
+    timezone: str
+
+
+class ReferenceIndex:
+    """
+    Indice en memoria de codigos IATA -> nombres.
+
+    El fichero empaquetado (config/reference_data.json) se lee una sola vez,
+    en la primera consulta, y queda en diccionarios: cada busqueda es O(1).
+    Los codigos que no estan en el fichero se consultan en la cache
+    persistente, donde se guardan los aprendidos de Amadeus (learn_carriers,
+    refresh); asi ampliar rutas no obliga a tocar el codigo.
+    """
+
+    def __init__(
+        self,
+        path: Path = REFERENCE_DATA_FILE,
+        cache: Optional[PersistentCache] = None,
+    ):
+        self.path = path
+        self.cache = cache
+        self._lock = threading.Lock()
+        self._airlines: Optional[dict[str, str]] = None
+        self._airports: dict[str, Airport] = {}
+        self._rail: dict[str, str] = {}
+
+    def _load(self) -> dict[str, str]:
+        with self._lock:
+            if self._airlines is None:
+                try:
+                    data = json.loads(self.path.read_text(encoding="utf-8"))
+                except (OSError, ValueError) as e:
+                    logger.warning(f"No se pudieron leer los datos de referencia ({self.path.name}): {e}")
+                    data = {}
+                self._airports = {
+                    code: Airport(city=city, timezone=tz)
+                    for code, (city, tz) in data.get("airports", {}).items()
+                }
+                self._rail = dict(data.get("rail", {}))
+                self._airlines = dict(data.get("airlines", {}))
+            return self._airlines
+
+    def _cached(self, kind: str, code: str):
+        if self.cache is None:
+            return None
+        entry = self.cache.get(f"{kind}|{code}")
+        return entry.value if entry else None
+
+    def carrier_name(self, code: str) -> Optional[str]:
+        """Nombre de la aerolinea o None si no se conoce."""
+        name = self._load().get(code)
+        if name is None:
+            name = self._cached("airline", code)
+            if name is not None:
+                self._airlines[code] = name
+        return name
+
+    def airport(self, code: str) -> Optional[Airport]:
+        """Ciudad y zona horaria del aeropuerto o None si no se conoce."""
+        self._load()
+        airport = self._airports.get(code)
+        if airport is None:
+            cached = self._cached("airport", code)
+            if cached is not None:
+                airport = Airport(city=cached["city"], timezone=cached["timezone"])
+                self._airports[code] = airport
+        return airport
+
+    def city_name(self, code: str) -> Optional[str]:
+        """Nombre de la ciudad del aeropuerto o None si no se conoce."""
+        airport = self.airport(code)
+        return airport.city if airport else None
+
+    def rail_slug(self, code: str) -> Optional[str]:
+        """Ciudad en las URLs de Trainline o None si no tiene tren."""
+        self._load()
+        return self._rail.get(code)
+
+    def learn_carriers(self, carriers: dict[str, str]) -> None:
+        """
+        Guarda aerolineas desconocidas (ej: el diccionario "carriers" que
+        Amadeus incluye en cada respuesta de busqueda).
+        """
+        for code, name in carriers.items():
+            if self.carrier_name(code) is not None:
+                continue
+            name = name.title()
+            self._airlines[code] = name
+            if self.cache is not None:
+                self.cache.set(f"airline|{code}", name)
+            logger.info(f"Aerolinea nueva en datos de referencia: {code} = {name}")
+
+    def refresh(
+        self,
+        client,
+        carriers: Iterable[str] = (),
+        airports: Iterable[str] = (),
+    ) -> None:
+        """
+        Consulta en Amadeus solo los codigos que faltan y los guarda.
+
+        Las aerolineas van en una sola llamada; los aeropuertos, una por
+        codigo desconocido (y nunca mas, quedan en la cache).
+
+        Args:
+            client: AmadeusClient (lookup_airlines / lookup_airport)
+            carriers: Codigos de aerolinea a comprobar
+            airports: Codigos IATA de aeropuerto a comprobar
+        """
+        missing_carriers = sorted({c for c in carriers if self.carrier_name(c) is None})
+        if missing_carriers:
+            try:
+                self.learn_carriers(client.lookup_airlines(missing_carriers))
+            except Exception as e:
+                logger.warning(f"No se pudieron consultar aerolineas {missing_carriers}: {e}")
+
+        for code in sorted({a for a in airports if self.airport(a) is None}):
+            try:
+                found = client.lookup_airport(code)
+            except Exception as e:
+                logger.warning(f"No se pudo consultar el aeropuerto {code}: {e}")
+                continue
+            if found is None:
+                continue
+            self._airports[code] = found
+            if self.cache is not None:
+                self.cache.set(f"airport|{code}", {"city": found.city, "timezone": found.timezone})
+            logger.info(f"Aeropuerto nuevo en datos de referencia: {code} = {found.city}")
+
+
+_default: Optional[ReferenceIndex] = None
+_default_lock = threading.Lock()
+
+
+def get_reference() -> ReferenceIndex:
+    """Indice compartido (fichero empaquetado + cache de referencia)."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = ReferenceIndex(cache=PersistentCache(REFERENCE_CACHE_FILE))
+        return _default
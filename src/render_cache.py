@@ -0,0 +1,72 @@
+"""Cache de secciones de mensaje ya formateadas, por contenido de los resultados."""
+
+import threading
+from collections import OrderedDict
+from datetime import date, datetime, time
+from typing import Callable, Hashable, TypeVar
+
+T = TypeVar("T")
+
+# Valores que van tal cual en la clave (inmutables y hashables)
+_ATOMS = {str, int, float, bool, type(None), date, datetime, time}
+
+
+def content_key(value) -> Hashable:
+    """
+    Clave hashable con el contenido de un valor.
+
+    RouteResult, TripOption y FlightOption son dataclasses mutables (no
+    hashables), asi que se convierten en tuplas con el valor de cada campo.
+    Dos resultados con los mismos datos dan la misma clave aunque sean
+    objetos distintos. Se lee __dict__ en vez de dataclasses.fields porque
+    la clave se calcula en cada mensaje y debe costar menos que formatear.
+    """
+    if hasattr(value, "__dataclass_fields__"):
+        return (type(value), *[v if type(v) in _ATOMS else content_key(v) for v in value.__dict__.values()])
+    if isinstance(value, (list, tuple)):
+        return tuple(content_key(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, content_key(v)) for k, v in value.items()))
+    return value
+
+
+class RenderCache:
+    """
+    LRU de texto ya formateado, compartido por todo el proceso.
+
+    Los mensajes que repiten una seccion (el del lote, el de cada ruta en
+    streaming, las respuestas del bot a varios chats) la formatean una vez;
+    solo se vuelve a formatear si cambian sus datos.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[Hashable, object] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_render(self, key: Hashable, render: Callable[[], T]) -> T:
+        """Seccion guardada para key, o render() si no esta (y se guarda)."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+
+        value = render()
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
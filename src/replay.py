@@ -0,0 +1,60 @@
+"""Cliente que responde con ofertas ya guardadas en vez de llamar a Amadeus."""
+
+import logging
+from datetime import date, time
+from typing import Optional
+
+from src.amadeus_client import FlightOption, RoundTripOffer, matches_time_filter
+from src.offer_index import OfferIndex, RoundTripKey
+
+logger = logging.getLogger(__name__)
+
+
+class ReplayClient:
+    """
+    Sustituto de AmadeusClient para repetir busquedas sin API.
+
+    Tiene la misma firma de search_flights y search_round_trips, asi
+    FlightSearcher aplica su logica de filtros y combos sobre ofertas de
+    ejecuciones pasadas.
+    """
+
+    def __init__(self, index: OfferIndex, round_trips: Optional[dict[RoundTripKey, list[RoundTripOffer]]] = None):
+        self.index = index
+        self.round_trips = round_trips or {}
+        self.calls = 0
+
+    def search_flights(
+        self,
+        origin: str,
+        destination: str,
+        search_date: str,
+        max_arrival_time: Optional[time] = None,
+        min_departure_time: Optional[time] = None,
+    ) -> list[FlightOption]:
+        """Devuelve las ofertas guardadas para la ruta y fecha."""
+        self.calls += 1
+        offers = self.index.get(origin, destination, date.fromisoformat(search_date))
+        if offers is None:
+            logger.debug(f"Sin ofertas guardadas para {origin}->{destination} {search_date}")
+            return []
+
+        options = [o for o in offers if matches_time_filter(o, max_arrival_time, min_departure_time)]
+        options.sort(key=lambda x: x.price)
+        return options
+
+    def search_round_trips(
+        self,
+        origin: str,
+        destination: str,
+        departure_date: str,
+        return_date: str,
+    ) -> list[RoundTripOffer]:
+        """Devuelve las ofertas ida y vuelta guardadas para la ruta y fechas."""
+        self.calls += 1
+        key = (origin, destination, date.fromisoformat(departure_date), date.fromisoformat(return_date))
+        offers = self.round_trips.get(key)
+        if offers is None:
+            logger.debug(f"Sin ofertas ida y vuelta guardadas para {origin}<->{destination} {departure_date}/{return_date}")
+            return []
+        return sorted(offers, key=lambda x: x.price)
@@ -2,7 +2,8 @@
 """Logica de busqueda de vuelos."""
 
 import logging
-from dataclasses import dataclass
+from collections import Counter
+from dataclasses import dataclass, field
 from datetime import date, datetime, time, timedelta
 from typing import Optional
 
@@ -10,11 +11,26 @@ from config.settings import (
     DAY_PAIRS,
     MAX_ARRIVAL_TIME,
     MIN_DEPARTURE_TIME,
+    PARETO_MAX_OPTIONS,
+    QUERY_PLAN,
+    QUERY_PLANS,
+    RANKING_MODE,
     RELAXED_MARGIN_MINUTES,
     SINGLE_LEG_THRESHOLD,
     ROUTES_WITH_SINGLE_LEGS,
 )
-from src.amadeus_client import AmadeusClient, FlightOption
+from src.amadeus_client import (
+    AmadeusClient,
+    AmadeusUnavailableError,
+    FlightOption,
+    RoundTripOffer,
+    matches_time_filter,
+)
+from src.checkpoint import RunCheckpoint
+from src.offer_index import OfferIndex, RoundTripKey
+from src.planner import run_concurrently
+from src.providers import TransportProvider
+from src.ranking import minutes_of_day, pareto_front
 
 logger = logging.getLogger(__name__)
 
@@ -26,11 +42,31 @@ class TripOption:
     return_flight: FlightOption
     outbound_date: date
     return_date: date
+    bundle_price: Optional[float] = None  # Precio conjunto si viene de una busqueda ida y vuelta
 
     @property
     def total_price(self) -> float:
+        if self.bundle_price is not None:
+            return self.bundle_price
         return self.outbound.price + self.return_flight.price
 
+    @property
+    def is_bundle(self) -> bool:
+        """True si ida y vuelta se compran juntas (una oferta ida y vuelta)."""
+        return self.bundle_price is not None
+
+    @property
+    def ground_minutes(self) -> int:
+        """Minutos en destino (llegada de la ida a salida de la vuelta)."""
+        return int((self.return_flight.departure_time - self.outbound.arrival_time).total_seconds() // 60)
+
+    def within_time_filters(self, max_arrival: time, min_departure: time) -> bool:
+        """True si ida y vuelta cumplen los filtros de horario."""
+        return (
+            matches_time_filter(self.outbound, max_arrival_time=max_arrival)
+            and matches_time_filter(self.return_flight, min_departure_time=min_departure)
+        )
+
 
 @dataclass
 class RouteResult:
@@ -42,6 +78,10 @@ class RouteResult:
     best_return: Optional[FlightOption]    # Solo si origin in ROUTES_WITH_SINGLE_LEGS
     week_start: date
     relaxed_filters: bool = False
+    pareto_options: list[TripOption] = field(default_factory=list)  # Solo si RANKING_MODE == "pareto"
+    stale_since: Optional[datetime] = None  # Ofertas de cache mas antiguas usadas (Amadeus caido)
+    api_unavailable: bool = False           # Alguna consulta sin respuesta ni cache
+    plan_prices: dict[str, float] = field(default_factory=dict)  # Mejor combo de cada plan ("oneway", "roundtrip")
 
 
 def _add_minutes_to_time(t: time, minutes: int) -> time:
@@ -58,11 +98,85 @@ def _subtract_minutes_from_time(t: time, minutes: int) -> time:
     return dt.time()
 
 
+def _trip_objectives(trip: TripOption) -> tuple[float, int, int, int]:
+    """Objetivos a minimizar: precio, llegada a destino, -salida de vuelta, -tiempo en destino."""
+    return (
+        trip.total_price,
+        minutes_of_day(trip.outbound.arrival_time),
+        -minutes_of_day(trip.return_flight.departure_time),
+        -trip.ground_minutes,
+    )
+
+
+def _bundle_trips(key: RoundTripKey, offers: list[RoundTripOffer]) -> list[TripOption]:
+    """Combos de las ofertas de una busqueda ida y vuelta."""
+    _, _, outbound_date, return_date = key
+    return [
+        TripOption(
+            outbound=offer.outbound,
+            return_flight=offer.return_flight,
+            outbound_date=outbound_date,
+            return_date=return_date,
+            bundle_price=offer.price,
+        )
+        for offer in offers
+    ]
+
+
 class FlightSearcher:
     """Buscador de vuelos."""
 
-    def __init__(self, client: Optional[AmadeusClient] = None):
-        self.client = client or AmadeusClient()
+    def __init__(
+        self,
+        client: Optional[AmadeusClient] = None,
+        max_arrival_time: time = MAX_ARRIVAL_TIME,
+        min_departure_time: time = MIN_DEPARTURE_TIME,
+        single_leg_threshold: float = SINGLE_LEG_THRESHOLD,
+        day_pairs: Optional[list[tuple[int, int]]] = None,
+        providers: Optional[list[TransportProvider]] = None,
+        checkpoint: Optional[RunCheckpoint] = None,
+        query_plan: str = QUERY_PLAN,
+    ):
+        """
+        Args:
+            client: Cliente de Amadeus (o sustituto con search_flights)
+            providers: Proveedores a consultar en paralelo (por defecto solo client).
+                Sus opciones se mezclan, asi los combos pueden ser tren + avion.
+            checkpoint: Guarda cada consulta al terminar y reutiliza las que
+                ya tenga (al reanudar una ejecucion)
+            query_plan: "oneway", "roundtrip" o "mixed" (ver QUERY_PLAN). Las
+                busquedas ida y vuelta van solo a client, no a los proveedores.
+
+        Raises:
+            ValueError: Si query_plan no es un plan conocido
+        """
+        if query_plan not in QUERY_PLANS:
+            raise ValueError(f"Plan de consultas desconocido: {query_plan} (opciones: {', '.join(QUERY_PLANS)})")
+        if client is None and not providers:
+            client = AmadeusClient()
+        if query_plan != "oneway" and not hasattr(client, "search_round_trips"):
+            logger.warning(f"{type(client).__name__} no busca ida y vuelta, se usa el plan oneway")
+            query_plan = "oneway"
+        self.client = client
+        self.providers = providers or [client]
+        self.query_plan = query_plan
+        self.round_trips: dict[RoundTripKey, list[TripOption]] = {}
+        self.unavailable_round_trips: set[RoundTripKey] = set()
+        self.calls: Counter[str] = Counter()  # Consultas hechas por plan
+        self.offer_index = OfferIndex()
+        self.checkpoint = checkpoint
+        if checkpoint is not None:
+            for key in checkpoint.queries.keys():
+                self.offer_index.add(*key, checkpoint.queries.get(*key))
+            for key, offers in checkpoint.round_trips.items():
+                self.round_trips[key] = _bundle_trips(key, offers)
+        self.max_arrival_time = max_arrival_time
+        self.min_departure_time = min_departure_time
+        self.single_leg_threshold = single_leg_threshold
+        self.day_pairs = day_pairs or DAY_PAIRS
+        self.unavailable: set[tuple[str, str, date]] = set()
+        # Respuestas con algun proveedor caido: se usan en esta ejecucion pero no se guardan
+        self.partial: dict[tuple[str, str, date], list[FlightOption]] = {}
 
     def search_route(self, origin: str, destination: str, target_date: date) -> RouteResult:
         """
@@ -81,23 +195,210 @@ class FlightSearcher:
         # Intentar con filtros estrictos
         result = self._search_with_filters(
             origin, destination, week_start,
-            MAX_ARRIVAL_TIME, MIN_DEPARTURE_TIME,
+            self.max_arrival_time, self.min_departure_time,
             relaxed=False,
         )
 
         # Si no hay resultados, intentar con filtros relajados
         if result.best_combo is None:
             logger.warning(f"Sin resultados para {origin}->{destination}, probando filtros relajados")
-            relaxed_arrival = _add_minutes_to_time(MAX_ARRIVAL_TIME, RELAXED_MARGIN_MINUTES)
-            relaxed_departure = _subtract_minutes_from_time(MIN_DEPARTURE_TIME, RELAXED_MARGIN_MINUTES)
+            relaxed_arrival = _add_minutes_to_time(self.max_arrival_time, RELAXED_MARGIN_MINUTES)
+            relaxed_departure = _subtract_minutes_from_time(self.min_departure_time, RELAXED_MARGIN_MINUTES)
             result = self._search_with_filters(
                 origin, destination, week_start,
                 relaxed_arrival, relaxed_departure,
                 relaxed=True,
             )
 
+        if RANKING_MODE == "pareto":
+            result.pareto_options = self._pareto_options(origin, destination, week_start)
+
         return result
 
+    def _fetch(self, origin: str, destination: str, flight_date: date) -> list[FlightOption]:
+        """
+        Consulta ofertas sin filtro horario, reutilizando las ya consultadas.
+
+        Los filtros se aplican despues en local, asi la pasada con filtros
+        relajados y el ranking no repiten llamadas a la API.
+        """
+        cached = self._known(origin, destination, flight_date)
+        if cached is not None:
+            return cached
+        if (origin, destination, flight_date) in self.unavailable:
+            return []
+
+        self.calls["oneway"] += 1
+        try:
+            options, failed = self._query_providers(origin, destination, flight_date)
+        except AmadeusUnavailableError as e:
+            logger.error(f"Sin datos para {origin}->{destination} {flight_date}: {e}")
+            self.unavailable.add((origin, destination, flight_date))
+            return []
+
+        if failed:
+            # Incompleta: se marca como no disponible y no se guarda (ni en el checkpoint)
+            logger.error(f"Respuesta parcial para {origin}->{destination} {flight_date}, fallaron: {', '.join(failed)}")
+            self.unavailable.add((origin, destination, flight_date))
+            self.partial[(origin, destination, flight_date)] = options
+            return options
+
+        self.offer_index.add(origin, destination, flight_date, options)
+        if self.checkpoint is not None:
+            self.checkpoint.record_query(origin, destination, flight_date, options)
+        return options
+
+    def _fetch_round_trip(
+        self,
+        origin: str,
+        destination: str,
+        outbound_date: date,
+        return_date: date,
+    ) -> list[TripOption]:
+        """Combos de una busqueda ida y vuelta (sin filtro horario), reutilizando las ya hechas."""
+        key = (origin, destination, outbound_date, return_date)
+        if key in self.round_trips:
+            return self.round_trips[key]
+        if key in self.unavailable_round_trips:
+            return []
+
+        self.calls["roundtrip"] += 1
+        try:
+            offers = self.client.search_round_trips(
+                origin=origin,
+                destination=destination,
+                departure_date=outbound_date.isoformat(),
+                return_date=return_date.isoformat(),
+            )
+        except AmadeusUnavailableError as e:
+            logger.error(f"Sin datos ida y vuelta para {origin}<->{destination} {outbound_date}/{return_date}: {e}")
+            self.unavailable_round_trips.add(key)
+            return []
+
+        trips = _bundle_trips(key, offers)
+        self.round_trips[key] = trips
+        if self.checkpoint is not None:
+            self.checkpoint.record_round_trip(key, offers)
+        return trips
+
+    def round_trip_offers(self) -> dict[RoundTripKey, list[RoundTripOffer]]:
+        """Ofertas ida y vuelta consultadas en la ejecucion (para save_offers)."""
+        return {
+            key: [RoundTripOffer(trip.outbound, trip.return_flight, trip.bundle_price) for trip in trips]
+            for key, trips in self.round_trips.items()
+        }
+
+    def _uses_one_way(self, origin: str) -> bool:
+        """True si el plan busca ida y vuelta por separado para este origen."""
+        return self.query_plan == "oneway" or (self.query_plan == "mixed" and origin in ROUTES_WITH_SINGLE_LEGS)
+
+    def _uses_round_trips(self) -> bool:
+        return self.query_plan != "oneway"
+
+    def _known(self, origin: str, destination: str, flight_date: date) -> Optional[list[FlightOption]]:
+        """Opciones ya consultadas (completas o parciales), o None."""
+        options = self.offer_index.get(origin, destination, flight_date)
+        if options is None:
+            options = self.partial.get((origin, destination, flight_date))
+        return options
+
+    def _query_providers(
+        self, origin: str, destination: str, flight_date: date,
+    ) -> tuple[list[FlightOption], list[str]]:
+        """
+        Consulta todos los proveedores en paralelo y mezcla sus opciones.
+
+        Returns:
+            (opciones, nombres de los proveedores que fallaron)
+
+        Raises:
+            AmadeusUnavailableError: Si falla algun proveedor y los demas no devuelven nada
+        """
+        def query(provider: TransportProvider) -> tuple[list[FlightOption], Optional[Exception]]:
+            try:
+                return provider.search_flights(
+                    origin=origin,
+                    destination=destination,
+                    search_date=flight_date.isoformat(),
+                ), None
+            except Exception as e:
+                return [], e
+
+        if len(self.providers) == 1:
+            return self.providers[0].search_flights(
+                origin=origin,
+                destination=destination,
+                search_date=flight_date.isoformat(),
+            ), []
+
+        merged: list[FlightOption] = []
+        failed: list[str] = []
+        for provider, (options, error) in run_concurrently(query, self.providers, max_workers=len(self.providers)):
+            if error is not None:
+                logger.warning(f"{type(provider).__name__} sin respuesta para {origin}->{destination} {flight_date}: {error}")
+                failed.append(type(provider).__name__)
+            merged.extend(options)
+
+        # Si algun proveedor fallo y el resto no tiene nada, no es "sin opciones"
+        if failed and not merged:
+            raise AmadeusUnavailableError("Ningun proveedor disponible ha devuelto opciones")
+
+        merged.sort(key=lambda x: x.price)
+        return merged, failed
+
+    def _pareto_options(self, origin: str, destination: str, week_start: date) -> list[TripOption]:
+        """
+        Combos no dominados en precio, llegada, salida de vuelta y tiempo en destino.
+
+        Solo entran legs dentro de los filtros relajados, ya podados con su
+        propio frente (un leg dominado solo genera combos dominados). Va
+        primero el combo mas barato con filtros estrictos y luego el resto.
+        """
+        relaxed_arrival = _add_minutes_to_time(self.max_arrival_time, RELAXED_MARGIN_MINUTES)
+        relaxed_departure = _subtract_minutes_from_time(self.min_departure_time, RELAXED_MARGIN_MINUTES)
+
+        candidates: list[TripOption] = []
+        for day_out, day_ret in self.day_pairs:
+            outbound_date = week_start + timedelta(days=day_out)
+            return_date = week_start + timedelta(days=day_ret)
+
+            outbound_flights = pareto_front(
+                [
+                    x for x in self._known(origin, destination, outbound_date) or []
+                    if matches_time_filter(x, max_arrival_time=relaxed_arrival)
+                ],
+                lambda x: (x.price, minutes_of_day(x.arrival_time)),
+            )
+            return_flights = pareto_front(
+                [
+                    x for x in self._known(destination, origin, return_date) or []
+                    if matches_time_filter(x, min_departure_time=relaxed_departure)
+                ],
+                lambda x: (x.price, -minutes_of_day(x.departure_time)),
+            )
+            candidates.extend(
+                TripOption(
+                    outbound=out,
+                    return_flight=ret,
+                    outbound_date=outbound_date,
+                    return_date=return_date,
+                )
+                for out in outbound_flights
+                for ret in return_flights
+            )
+            candidates.extend(
+                trip for trip in self.round_trips.get((origin, destination, outbound_date, return_date), [])
+                if trip.within_time_filters(relaxed_arrival, relaxed_departure)
+            )
+
+        front = sorted(pareto_front(candidates, _trip_objectives), key=lambda x: x.total_price)
+        strict = [t for t in front if t.within_time_filters(self.max_arrival_time, self.min_departure_time)]
+        if strict:
+            front.remove(strict[0])
+            front.insert(0, strict[0])
+
+        return front[:PARETO_MAX_OPTIONS]
+
     def _search_with_filters(
         self,
         origin: str,
@@ -111,56 +412,81 @@ class FlightSearcher:
         all_combos: list[TripOption] = []
         all_outbound: list[FlightOption] = []
         all_return: list[FlightOption] = []
+        api_unavailable = False
 
-        for day_out, day_ret in DAY_PAIRS:
+        for day_out, day_ret in self.day_pairs:
             outbound_date = week_start + timedelta(days=day_out)
             return_date = week_start + timedelta(days=day_ret)
 
-            # Buscar vuelos de ida
-            outbound_flights = self.client.search_flights(
-                origin=origin,
-                destination=destination,
-                search_date=outbound_date.isoformat(),
-                max_arrival_time=max_arrival,
-            )
-            all_outbound.extend(outbound_flights)
-
-            # Buscar vuelos de vuelta
-            return_flights = self.client.search_flights(
-                origin=destination,
-                destination=origin,
-                search_date=return_date.isoformat(),
-                min_departure_time=min_departure,
-            )
-            all_return.extend(return_flights)
-
-            # Combinar mejor ida + mejor vuelta para este par de dias
-            if outbound_flights and return_flights:
-                best_out = min(outbound_flights, key=lambda x: x.price)
-                best_ret = min(return_flights, key=lambda x: x.price)
-                all_combos.append(TripOption(
-                    outbound=best_out,
-                    return_flight=best_ret,
-                    outbound_date=outbound_date,
-                    return_date=return_date,
-                ))
+            if self._uses_one_way(origin):
+                # Buscar vuelos de ida
+                outbound_flights = [
+                    x for x in self._fetch(origin, destination, outbound_date)
+                    if matches_time_filter(x, max_arrival_time=max_arrival)
+                ]
+                all_outbound.extend(outbound_flights)
+
+                # Buscar vuelos de vuelta
+                return_flights = [
+                    x for x in self._fetch(destination, origin, return_date)
+                    if matches_time_filter(x, min_departure_time=min_departure)
+                ]
+                all_return.extend(return_flights)
 
-        # Encontrar mejor combo
+                api_unavailable = api_unavailable or (
+                    (origin, destination, outbound_date) in self.unavailable
+                    or (destination, origin, return_date) in self.unavailable
+                )
+
+                # Combinar mejor ida + mejor vuelta para este par de dias
+                if outbound_flights and return_flights:
+                    best_out = min(outbound_flights, key=lambda x: x.price)
+                    best_ret = min(return_flights, key=lambda x: x.price)
+                    all_combos.append(TripOption(
+                        outbound=best_out,
+                        return_flight=best_ret,
+                        outbound_date=outbound_date,
+                        return_date=return_date,
+                    ))
+
+            if self._uses_round_trips():
+                # Una sola busqueda ida y vuelta para este par de dias
+                trips = [
+                    x for x in self._fetch_round_trip(origin, destination, outbound_date, return_date)
+                    if x.within_time_filters(max_arrival, min_departure)
+                ]
+                api_unavailable = api_unavailable or (
+                    (origin, destination, outbound_date, return_date) in self.unavailable_round_trips
+                )
+                if trips:
+                    all_combos.append(min(trips, key=lambda x: x.total_price))
+
+        # Encontrar mejor combo (el mas barato de los planes consultados)
         best_combo = min(all_combos, key=lambda x: x.total_price) if all_combos else None
+        plan_prices: dict[str, float] = {}
+        for combo in all_combos:
+            plan = "roundtrip" if combo.is_bundle else "oneway"
+            plan_prices[plan] = min(plan_prices.get(plan, combo.total_price), combo.total_price)
 
-        # Single legs solo para rutas configuradas
+        # Single legs solo para rutas configuradas (vuelos, para combinar con tren)
         best_outbound = None
         best_return = None
-        if origin in ROUTES_WITH_SINGLE_LEGS and all_outbound:
-            cheapest_out = min(all_outbound, key=lambda x: x.price)
-            if cheapest_out.price < SINGLE_LEG_THRESHOLD:
+        flights_out = [x for x in all_outbound if x.mode == "flight"]
+        flights_ret = [x for x in all_return if x.mode == "flight"]
+        if origin in ROUTES_WITH_SINGLE_LEGS and flights_out:
+            cheapest_out = min(flights_out, key=lambda x: x.price)
+            if cheapest_out.price < self.single_leg_threshold:
                 best_outbound = cheapest_out
 
-        if origin in ROUTES_WITH_SINGLE_LEGS and all_return:
-            cheapest_ret = min(all_return, key=lambda x: x.price)
-            if cheapest_ret.price < SINGLE_LEG_THRESHOLD:
+        if origin in ROUTES_WITH_SINGLE_LEGS and flights_ret:
+            cheapest_ret = min(flights_ret, key=lambda x: x.price)
+            if cheapest_ret.price < self.single_leg_threshold:
                 best_return = cheapest_ret
 
+        legs = all_outbound + all_return
+        legs += [leg for combo in all_combos if combo.is_bundle for leg in (combo.outbound, combo.return_flight)]
+        stale = [x.stale_since for x in legs if x.stale_since]
+
         return RouteResult(
             origin=origin,
             destination=destination,
@@ -169,4 +495,7 @@ class FlightSearcher:
             best_return=best_return,
             week_start=week_start,
             relaxed_filters=relaxed,
+            stale_since=min(stale) if stale else None,
+            api_unavailable=api_unavailable,
+            plan_prices=plan_prices,
         )
@@ -0,0 +1,314 @@
+"""
+Formato binario de ofertas para recargar ejecuciones pasadas sin parsear.
+
+Estructura del archivo (little endian):
+    cabecera   HEADER (magic, version, numero de registros, fechas, tabla de strings)
+    registros  RECORD de ancho fijo, uno por oferta
+    strings    lista JSON con los strings internados (rutas, aeropuertos, aerolineas,
+               fechas de cache obsoleta)
+
+Los registros se leen con struct directamente del archivo mapeado en
+memoria. Las ofertas de cada consulta estan en registros consecutivos, asi
+SnapshotIndex puede decodificar solo las consultas que se piden.
+"""
+
+import json
+import mmap
+import struct
+from datetime import date, datetime, time, timedelta
+from pathlib import Path
+from typing import Optional
+
+from src.amadeus_client import FlightOption, matches_time_filter
+from src.offer_index import OfferIndex, OfferKey
+
+MAGIC = b"BCNOFFER"
+VERSION = 1
+
+# magic, version, record_count, search_date (ordinal), week_start (ordinal), strings_size
+HEADER = struct.Struct("<8sIIiiI")
+
+# query_date, dep_date, arr_date (ordinales), price_cents,
+# dep_min, arr_min, route, origin, destination, carrier_code, carrier_name,
+# flight_number, flags, stale_since (string internado; solo con FLAG_STALE)
+RECORD = struct.Struct("<iiiIHHHHHHHHHH")
+
+# Solo query_date y route de un registro (para localizar las consultas sin decodificarlas)
+RECORD_KEY = struct.Struct(f"<i16xH{RECORD.size - 22}x")
+
+# Registro sin oferta: marca una consulta que no devolvio resultados
+FLAG_EMPTY_QUERY = 1
+# Leg de tren (proveedor de horarios de tren)
+FLAG_RAIL = 2
+# Oferta de cache obsoleta (Amadeus caido): el ultimo campo es su stale_since
+FLAG_STALE = 4
+
+NUMPY_DTYPE_FIELDS = [
+    ("query_date", "<i4"),
+    ("dep_date", "<i4"),
+    ("arr_date", "<i4"),
+    ("price_cents", "<u4"),
+    ("dep_min", "<u2"),
+    ("arr_min", "<u2"),
+    ("route", "<u2"),
+    ("origin", "<u2"),
+    ("destination", "<u2"),
+    ("carrier_code", "<u2"),
+    ("carrier_name", "<u2"),
+    ("flight_number", "<u2"),
+    ("flags", "<u2"),
+    ("stale_since", "<u2"),
+]
+
+
+class _Interner:
+    """Asigna un id estable a cada string."""
+
+    def __init__(self):
+        self.ids: dict[str, int] = {}
+        self.strings: list[str] = []
+
+    def __call__(self, value: str) -> int:
+        if value not in self.ids:
+            self.ids[value] = len(self.strings)
+            self.strings.append(value)
+        return self.ids[value]
+
+
+def _minutes(dt: datetime) -> int:
+    return dt.hour * 60 + dt.minute
+
+
+def _to_datetime(ordinal: int, minutes: int) -> datetime:
+    return datetime.combine(date.fromordinal(ordinal), datetime.min.time()) + timedelta(minutes=minutes)
+
+
+def write_snapshot(index: OfferIndex, search_date: date, week_start: date, path: Path) -> Path:
+    """
+    Escribe todas las ofertas de un OfferIndex en formato binario.
+
+    Returns:
+        Ruta del archivo escrito
+    """
+    intern = _Interner()
+    records = bytearray()
+    count = 0
+
+    for origin, destination, query_date in index.keys():
+        route = intern(f"{origin}-{destination}")
+        offers = index.get(origin, destination, query_date)
+        if not offers:
+            records += RECORD.pack(
+                query_date.toordinal(), 0, 0, 0, 0, 0,
+                route, intern(origin), intern(destination), 0, 0, 0, FLAG_EMPTY_QUERY, 0,
+            )
+            count += 1
+            continue
+
+        for offer in offers:
+            records += RECORD.pack(
+                query_date.toordinal(),
+                offer.departure_time.toordinal(),
+                offer.arrival_time.toordinal(),
+                round(offer.price * 100),
+                _minutes(offer.departure_time),
+                _minutes(offer.arrival_time),
+                route,
+                intern(offer.origin),
+                intern(offer.destination),
+                intern(offer.carrier_code),
+                intern(offer.carrier_name),
+                intern(offer.flight_number),
+                (FLAG_RAIL if offer.mode == "rail" else 0) | (FLAG_STALE if offer.stale_since else 0),
+                intern(offer.stale_since.isoformat()) if offer.stale_since else 0,
+            )
+            count += 1
+
+    strings = json.dumps(intern.strings).encode("utf-8")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, count, search_date.toordinal(), week_start.toordinal(), len(strings)))
+        f.write(records)
+        f.write(strings)
+    return path
+
+
+class OfferSnapshot:
+    """
+    Snapshot binario abierto con mmap (solo lectura).
+
+    Los registros no se decodifican hasta que se piden: to_index() crea
+    todos los FlightOption y SnapshotIndex solo los de cada consulta pedida.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        with open(path, "rb") as f:
+            try:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                raise ValueError(f"Snapshot vacio: {path}")
+
+        magic, version, count, search_ord, week_ord, strings_size = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"Snapshot no reconocido: {path}")
+
+        self.count = count
+        self.search_date = date.fromordinal(search_ord)
+        self.week_start = date.fromordinal(week_ord)
+        strings_offset = HEADER.size + count * RECORD.size
+        self.strings: list[str] = json.loads(self._mmap[strings_offset:strings_offset + strings_size])
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __enter__(self) -> "OfferSnapshot":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if not self._mmap.closed:
+            self._mmap.close()
+
+    def record(self, i: int) -> tuple:
+        """Registro crudo i (ver RECORD)."""
+        return RECORD.unpack_from(self._mmap, HEADER.size + i * RECORD.size)
+
+    def query_ranges(self) -> dict[OfferKey, tuple[int, int]]:
+        """Registros [inicio, fin) de cada consulta, leyendo solo su fecha y ruta."""
+        strings = self.strings
+        ranges: dict[OfferKey, tuple[int, int]] = {}
+        end = HEADER.size + self.count * RECORD.size
+        with memoryview(self._mmap) as view, view[HEADER.size:end] as records:
+            for i, (query_ord, route) in enumerate(RECORD_KEY.iter_unpack(records)):
+                query_origin, query_destination = strings[route].split("-")
+                key = (query_origin, query_destination, date.fromordinal(query_ord))
+                start = ranges[key][0] if key in ranges else i
+                ranges[key] = (start, i + 1)
+        return ranges
+
+    def _decode(self, record: tuple) -> FlightOption:
+        (_, dep_ord, arr_ord, price_cents, dep_min, arr_min, _,
+         origin, destination, carrier_code, carrier_name, flight_number, flags, stale_since) = record
+        strings = self.strings
+        return FlightOption(
+            origin=strings[origin],
+            destination=strings[destination],
+            departure_time=_to_datetime(dep_ord, dep_min),
+            arrival_time=_to_datetime(arr_ord, arr_min),
+            price=price_cents / 100,
+            carrier_code=strings[carrier_code],
+            carrier_name=strings[carrier_name],
+            flight_number=strings[flight_number],
+            mode="rail" if flags & FLAG_RAIL else "flight",
+            stale_since=datetime.fromisoformat(strings[stale_since]) if flags & FLAG_STALE else None,
+        )
+
+    def offers(self, start: int, end: int) -> list[FlightOption]:
+        """Decodifica las ofertas de los registros [start, end)."""
+        with memoryview(self._mmap) as view:
+            with view[HEADER.size + start * RECORD.size:HEADER.size + end * RECORD.size] as records:
+                return [
+                    self._decode(record) for record in RECORD.iter_unpack(records)
+                    if not record[12] & FLAG_EMPTY_QUERY  # flags
+                ]
+
+    def cheapest(self, start: int, end: int) -> Optional[FlightOption]:
+        """Oferta mas barata de los registros [start, end), decodificando solo esa."""
+        with memoryview(self._mmap) as view:
+            with view[HEADER.size + start * RECORD.size:HEADER.size + end * RECORD.size] as records:
+                best = min(
+                    (record for record in RECORD.iter_unpack(records) if not record[12] & FLAG_EMPTY_QUERY),
+                    key=lambda record: record[3],  # price_cents
+                    default=None,
+                )
+        return self._decode(best) if best else None
+
+    def to_index(self) -> OfferIndex:
+        """Decodifica todas las ofertas en un OfferIndex."""
+        index = OfferIndex()
+        for (origin, destination, query_date), (start, end) in self.query_ranges().items():
+            index.add(origin, destination, query_date, self.offers(start, end))
+        return index
+
+    def as_array(self):
+        """
+        Vista NumPy de los registros (sin copia, solo lectura).
+
+        Para analisis a mano (notebooks); el buscador no la usa y numpy no
+        es dependencia suya. El snapshot no se puede cerrar mientras el
+        array siga vivo.
+        """
+        try:
+            import numpy as np
+        except ImportError:
+            raise ImportError("as_array() necesita numpy: pip install numpy")
+
+        return np.frombuffer(self._mmap, dtype=np.dtype(NUMPY_DTYPE_FIELDS), count=self.count, offset=HEADER.size)
+
+
+class SnapshotIndex:
+    """
+    Lectura de un snapshot con la misma interfaz de consulta que OfferIndex.
+
+    Al abrirlo solo se leen la fecha y la ruta de cada registro; las
+    ofertas de una consulta se decodifican la primera vez que se piden.
+    Las paginas del archivo mapeado las comparte el SO entre los procesos
+    que abren el mismo snapshot.
+    """
+
+    def __init__(self, snapshot: OfferSnapshot):
+        self.snapshot = snapshot
+        self._ranges = snapshot.query_ranges()
+        self._decoded: dict[OfferKey, list[FlightOption]] = {}
+
+    def get(self, origin: str, destination: str, flight_date: date) -> Optional[list[FlightOption]]:
+        """Ofertas de una consulta, o None si no se guardo."""
+        key = (origin, destination, flight_date)
+        if key not in self._ranges:
+            return None
+        if key not in self._decoded:
+            self._decoded[key] = self.snapshot.offers(*self._ranges[key])
+        return self._decoded[key]
+
+    def cheapest(
+        self,
+        origin: str,
+        destination: str,
+        flight_date: date,
+        max_arrival_time: Optional[time] = None,
+        min_departure_time: Optional[time] = None,
+        mode: Optional[str] = None,
+    ) -> Optional[FlightOption]:
+        """
+        Oferta mas barata de una consulta, o None si no hay (como OfferIndex.cheapest).
+
+        Sin filtros y con la consulta aun sin decodificar se compara el
+        precio de los registros y solo se decodifica el minimo.
+        """
+        key = (origin, destination, flight_date)
+        unfiltered = max_arrival_time is None and min_departure_time is None and mode is None
+        if unfiltered and key not in self._decoded:
+            return self.snapshot.cheapest(*self._ranges[key]) if key in self._ranges else None
+
+        matching = [
+            option for option in self.get(origin, destination, flight_date) or []
+            if matches_time_filter(option, max_arrival_time, min_departure_time)
+            and (mode is None or option.mode == mode)
+        ]
+        return min(matching, key=lambda x: x.price) if matching else None
+
+    def keys(self) -> list[OfferKey]:
+        return list(self._ranges)
+
+    def __contains__(self, key: OfferKey) -> bool:
+        return key in self._ranges
+
+    def __len__(self) -> int:
+        return len(self._ranges)
+
+    def close(self) -> None:
+        self.snapshot.close()
@@ -2,6 +2,7 @@
 
 import logging
 import time
+from typing import Optional
 
 import requests
 
@@ -30,12 +31,13 @@ class TelegramClient:
 
         self.base_url = f"https://api.telegram.org/bot{self.token}"
 
-    def send_message(self, text: str) -> bool:
+    def send_message(self, text: str, chat_id: str = None) -> bool:
         """
         Envía un mensaje de texto.
 
         Args:
             text: Texto del mensaje (máximo 4096 caracteres)
+            chat_id: Chat de destino (por defecto el configurado)
 
         Returns:
             True si se envió correctamente
@@ -47,7 +49,7 @@ class TelegramClient:
 
         url = f"{self.base_url}/sendMessage"
         payload = {
-            "chat_id": self.chat_id,
+            "chat_id": chat_id or self.chat_id,
             "text": text,
             "parse_mode": "HTML",  # Permite formato básico
         }
@@ -72,6 +74,34 @@ class TelegramClient:
         logger.error("No se pudo enviar el mensaje después de todos los intentos")
         return False
 
+    def get_updates(self, offset: int = None, timeout: int = 30) -> Optional[list[dict]]:
+        """
+        Recibe mensajes nuevos (long polling).
+
+        Args:
+            offset: Primer update_id a recibir (los anteriores se dan por leídos)
+            timeout: Segundos que Telegram espera si no hay mensajes
+
+        Returns:
+            Lista de updates (vacía si no hay mensajes), o None si hay error
+        """
+        params = {"timeout": timeout, "allowed_updates": '["message"]'}
+        if offset is not None:
+            params["offset"] = offset
+
+        try:
+            response = requests.get(f"{self.base_url}/getUpdates", params=params, timeout=timeout + 10)
+            response.raise_for_status()
+            result = response.json()
+        except (requests.exceptions.RequestException, ValueError) as e:
+            logger.warning(f"Error recibiendo mensajes de Telegram: {e}")
+            return None
+
+        if not result.get("ok"):
+            logger.error(f"Error de Telegram: {result}")
+            return None
+        return result.get("result", [])
+
     def send_error_alert(self, error_message: str) -> bool:
         """Envía una alerta de error."""
         text = f"🔴 ERROR en buscador de vuelos BCN\n\n{error_message}"
@@ -2,7 +2,9 @@
 
 from datetime import date
 
-# Mapeo de códigos IATA a nombres de ciudad para Trainline
+from src.reference_data import get_reference
+
+# Respaldo si no se pueden leer los datos de referencia (config/reference_data.json)
 TRAINLINE_CITIES = {
     "MAD": "madrid",
     "BCN": "barcelona",
@@ -51,8 +53,9 @@ def trainline_url(origin: str, destination: str) -> str | None:
     Returns:
         URL de Trainline o None si la ruta no tiene trenes
     """
-    origin_city = TRAINLINE_CITIES.get(origin)
-    dest_city = TRAINLINE_CITIES.get(destination)
+    reference = get_reference()
+    origin_city = reference.rail_slug(origin) or TRAINLINE_CITIES.get(origin)
+    dest_city = reference.rail_slug(destination) or TRAINLINE_CITIES.get(destination)
 
     if not origin_city or not dest_city:
         return None
@@ -0,0 +1,221 @@
+"""
+Simulacion "what-if": repite las busquedas guardadas con otros parametros.
+
+Ejemplo:
+    python src/whatif.py --max-arrival 09:00,10:00,11:00 --threshold 35,45 \\
+        --day-pairs 0-1,1-2,2-3,3-4 --day-pairs 0-1,3-4
+"""
+
+import argparse
+import itertools
+import logging
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import date, time
+from pathlib import Path
+from typing import Optional
+
+# Añadir el directorio raíz al path para imports
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from config.settings import (
+    DAY_PAIRS,
+    MAX_ARRIVAL_TIME,
+    MIN_DEPARTURE_TIME,
+    OFFERS_DIR,
+    ROUTES,
+    SINGLE_LEG_THRESHOLD,
+)
+from src.offer_store import StoredRun, load_runs
+from src.replay import ReplayClient
+from src.search import FlightSearcher
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Setting:
+    """Combinacion de parametros a simular."""
+    max_arrival: time
+    min_departure: time
+    threshold: float
+    day_pairs: tuple[tuple[int, int], ...]
+
+    def label(self) -> str:
+        pairs = ",".join(f"{a}-{b}" for a, b in self.day_pairs)
+        return (
+            f"llegada<={self.max_arrival.strftime('%H:%M')} "
+            f"salida>={self.min_departure.strftime('%H:%M')} "
+            f"umbral<{self.threshold:.0f}€ dias={pairs}"
+        )
+
+
+BASELINE = Setting(MAX_ARRIVAL_TIME, MIN_DEPARTURE_TIME, SINGLE_LEG_THRESHOLD, tuple(DAY_PAIRS))
+
+
+@dataclass
+class WeekOutcome:
+    """Combo elegido para una ruta y semana con un Setting."""
+    week_start: date
+    origin: str
+    destination: str
+    combo_price: Optional[float]
+    combo_id: Optional[str]  # Identifica los vuelos elegidos
+    relaxed: bool
+    single_leg_price: Optional[float]
+
+
+# Ejecuciones abiertas una vez por proceso del pool (solo lectura)
+_RUNS: list[StoredRun] = []
+
+
+def _load_shared_runs(store_dir: str) -> None:
+    global _RUNS
+    _RUNS = load_runs(Path(store_dir), lazy=True)
+
+
+def _init_worker(store_dir: str) -> None:
+    logging.disable(logging.WARNING)  # Los avisos de cada busqueda simulada sobran aqui
+    _load_shared_runs(store_dir)
+
+
+def evaluate_setting(setting: Setting) -> list[WeekOutcome]:
+    """Repite todas las ejecuciones guardadas con un Setting."""
+    outcomes = []
+    for run in _RUNS:
+        searcher = FlightSearcher(
+            client=ReplayClient(run.index, run.round_trips),
+            max_arrival_time=setting.max_arrival,
+            min_departure_time=setting.min_departure,
+            single_leg_threshold=setting.threshold,
+            day_pairs=list(setting.day_pairs),
+        )
+        for origin, destination in ROUTES:
+            result = searcher.search_route(origin, destination, run.week_start)
+            combo = result.best_combo
+            single_legs = [leg.price for leg in (result.best_outbound, result.best_return) if leg]
+            outcomes.append(WeekOutcome(
+                week_start=run.week_start,
+                origin=origin,
+                destination=destination,
+                combo_price=combo.total_price if combo else None,
+                combo_id=(
+                    f"{combo.outbound.carrier_code}{combo.outbound.flight_number}@{combo.outbound.departure_time:%Y%m%d%H%M}/"
+                    f"{combo.return_flight.carrier_code}{combo.return_flight.flight_number}@{combo.return_flight.departure_time:%Y%m%d%H%M}"
+                ) if combo else None,
+                relaxed=result.relaxed_filters,
+                single_leg_price=min(single_legs) if single_legs else None,
+            ))
+    return outcomes
+
+
+def run_whatif(settings: list[Setting], store_dir: Path, workers: int = 1) -> dict[Setting, list[WeekOutcome]]:
+    """
+    Evalua cada Setting sobre todas las ejecuciones guardadas.
+
+    Con workers > 1 reparte los Settings en un pool de procesos. Cada
+    proceso abre los snapshots con mmap al arrancar (las paginas las
+    comparte el SO) y solo decodifica las consultas que piden sus
+    busquedas, una vez; los JSON antiguos se cargan enteros en cada proceso.
+    """
+    if workers <= 1:
+        _load_shared_runs(str(store_dir))
+        return {setting: evaluate_setting(setting) for setting in settings}
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(str(store_dir),),
+    ) as executor:
+        return dict(zip(settings, executor.map(evaluate_setting, settings)))
+
+
+def format_table(results: dict[Setting, list[WeekOutcome]], baseline: Setting, detail: bool = False) -> str:
+    """Tabla resumen de cada Setting frente a la configuracion actual."""
+    base = {(o.week_start, o.origin): o for o in results.get(baseline, [])}
+    lines = [
+        f"{'Parametros':<62} {'Ruta':<8} {'Combos':>6} {'Medio':>7} {'Relaj.':>6} {'Cambios':>7} {'Δ medio':>8}",
+    ]
+
+    for setting, outcomes in results.items():
+        for origin, destination in ROUTES:
+            route = [o for o in outcomes if o.origin == origin]
+            priced = [o.combo_price for o in route if o.combo_price is not None]
+            changed = [o for o in route if base.get((o.week_start, o.origin)) and base[(o.week_start, o.origin)].combo_id != o.combo_id]
+            deltas = [
+                o.combo_price - base[(o.week_start, o.origin)].combo_price
+                for o in route
+                if o.combo_price is not None and base.get((o.week_start, o.origin))
+                and base[(o.week_start, o.origin)].combo_price is not None
+            ]
+            avg = f"{sum(priced) / len(priced):.0f}€" if priced else "-"
+            avg_delta = f"{sum(deltas) / len(deltas):+.0f}€" if deltas else "-"
+            lines.append(
+                f"{setting.label():<62} {origin}-{destination:<4} {len(priced):>6} {avg:>7} "
+                f"{sum(o.relaxed for o in route):>6} {len(changed):>7} {avg_delta:>8}"
+            )
+
+            if detail:
+                for o in route:
+                    price = f"{o.combo_price:.0f}€" if o.combo_price is not None else "sin combo"
+                    lines.append(f"    {o.week_start} {price}{' (relajado)' if o.relaxed else ''}")
+
+    return "\n".join(lines)
+
+
+def _parse_times(value: str) -> list[time]:
+    return [time.fromisoformat(v.strip()) for v in value.split(",")]
+
+
+def _parse_floats(value: str) -> list[float]:
+    return [float(v) for v in value.split(",")]
+
+
+def _parse_day_pairs(value: str) -> tuple[tuple[int, int], ...]:
+    pairs = []
+    for item in value.split(","):
+        day_out, day_ret = item.split("-")
+        pairs.append((int(day_out), int(day_ret)))
+    return tuple(pairs)
+
+
+def build_grid(
+    max_arrivals: list[time],
+    min_departures: list[time],
+    thresholds: list[float],
+    day_pairs: list[tuple[tuple[int, int], ...]],
+) -> list[Setting]:
+    """Producto cartesiano de parametros, con la configuracion actual primero."""
+    grid = [BASELINE]
+    for combination in itertools.product(max_arrivals, min_departures, thresholds, day_pairs):
+        setting = Setting(*combination)
+        if setting not in grid:
+            grid.append(setting)
+    return grid
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Simula busquedas pasadas con otros parametros")
+    parser.add_argument("--max-arrival", type=_parse_times, default=[MAX_ARRIVAL_TIME],
+                        help="Horas maximas de llegada, ej: 09:00,10:00")
+    parser.add_argument("--min-departure", type=_parse_times, default=[MIN_DEPARTURE_TIME],
+                        help="Horas minimas de salida, ej: 16:00,17:00")
+    parser.add_argument("--threshold", type=_parse_floats, default=[SINGLE_LEG_THRESHOLD],
+                        help="Umbrales de leg suelto en euros, ej: 35,45")
+    parser.add_argument("--day-pairs", type=_parse_day_pairs, action="append",
+                        help="Pares de dias, ej: 0-1,1-2 (se puede repetir)")
+    parser.add_argument("--store", type=Path, default=OFFERS_DIR, help="Directorio de ofertas guardadas")
+    parser.add_argument("--workers", type=int, default=4, help="Procesos en paralelo")
+    parser.add_argument("--detail", action="store_true", help="Mostrar cada semana")
+    args = parser.parse_args(argv)
+
+    grid = build_grid(args.max_arrival, args.min_departure, args.threshold, args.day_pairs or [tuple(DAY_PAIRS)])
+    results = run_whatif(grid, args.store, workers=args.workers)
+    print(format_table(results, BASELINE, detail=args.detail))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
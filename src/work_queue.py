@@ -0,0 +1,377 @@
+"""
+Cola de trabajos en SQLite para repartir consultas entre varios workers.
+
+Flujo:
+    1. plan_jobs + WorkQueue.enqueue: una fila por (origen, destino, fecha)
+    2. run_worker (uno o varios procesos/maquinas): reclaman trabajos con
+       lease, consultan la API y guardan las ofertas en la propia cola
+    3. reduce_run: junta las ofertas en un OfferIndex para construir los
+       RouteResult y el mensaje sin llamadas extra
+
+Si un worker muere, su lease caduca y otro worker retoma el trabajo. Un
+trabajo que falla no se reintenta hasta pasado QUEUE_RETRY_SECONDS (el doble
+en cada intento), para no gastar los intentos mientras Amadeus esta caido.
+
+Solo se reparten consultas de solo ida: el reduce usa siempre el plan "oneway"
+aunque QUERY_PLAN pida ida y vuelta.
+"""
+
+import json
+import logging
+import multiprocessing
+import os
+import socket
+import sqlite3
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Callable, Iterable, Optional
+
+from config.settings import (
+    DAY_PAIRS,
+    QUEUE_LEASE_SECONDS,
+    QUEUE_MAX_ATTEMPTS,
+    QUEUE_POLL_SECONDS,
+    QUEUE_RETRY_SECONDS,
+)
+from src.amadeus_client import FlightOption
+from src.offer_index import OfferIndex, OfferKey
+from src.replay import ReplayClient
+from src.search import FlightSearcher
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+LEASED = "leased"
+DONE = "done"
+FAILED = "failed"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    run_id TEXT NOT NULL,
+    origin TEXT NOT NULL,
+    destination TEXT NOT NULL,
+    flight_date TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    lease_owner TEXT,
+    lease_expires REAL,
+    offers TEXT,
+    stale_since TEXT,
+    not_before REAL,
+    error TEXT,
+    UNIQUE (run_id, origin, destination, flight_date)
+);
+CREATE INDEX IF NOT EXISTS jobs_claim ON jobs (run_id, status, lease_expires);
+"""
+
+
+@dataclass(frozen=True)
+class Job:
+    """Consulta reclamada por un worker."""
+    id: int
+    run_id: str
+    origin: str
+    destination: str
+    flight_date: date
+    attempts: int
+    owner: str
+
+
+def plan_jobs(
+    routes: Iterable[tuple[str, str]],
+    week_start: date,
+    day_pairs: Optional[list[tuple[int, int]]] = None,
+) -> list[OfferKey]:
+    """Consultas (ida y vuelta) necesarias para buscar las rutas una semana."""
+    jobs: list[OfferKey] = []
+    for origin, destination in routes:
+        for day_out, day_ret in day_pairs or DAY_PAIRS:
+            for key in (
+                (origin, destination, week_start + timedelta(days=day_out)),
+                (destination, origin, week_start + timedelta(days=day_ret)),
+            ):
+                if key not in jobs:
+                    jobs.append(key)
+    return jobs
+
+
+class WorkQueue:
+    """
+    Cola de consultas en un archivo SQLite compartido.
+
+    Cada proceso abre su propia conexion. El reclamo de un trabajo es una
+    transaccion IMMEDIATE, asi dos workers nunca se llevan el mismo trabajo
+    mientras su lease siga vigente.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        lease_seconds: float = QUEUE_LEASE_SECONDS,
+        max_attempts: int = QUEUE_MAX_ATTEMPTS,
+        retry_seconds: float = QUEUE_RETRY_SECONDS,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retry_seconds = retry_seconds
+        self.clock = clock
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(SCHEMA)
+        # Colas creadas antes de guardar stale_since / not_before
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(jobs)")}
+        for column, kind in (("stale_since", "TEXT"), ("not_before", "REAL")):
+            if column in columns:
+                continue
+            try:
+                self._db.execute(f"ALTER TABLE jobs ADD COLUMN {column} {kind}")
+            except sqlite3.OperationalError:
+                pass  # Otro worker la ha añadido a la vez
+
+    def close(self) -> None:
+        self._db.close()
+
+    def enqueue(self, run_id: str, jobs: Iterable[OfferKey]) -> int:
+        """Añade consultas a la ejecucion (las repetidas se ignoran). Devuelve las nuevas."""
+        rows = [(run_id, o, d, day.isoformat()) for o, d, day in jobs]
+        before = self._db.total_changes
+        self._db.execute("BEGIN")
+        self._db.executemany(
+            "INSERT OR IGNORE INTO jobs (run_id, origin, destination, flight_date) VALUES (?, ?, ?, ?)",
+            rows,
+        )
+        self._db.execute("COMMIT")
+        added = self._db.total_changes - before
+        logger.info(f"Cola {run_id}: {added} consultas nuevas ({len(rows) - added} ya estaban)")
+        return added
+
+    def claim(self, run_id: str, owner: str) -> Optional[Job]:
+        """Reclama un trabajo pendiente (pasada su espera) o con lease caducado, o None si no hay."""
+        now = self.clock()
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            row = self._db.execute(
+                """
+                SELECT id, origin, destination, flight_date, attempts FROM jobs
+                WHERE run_id = ? AND (
+                    (status = ? AND (not_before IS NULL OR not_before <= ?))
+                    OR (status = ? AND lease_expires < ?)
+                )
+                ORDER BY id LIMIT 1
+                """,
+                (run_id, PENDING, now, LEASED, now),
+            ).fetchone()
+            if row is None:
+                self._db.execute("COMMIT")
+                return None
+
+            job_id, origin, destination, flight_date, attempts = row
+            if attempts >= self.max_attempts:
+                # Lease caducado en el ultimo intento: el worker murio con este trabajo
+                self._db.execute(
+                    "UPDATE jobs SET status = ?, error = ?, lease_owner = NULL WHERE id = ?",
+                    (FAILED, "lease caducado", job_id),
+                )
+                self._db.execute("COMMIT")
+                return self.claim(run_id, owner)
+
+            self._db.execute(
+                "UPDATE jobs SET status = ?, lease_owner = ?, lease_expires = ?, attempts = ? WHERE id = ?",
+                (LEASED, owner, now + self.lease_seconds, attempts + 1, job_id),
+            )
+            self._db.execute("COMMIT")
+        except Exception:
+            self._db.execute("ROLLBACK")
+            raise
+
+        return Job(
+            id=job_id,
+            run_id=run_id,
+            origin=origin,
+            destination=destination,
+            flight_date=date.fromisoformat(flight_date),
+            attempts=attempts + 1,
+            owner=owner,
+        )
+
+    def complete(self, job: Job, options: list[FlightOption]) -> bool:
+        """
+        Guarda las ofertas. False si el lease ya no es de este worker (otro lo retomo).
+
+        Si vienen de cache obsoleta (Amadeus caido) se guarda tambien desde
+        cuando, para que el reduce las siga marcando como obsoletas.
+        """
+        stale_since = min((o.stale_since for o in options if o.stale_since), default=None)
+        cursor = self._db.execute(
+            "UPDATE jobs SET status = ?, offers = ?, stale_since = ?, error = NULL, lease_owner = NULL "
+            "WHERE id = ? AND status = ? AND lease_owner = ?",
+            (
+                DONE,
+                json.dumps([o.to_dict() for o in options]),
+                stale_since.isoformat() if stale_since else None,
+                job.id, LEASED, job.owner,
+            ),
+        )
+        return cursor.rowcount == 1
+
+    def fail(self, job: Job, error: str) -> None:
+        """
+        Devuelve el trabajo a la cola, o lo da por fallido si no quedan intentos.
+
+        No se puede reclamar de nuevo hasta pasados retry_seconds, el doble
+        en cada intento (30s, 60s, ...).
+        """
+        status = FAILED if job.attempts >= self.max_attempts else PENDING
+        not_before = self.clock() + self.retry_seconds * 2 ** (job.attempts - 1)
+        self._db.execute(
+            "UPDATE jobs SET status = ?, error = ?, not_before = ?, lease_owner = NULL "
+            "WHERE id = ? AND status = ? AND lease_owner = ?",
+            (status, error, not_before, job.id, LEASED, job.owner),
+        )
+
+    def progress(self, run_id: str) -> dict[str, int]:
+        """Numero de trabajos por estado."""
+        rows = self._db.execute(
+            "SELECT status, COUNT(*) FROM jobs WHERE run_id = ? GROUP BY status", (run_id,),
+        ).fetchall()
+        return {status: count for status, count in rows}
+
+    def first_date(self, run_id: str) -> Optional[date]:
+        """Primera fecha consultada en la ejecucion."""
+        row = self._db.execute("SELECT MIN(flight_date) FROM jobs WHERE run_id = ?", (run_id,)).fetchone()
+        return date.fromisoformat(row[0]) if row[0] else None
+
+    def offer_index(self, run_id: str) -> OfferIndex:
+        """Ofertas de los trabajos terminados."""
+        index = OfferIndex()
+        rows = self._db.execute(
+            "SELECT origin, destination, flight_date, offers, stale_since FROM jobs WHERE run_id = ? AND status = ?",
+            (run_id, DONE),
+        )
+        for origin, destination, flight_date, offers, stale_since in rows:
+            options = [FlightOption.from_dict(o) for o in json.loads(offers)]
+            if stale_since:
+                for option in options:
+                    option.stale_since = datetime.fromisoformat(stale_since)
+            index.add(origin, destination, date.fromisoformat(flight_date), options)
+        return index
+
+    def failed_keys(self, run_id: str) -> set[OfferKey]:
+        """Consultas sin datos (fallidas o aun sin terminar)."""
+        rows = self._db.execute(
+            "SELECT origin, destination, flight_date FROM jobs WHERE run_id = ? AND status != ?",
+            (run_id, DONE),
+        )
+        return {(o, d, date.fromisoformat(day)) for o, d, day in rows}
+
+
+def run_worker(
+    queue: WorkQueue,
+    client,
+    run_id: str,
+    owner: Optional[str] = None,
+    poll_seconds: float = QUEUE_POLL_SECONDS,
+) -> int:
+    """
+    Procesa trabajos hasta que no quede ninguno pendiente ni en curso.
+
+    Args:
+        queue: Cola (conexion propia de este worker)
+        client: Cliente con search_flights (AmadeusClient o sustituto)
+        run_id: Ejecucion a procesar
+        owner: Identificador del worker (por defecto host:pid)
+        poll_seconds: Espera cuando otros workers tienen trabajos en curso
+            o los pendientes esperan para reintentarse
+
+    Returns:
+        Trabajos completados por este worker
+    """
+    owner = owner or f"{socket.gethostname()}:{os.getpid()}"
+    done = 0
+    while True:
+        job = queue.claim(run_id, owner)
+        if job is None:
+            # Puede que otro worker muera y su trabajo vuelva a estar disponible,
+            # o que un trabajo fallido cumpla su espera
+            progress = queue.progress(run_id)
+            if progress.get(LEASED, 0) == 0 and progress.get(PENDING, 0) == 0:
+                break
+            time.sleep(poll_seconds)
+            continue
+
+        try:
+            options = client.search_flights(job.origin, job.destination, job.flight_date.isoformat())
+        except Exception as e:
+            logger.warning(f"{owner}: fallo {job.origin}->{job.destination} {job.flight_date}: {e}")
+            queue.fail(job, str(e))
+            continue
+
+        if queue.complete(job, options):
+            done += 1
+        else:
+            logger.warning(f"{owner}: lease perdido para {job.origin}->{job.destination} {job.flight_date}")
+
+    logger.info(f"{owner}: {done} consultas completadas")
+    return done
+
+
+def _worker_process(queue_path: Path, run_id: str, client_factory: Callable[[], object]) -> int:
+    queue = WorkQueue(queue_path)
+    try:
+        return run_worker(queue, client_factory(), run_id)
+    finally:
+        queue.close()
+
+
+def run_workers(
+    queue_path: Path,
+    run_id: str,
+    workers: int,
+    client_factory: Callable[[], object],
+) -> int:
+    """
+    Lanza varios procesos worker en esta maquina y espera a que terminen.
+
+    Args:
+        client_factory: Crea el cliente en cada proceso (debe poder importarse, ej: AmadeusClient)
+
+    Returns:
+        Consultas completadas entre todos
+    """
+    if workers <= 1:
+        return _worker_process(queue_path, run_id, client_factory)
+    with multiprocessing.Pool(workers) as pool:
+        counts = pool.starmap(_worker_process, [(queue_path, run_id, client_factory)] * workers)
+    return sum(counts)
+
+
+def reduce_run(queue: WorkQueue, run_id: str) -> tuple[FlightSearcher, date]:
+    """
+    Buscador que responde con las ofertas de la cola, sin llamadas a la API.
+
+    Las consultas que no terminaron quedan marcadas como sin datos, asi el
+    mensaje muestra "Amadeus no responde" en vez de "Sin opciones".
+
+    Returns:
+        (buscador, lunes de la semana de la ejecucion)
+
+    Raises:
+        ValueError: Si la ejecucion no tiene trabajos
+    """
+    progress = queue.progress(run_id)
+    if not progress:
+        raise ValueError(f"La cola no tiene trabajos para {run_id}")
+    if progress.get(PENDING) or progress.get(LEASED):
+        logger.warning(f"Cola {run_id} sin terminar: {progress}")
+
+    first_date = queue.first_date(run_id)
+    # La cola solo tiene consultas de solo ida (ver plan_jobs)
+    searcher = FlightSearcher(client=ReplayClient(queue.offer_index(run_id)), query_plan="oneway")
+    searcher.unavailable = queue.failed_keys(run_id)
+    return searcher, first_date - timedelta(days=first_date.weekday())
@@ -1,8 +1,13 @@
 """Tests for Amadeus client."""
 
 from datetime import datetime
+from unittest.mock import Mock, patch
 
-from src.amadeus_client import FlightOption, CARRIER_NAMES
+import pytest
+
+from src.amadeus_client import AmadeusClient, AmadeusUnavailableError, FlightOption, CARRIER_NAMES, split_price
+from src.cache import PersistentCache
+from src.circuit_breaker import CircuitBreaker
 
 
 class TestFlightOption:
@@ -46,3 +51,69 @@ class TestCarrierNames:
         # Train carriers should be removed
         assert "RENFE" not in CARRIER_NAMES
         assert "2C" not in CARRIER_NAMES
+
+
+def round_trip_offer(total):
+    def itinerary(origin, destination, day, hour):
+        return {"segments": [{
+            "carrierCode": "VY",
+            "number": "1001",
+            "departure": {"iataCode": origin, "at": f"2026-01-{day}T{hour:02d}:00:00"},
+            "arrival": {"iataCode": destination, "at": f"2026-01-{day}T{hour + 1:02d}:15:00"},
+        }]}
+    return {
+        "price": {"total": total},
+        "itineraries": [itinerary("MAD", "BCN", 26, 7), itinerary("BCN", "MAD", 27, 18)],
+    }
+
+
+class TestRoundTrips:
+    def make_client(self, tmp_path):
+        with patch("src.amadeus_client.AMADEUS_API_KEY", "key"), \
+                patch("src.amadeus_client.AMADEUS_API_SECRET", "secret"), \
+                patch("src.amadeus_client.Client"):
+            client = AmadeusClient(
+                cache=PersistentCache(tmp_path / "cache.json"),
+                breaker=CircuitBreaker(failure_threshold=1, reset_timeout=60),
+            )
+        client.client = Mock()
+        return client
+
+    def test_split_price_adds_up(self):
+        outbound, return_price = split_price(89.99)
+
+        assert outbound + return_price == pytest.approx(89.99)
+        assert abs(outbound - return_price) <= 0.01
+        assert split_price(80.0) == (40.0, 40.0)
+
+    def test_both_itineraries_are_parsed(self, tmp_path):
+        client = self.make_client(tmp_path)
+        api = client.client.shopping.flight_offers_search.get
+        api.return_value = Mock(data=[round_trip_offer("95.00"), round_trip_offer("80.00")])
+
+        offers = client.search_round_trips("MAD", "BCN", "2026-01-26", "2026-01-27")
+
+        assert api.call_args.kwargs["returnDate"] == "2026-01-27"
+        assert [o.price for o in offers] == [80.0, 95.0]
+        assert offers[0].outbound.origin == "MAD"
+        assert offers[0].return_flight.departure_time == datetime(2026, 1, 27, 18, 0)
+        assert offers[0].outbound.price + offers[0].return_flight.price == 80.0
+
+    def test_failure_serves_cached_round_trips_as_stale(self, tmp_path):
+        client = self.make_client(tmp_path)
+        api = client.client.shopping.flight_offers_search.get
+        api.return_value = Mock(data=[round_trip_offer("80.00")])
+        client.search_round_trips("MAD", "BCN", "2026-01-26", "2026-01-27")
+
+        api.side_effect = RuntimeError("timeout")
+        stale = client.search_round_trips("MAD", "BCN", "2026-01-26", "2026-01-27")
+
+        assert stale[0].price == 80.0
+        assert stale[0].outbound.stale_since is not None
+
+    def test_failure_without_cache_raises(self, tmp_path):
+        client = self.make_client(tmp_path)
+        client.client.shopping.flight_offers_search.get.side_effect = RuntimeError("timeout")
+
+        with pytest.raises(AmadeusUnavailableError):
+            client.search_round_trips("MAD", "BCN", "2026-01-26", "2026-01-27")
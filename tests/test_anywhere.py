@@ -0,0 +1,75 @@
+"""Tests for destination-flexible (anywhere) mode."""
+
+from datetime import date, datetime
+from unittest.mock import Mock
+
+from src.amadeus_client import DestinationQuote, FlightOption
+from src.anywhere import rank_destinations, search_anywhere
+from src.formatter import format_anywhere_message
+from src.search import FlightSearcher
+
+WEEK_START = date(2026, 1, 26)  # Monday
+
+
+def quote(origin, destination, out_day, ret_day, price):
+    return DestinationQuote(
+        origin=origin,
+        destination=destination,
+        departure_date=date(2026, 1, 26 + out_day),
+        return_date=date(2026, 1, 26 + ret_day),
+        price=price,
+    )
+
+
+def fake_flights(origin, destination, search_date, **kwargs):
+    day = date.fromisoformat(search_date)
+    hour = 7 if origin in ("MAD", "OVD") else 18
+    return [FlightOption(
+        origin=origin,
+        destination=destination,
+        departure_time=datetime(day.year, day.month, day.day, hour, 0),
+        arrival_time=datetime(day.year, day.month, day.day, hour + 1, 15),
+        price=30.0,
+        carrier_code="VY",
+        carrier_name="Vueling",
+        flight_number="1234",
+    )]
+
+
+class TestRankDestinations:
+    def test_keeps_only_configured_day_pairs(self):
+        client = Mock()
+        client.search_destinations.return_value = [
+            quote("MAD", "PAR", 0, 3, 20.0),  # No es un par configurado
+            quote("MAD", "PAR", 0, 1, 60.0),
+            quote("MAD", "LIS", 1, 2, 40.0),
+        ]
+
+        ranked = rank_destinations(client, ["MAD"], WEEK_START, day_pairs=[(0, 1), (1, 2)])
+
+        assert [(q.destination, q.price) for q in ranked] == [("LIS", 40.0), ("PAR", 60.0)]
+        client.search_destinations.assert_called_once_with("MAD", "2026-01-26,2026-01-27", "1")
+
+
+class TestSearchAnywhere:
+    def test_full_search_only_for_top_candidates(self):
+        client = Mock()
+        client.search_destinations.return_value = [
+            quote("MAD", "LIS", 0, 1, 40.0),
+            quote("MAD", "PAR", 0, 1, 50.0),
+            quote("MAD", "ROM", 0, 1, 90.0),
+        ]
+        client.search_flights.side_effect = fake_flights
+        searcher = FlightSearcher(client=client, day_pairs=[(0, 1)])
+
+        candidates, results = search_anywhere(searcher, ["MAD"], WEEK_START, top_n=2)
+
+        assert [c.destination for c in candidates] == ["LIS", "PAR"]
+        searched = {call.kwargs["destination"] for call in client.search_flights.call_args_list}
+        assert "ROM" not in searched
+        assert client.search_flights.call_count == 4  # 2 destinos x (ida + vuelta)
+        assert all(r.best_combo.total_price == 60.0 for r in results)
+
+        message = format_anywhere_message(candidates, results)
+        assert "DESTINOS" in message
+        assert "desde 40€" in message
@@ -0,0 +1,113 @@
+"""Tests for the local read-only HTTP API."""
+
+import json
+import threading
+import urllib.error
+import urllib.request
+from datetime import date, datetime
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+from src.amadeus_client import FlightOption
+from src.api import ResultsStore, make_handler
+from src.offer_index import OfferIndex
+from src.offer_store import save_offers
+from src.price_history import PriceHistory
+
+MONDAY = date(2026, 1, 26)
+
+
+def make_flight(origin, dest, day, hour, price):
+    return FlightOption(
+        origin=origin,
+        destination=dest,
+        departure_time=datetime(2026, 1, day, hour, 0),
+        arrival_time=datetime(2026, 1, day, hour + 1, 15),
+        price=price,
+        carrier_code="VY",
+        carrier_name="Vueling",
+        flight_number="1234",
+    )
+
+
+def save_run(store_dir, search_date, price):
+    index = OfferIndex()
+    index.add("MAD", "BCN", MONDAY, [make_flight("MAD", "BCN", 26, 7, price), make_flight("MAD", "BCN", 26, 12, 20.0)])
+    index.add("BCN", "MAD", date(2026, 1, 27), [make_flight("BCN", "MAD", 27, 18, 35.0)])
+    save_offers(index, search_date, MONDAY, store_dir)
+
+
+@pytest.fixture
+def store(tmp_path):
+    save_run(tmp_path / "offers", date(2026, 1, 12), 40.0)
+    history = PriceHistory()
+    history.record("MAD", "BCN", MONDAY, 50.0, as_of=date(2026, 1, 12))
+    history.save(tmp_path / "history.json")
+    return ResultsStore(offers_dir=tmp_path / "offers", history_file=tmp_path / "history.json")
+
+
+class TestResultsStore:
+    def test_combos_and_minimums(self, store):
+        combos = json.loads(store.get("/combos").body)
+        minimums = json.loads(store.get("/minimums").body)
+
+        mad = combos["routes"][0]
+        assert combos["week_start"] == "2026-01-26"
+        assert mad["best_combo"]["total_price"] == 75.0
+        assert (mad["api_unavailable"], mad["stale_since"]) == (False, None)
+        assert {"date": "2026-01-26", "price": 20.0}.items() <= minimums["minimums"][1].items()
+
+    def test_history_by_route(self, store):
+        history = json.loads(store.get("/history/MAD-BCN").body)["history"]
+
+        assert history == [{"route": "MAD-BCN", "weekday": 0, "days_before": 14,
+                            "count": 1, "median": 50.0, "p25": 50.0, "p75": 50.0}]
+
+    def test_responses_are_reused_until_a_new_run_lands(self, store, tmp_path):
+        first = store.get("/combos")
+        store.get("/minimums")
+        assert store.builds == 1
+        first_index = store._index
+
+        save_run(tmp_path / "offers", date(2026, 1, 13), 30.0)
+        second = store.get("/combos")
+
+        assert store.builds == 2
+        assert second.etag != first.etag
+        assert json.loads(second.body)["routes"][0]["best_combo"]["total_price"] == 65.0
+        assert first_index.snapshot._mmap.closed
+        store.close()
+        assert store._index is None
+
+    def test_no_runs_yet(self, tmp_path):
+        store = ResultsStore(offers_dir=tmp_path / "offers", history_file=tmp_path / "history.json")
+
+        assert json.loads(store.get("/combos").body) == {"search_date": None, "week_start": None, "routes": []}
+        assert store.get("/unknown") is None
+
+
+class TestHttpServer:
+    def test_etag_round_trip(self, store):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(store))
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        url = f"http://127.0.0.1:{server.server_address[1]}"
+        try:
+            with urllib.request.urlopen(f"{url}/combos") as response:
+                etag = response.headers["ETag"]
+                assert response.status == 200
+                assert json.loads(response.read())["routes"]
+
+            request = urllib.request.Request(f"{url}/combos", headers={"If-None-Match": etag})
+            with pytest.raises(urllib.error.HTTPError) as not_modified:
+                urllib.request.urlopen(request)
+            assert not_modified.value.code == 304
+
+            with pytest.raises(urllib.error.HTTPError) as missing:
+                urllib.request.urlopen(f"{url}/nope")
+            assert missing.value.code == 404
+        finally:
+            server.shutdown()
+            server.server_close()
+        assert store.builds == 1
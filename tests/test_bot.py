@@ -0,0 +1,222 @@
+"""Tests for the interactive Telegram bot."""
+
+import threading
+from datetime import date, datetime, timedelta
+from unittest.mock import Mock, patch
+
+from src.amadeus_client import AmadeusClient, FlightOption
+from src.bot import BotQuery, FlightBot, SharedOffers, parse_command
+from src.offer_index import OfferIndex
+from src.cache import PersistentCache
+from src.offer_store import StoredRun
+
+TODAY = date(2026, 1, 14)  # Wednesday
+
+
+def fake_flights(origin, destination, search_date, **kwargs):
+    day = date.fromisoformat(search_date)
+    hour = 7 if origin in ("MAD", "OVD") else 18
+    return [FlightOption(
+        origin=origin,
+        destination=destination,
+        departure_time=datetime(day.year, day.month, day.day, hour, 0),
+        arrival_time=datetime(day.year, day.month, day.day, hour + 1, 15),
+        price=30.0,
+        carrier_code="VY",
+        carrier_name="Vueling",
+        flight_number="1234",
+    )]
+
+
+class TestParseCommand:
+    def test_route_with_weekday(self):
+        query = parse_command("/mad jueves", TODAY)
+
+        assert query == BotQuery(routes=(("MAD", "BCN"),), week_start=date(2026, 1, 26), weekday=3)
+
+    def test_week_offset(self):
+        query = parse_command("/semana 3", TODAY)
+
+        assert query.routes == (("MAD", "BCN"), ("OVD", "BCN"))
+        assert query.week_start == date(2026, 2, 2)
+
+    def test_group_mention_and_accents(self):
+        assert parse_command("/ovd@bcn_bot miércoles 1", TODAY).weekday == 2
+
+    def test_invalid_commands(self):
+        assert parse_command("hola", TODAY) is None
+        assert parse_command("/bcn", TODAY) is None
+        assert parse_command("/semana", TODAY) is None
+        assert parse_command("/semana 99", TODAY) is None
+        assert parse_command("/semana 0", TODAY) is None
+        assert parse_command("/mad 0", TODAY) is None
+        assert parse_command("/mad mañana", TODAY) is None
+
+
+class TestSharedOffers:
+    def test_concurrent_misses_make_one_call(self):
+        release = threading.Event()
+        client = Mock()
+
+        def slow_search(origin, destination, search_date, **kwargs):
+            release.wait(timeout=5)
+            return fake_flights(origin, destination, search_date)
+
+        client.search_flights.side_effect = slow_search
+        offers = SharedOffers(client, min_interval=0)
+        answers = []
+
+        def ask():
+            answers.append(offers.search_flights("MAD", "BCN", "2026-01-26"))
+
+        threads = [threading.Thread(target=ask) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        release.set()
+        for thread in threads:
+            thread.join(timeout=5)
+
+        assert client.search_flights.call_count == 1
+        assert len(answers) == 5
+        assert all(a[0].price == 30.0 for a in answers)
+
+    def test_expired_offers_are_fetched_again(self):
+        now = [datetime(2026, 1, 14, 9, 0)]
+        client = Mock()
+        client.search_flights.side_effect = fake_flights
+        offers = SharedOffers(client, max_age=timedelta(hours=6), min_interval=0, now=lambda: now[0])
+
+        offers.search_flights("MAD", "BCN", "2026-01-26")
+        offers.search_flights("MAD", "BCN", "2026-01-26")
+        assert client.search_flights.call_count == 1
+
+        now[0] += timedelta(hours=7)
+        offers.search_flights("MAD", "BCN", "2026-01-26")
+        assert client.search_flights.call_count == 2
+
+    def test_warm_start_answers_without_client(self):
+        index = OfferIndex()
+        index.add("MAD", "BCN", date(2026, 1, 26), fake_flights("MAD", "BCN", "2026-01-26"))
+        client = Mock()
+        offers = SharedOffers(client, now=lambda: datetime(2026, 1, 14, 3, 0))
+
+        offers.warm(StoredRun(search_date=date(2026, 1, 14), week_start=date(2026, 1, 26), index=index))
+
+        assert offers.search_flights("MAD", "BCN", "2026-01-26")[0].price == 30.0
+        client.search_flights.assert_not_called()
+
+    def test_warm_offers_age_from_when_the_run_was_saved(self):
+        index = OfferIndex()
+        index.add("MAD", "BCN", date(2026, 1, 26), fake_flights("MAD", "BCN", "2026-01-26"))
+        client = Mock()
+        client.search_flights.side_effect = fake_flights
+        now = [datetime(2026, 1, 14, 12, 0)]
+        offers = SharedOffers(client, max_age=timedelta(hours=6), min_interval=0, now=lambda: now[0])
+
+        offers.warm(StoredRun(
+            search_date=date(2026, 1, 14), week_start=date(2026, 1, 26), index=index,
+            saved_at=datetime(2026, 1, 14, 8, 0),
+        ))
+        offers.search_flights("MAD", "BCN", "2026-01-26")
+        client.search_flights.assert_not_called()
+
+        now[0] = datetime(2026, 1, 14, 15, 0)
+        offers.search_flights("MAD", "BCN", "2026-01-26")
+        client.search_flights.assert_called_once()
+
+    def test_cached_answers_are_not_throttled(self, tmp_path):
+        with patch("src.amadeus_client.AMADEUS_API_KEY", "key"), \
+                patch("src.amadeus_client.AMADEUS_API_SECRET", "secret"), \
+                patch("src.amadeus_client.Client"):
+            client = AmadeusClient(cache=PersistentCache(tmp_path / "cache.json"), max_cache_age=timedelta(hours=6))
+        client.client = Mock()
+        client.client.shopping.flight_offers_search.get.return_value = Mock(data=[])
+        for day in ("2099-01-26", "2099-01-27"):
+            client.cache.set(f"offers|MAD|BCN|{day}", [o.to_dict() for o in fake_flights("MAD", "BCN", day)])
+        sleep = Mock()
+        offers = SharedOffers(client, min_interval=10, sleep=sleep)
+
+        offers.search_flights("MAD", "BCN", "2099-01-26")
+        offers.search_flights("MAD", "BCN", "2099-01-27")
+        assert (offers.calls, sleep.call_count) == (0, 0)
+
+        offers.search_flights("MAD", "BCN", "2099-01-28")
+        offers.search_flights("MAD", "BCN", "2099-01-29")
+        assert (offers.calls, sleep.call_count) == (2, 1)
+
+    def test_calls_are_spaced(self):
+        client = Mock()
+        client.search_flights.side_effect = fake_flights
+        sleep = Mock()
+        offers = SharedOffers(client, min_interval=10, sleep=sleep)
+
+        offers.search_flights("MAD", "BCN", "2026-01-26")
+        offers.search_flights("MAD", "BCN", "2026-01-27")
+
+        assert sleep.call_count == 1
+
+
+class TestFlightBot:
+    def make_bot(self):
+        client = Mock()
+        client.search_flights.side_effect = fake_flights
+        telegram = Mock()
+        telegram.send_message.return_value = True
+        offers = SharedOffers(client, min_interval=0)
+        bot = FlightBot(telegram, offers, allowed_chats=["42"], today=lambda: TODAY)
+        return bot, telegram, client
+
+    def test_route_answer_only_searches_requested_day(self):
+        bot, _, client = self.make_bot()
+
+        message = bot.answer("/mad jueves")
+
+        assert "MADRID" in message
+        assert "60€" in message
+        searched = {call.args[2] for call in client.search_flights.call_args_list}
+        assert searched == {"2026-01-29", "2026-01-30"}
+
+    def test_unknown_command_shows_help(self):
+        bot, _, _ = self.make_bot()
+
+        assert "/semana N" in bot.answer("/precio")
+
+    def test_unknown_command_is_escaped(self):
+        bot, _, _ = self.make_bot()
+
+        message = bot.answer("/precio <b>&")
+
+        assert "/precio &lt;b&gt;&amp;" in message
+        assert "<b>" not in message
+
+    def test_replies_only_to_allowed_chats(self):
+        bot, telegram, _ = self.make_bot()
+
+        assert bot.handle_update({"update_id": 1, "message": {"text": "/ayuda", "chat": {"id": 42}}})
+        assert not bot.handle_update({"update_id": 2, "message": {"text": "/ayuda", "chat": {"id": 7}}})
+        telegram.send_message.assert_called_once()
+        assert telegram.send_message.call_args.kwargs["chat_id"] == "42"
+
+    def test_poll_advances_offset(self):
+        bot, telegram, _ = self.make_bot()
+        telegram.get_updates.return_value = [
+            {"update_id": 10, "message": {"text": "/ayuda", "chat": {"id": 42}}},
+            {"update_id": 11, "message": {"text": "/ayuda", "chat": {"id": 42}}},
+        ]
+
+        assert bot.poll_once() == 12
+        assert telegram.send_message.call_count == 2
+
+    def test_poll_backs_off_while_telegram_fails(self):
+        bot, telegram, _ = self.make_bot()
+        bot.sleep = Mock()
+        telegram.get_updates.return_value = None
+
+        assert bot.poll_once(offset=5) == 5
+        bot.poll_once(offset=5)
+        telegram.get_updates.return_value = []
+        bot.poll_once(offset=5)
+        telegram.get_updates.return_value = None
+        bot.poll_once(offset=5)
+
+        assert [call.args[0] for call in bot.sleep.call_args_list] == [5, 10, 5]
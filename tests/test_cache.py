@@ -0,0 +1,53 @@
+"""Tests for the persistent JSON cache."""
+
+import multiprocessing
+
+from src.cache import PersistentCache
+
+
+def fill_cache(path, worker):
+    cache = PersistentCache(path)
+    for i in range(20):
+        cache.set(f"{worker}|{i}", i)
+
+
+class TestPersistentCache:
+    def test_set_keeps_keys_written_by_another_instance(self, tmp_path):
+        path = tmp_path / "cache.json"
+        first = PersistentCache(path)
+        second = PersistentCache(path)
+        assert first.get("a") is None  # Carga el archivo (vacio)
+
+        second.set("b", 2)
+        first.set("a", 1)
+
+        reloaded = PersistentCache(path)
+        assert reloaded.get("a").value == 1
+        assert reloaded.get("b").value == 2
+        assert first.get("b").value == 2
+
+    def test_concurrent_processes_do_not_lose_keys(self, tmp_path):
+        path = tmp_path / "cache.json"
+        processes = [multiprocessing.Process(target=fill_cache, args=(path, w)) for w in range(4)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join(timeout=30)
+
+        cache = PersistentCache(path)
+        assert all(cache.get(f"{w}|{i}") for w in range(4) for i in range(20))
+
+    def test_past_flight_dates_are_pruned(self, tmp_path):
+        path = tmp_path / "cache.json"
+        cache = PersistentCache(path)
+        cache.set("offers|MAD|BCN|2020-01-06", [])
+        cache.set("roundtrip|MAD|BCN|2020-01-06|2099-01-10", [])
+        cache.set("offers|MAD|BCN|2099-01-06", [])
+        cache.set("airline|VY", "Vueling")
+
+        reloaded = PersistentCache(path)
+        assert reloaded.get("offers|MAD|BCN|2020-01-06") is None
+        assert reloaded.get("roundtrip|MAD|BCN|2020-01-06|2099-01-10") is not None
+        assert reloaded.get("offers|MAD|BCN|2099-01-06") is not None
+        assert reloaded.get("airline|VY").value == "Vueling"
+        assert "2020-01-06\"" not in path.read_text()
@@ -0,0 +1,146 @@
+"""Tests for run checkpoints (--resume)."""
+
+from datetime import date, datetime
+from unittest.mock import Mock
+
+from src.amadeus_client import FlightOption, RoundTripOffer
+from src.checkpoint import RunCheckpoint
+from src.search import FlightSearcher
+
+MONDAY = date(2026, 1, 26)
+
+
+def fake_flights(origin, destination, search_date, **kwargs):
+    day = date.fromisoformat(search_date)
+    hour = 7 if origin in ("MAD", "OVD") else 18
+    return [FlightOption(
+        origin=origin,
+        destination=destination,
+        departure_time=datetime(day.year, day.month, day.day, hour, 0),
+        arrival_time=datetime(day.year, day.month, day.day, hour + 1, 15),
+        price=30.0,
+        carrier_code="VY",
+        carrier_name="Vueling",
+        flight_number="1234",
+    )]
+
+
+class TestRunCheckpoint:
+    def test_queries_and_messages_survive_reload(self, tmp_path):
+        checkpoint = RunCheckpoint.open(tmp_path, "2026-01-26", MONDAY)
+        options = fake_flights("MAD", "BCN", "2026-01-26")
+        checkpoint.record_query("MAD", "BCN", MONDAY, options)
+        checkpoint.record_message("hola")
+        checkpoint.record_message("adios")
+        checkpoint.mark_sent("hola")
+
+        loaded = RunCheckpoint.open(tmp_path, "2026-01-26", MONDAY, resume=True)
+
+        assert loaded.queries.get("MAD", "BCN", MONDAY) == options
+        assert loaded.pending_messages() == ["adios"]
+        assert loaded.stored is False
+
+    def test_without_resume_starts_from_scratch(self, tmp_path):
+        checkpoint = RunCheckpoint.open(tmp_path, "run", MONDAY)
+        checkpoint.record_query("MAD", "BCN", MONDAY, fake_flights("MAD", "BCN", "2026-01-26"))
+
+        fresh = RunCheckpoint.open(tmp_path, "run", MONDAY)
+
+        assert len(fresh.queries) == 0
+        assert len(RunCheckpoint.load(fresh.path).queries) == 0
+
+    def test_other_week_is_not_reused(self, tmp_path):
+        checkpoint = RunCheckpoint.open(tmp_path, "run", MONDAY)
+        checkpoint.record_query("MAD", "BCN", MONDAY, fake_flights("MAD", "BCN", "2026-01-26"))
+
+        resumed = RunCheckpoint.open(tmp_path, "run", date(2026, 2, 2), resume=True)
+
+        assert len(resumed.queries) == 0
+        assert resumed.week_start == date(2026, 2, 2)
+
+    def test_stale_answers_are_not_checkpointed(self, tmp_path):
+        checkpoint = RunCheckpoint.open(tmp_path, "run", MONDAY)
+        stale = fake_flights("MAD", "BCN", "2026-01-26")
+        stale[0].stale_since = datetime(2026, 1, 20, 10, 0)
+
+        checkpoint.record_query("MAD", "BCN", MONDAY, stale)
+
+        assert ("MAD", "BCN", MONDAY) not in RunCheckpoint.load(checkpoint.path).queries
+
+    def test_truncated_last_line_is_ignored(self, tmp_path):
+        checkpoint = RunCheckpoint.open(tmp_path, "run", MONDAY)
+        checkpoint.record_query("MAD", "BCN", MONDAY, fake_flights("MAD", "BCN", "2026-01-26"))
+        with open(checkpoint.path, "a", encoding="utf-8") as f:
+            f.write('{"event": "query", "origin": "BC')
+
+        loaded = RunCheckpoint.load(checkpoint.path)
+
+        assert len(loaded.queries) == 1
+
+    def test_round_trips_survive_reload(self, tmp_path):
+        checkpoint = RunCheckpoint.open(tmp_path, "run", MONDAY)
+        key = ("MAD", "BCN", date(2026, 1, 29), date(2026, 1, 30))
+        offers = [RoundTripOffer(
+            fake_flights("MAD", "BCN", "2026-01-29")[0], fake_flights("BCN", "MAD", "2026-01-30")[0], 55.0,
+        )]
+        checkpoint.record_round_trip(key, offers)
+
+        assert RunCheckpoint.load(checkpoint.path).round_trips == {key: offers}
+
+    def test_stored_flag(self, tmp_path):
+        checkpoint = RunCheckpoint.open(tmp_path, "run", MONDAY)
+        checkpoint.mark_stored()
+
+        assert RunCheckpoint.open(tmp_path, "run", MONDAY, resume=True).stored is True
+
+
+class TestSearcherWithCheckpoint:
+    def test_resumed_run_only_queries_missing_dates(self, tmp_path):
+        day_pairs = [(3, 4), (4, 6)]
+        first = Mock()
+        first.search_flights.side_effect = fake_flights
+        FlightSearcher(
+            client=first, day_pairs=day_pairs, checkpoint=RunCheckpoint.open(tmp_path, "run", MONDAY),
+        )._fetch("MAD", "BCN", date(2026, 1, 29))
+
+        second = Mock()
+        second.search_flights.side_effect = fake_flights
+        searcher = FlightSearcher(
+            client=second, day_pairs=day_pairs,
+            checkpoint=RunCheckpoint.open(tmp_path, "run", MONDAY, resume=True),
+        )
+        result = searcher.search_route("MAD", "BCN", MONDAY)
+
+        assert result.best_combo is not None
+        asked = {
+            (call.kwargs["origin"], call.kwargs["search_date"])
+            for call in second.search_flights.call_args_list
+        }
+        assert asked == {("MAD", "2026-01-30"), ("BCN", "2026-01-30"), ("BCN", "2026-02-01")}
+        assert len(RunCheckpoint.load(tmp_path / "run_run.jsonl").queries) == 4
+
+    def test_resumed_round_trip_plan_reuses_bundles(self, tmp_path):
+        def fake_round_trips(origin, destination, departure_date, return_date):
+            return [RoundTripOffer(
+                fake_flights(origin, destination, departure_date)[0],
+                fake_flights(destination, origin, return_date)[0],
+                50.0,
+            )]
+
+        first = Mock()
+        first.search_round_trips.side_effect = fake_round_trips
+        FlightSearcher(
+            client=first, day_pairs=[(3, 4)], query_plan="roundtrip",
+            checkpoint=RunCheckpoint.open(tmp_path, "run", MONDAY),
+        ).search_route("MAD", "BCN", MONDAY)
+
+        second = Mock()
+        searcher = FlightSearcher(
+            client=second, day_pairs=[(3, 4)], query_plan="roundtrip",
+            checkpoint=RunCheckpoint.open(tmp_path, "run", MONDAY, resume=True),
+        )
+        result = searcher.search_route("MAD", "BCN", MONDAY)
+
+        second.search_round_trips.assert_not_called()
+        assert result.best_combo.is_bundle
+        assert result.best_combo.total_price == 50.0
@@ -0,0 +1,181 @@
+"""Tests for circuit breaker and stale fallback in the Amadeus client."""
+
+from datetime import datetime, timedelta
+from unittest.mock import Mock, patch
+
+import pytest
+
+from src.amadeus_client import AmadeusClient, AmadeusUnavailableError, FlightOption
+from src.cache import PersistentCache
+from src.circuit_breaker import CircuitBreaker
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestCircuitBreaker:
+    def test_opens_after_threshold(self):
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=FakeClock())
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.CLOSED
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.OPEN
+        assert not breaker.allow_request()
+
+    def test_half_open_allows_single_trial(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=clock)
+        breaker.record_failure()
+        clock.now = 10
+
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        assert breaker.allow_request()
+        assert not breaker.allow_request()
+
+    def test_trial_success_closes_and_failure_reopens(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=clock)
+        breaker.record_failure()
+        clock.now = 10
+        breaker.allow_request()
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.OPEN
+
+        clock.now = 20
+        breaker.allow_request()
+        breaker.record_success()
+        assert breaker.state == CircuitBreaker.CLOSED
+
+
+def make_offer(hour, price):
+    return {
+        "price": {"total": str(price)},
+        "itineraries": [{"segments": [{
+            "carrierCode": "VY",
+            "number": "1001",
+            "departure": {"iataCode": "MAD", "at": f"2026-01-26T{hour:02d}:00:00"},
+            "arrival": {"iataCode": "BCN", "at": f"2026-01-26T{hour + 1:02d}:15:00"},
+        }]}],
+    }
+
+
+@pytest.fixture
+def make_client(tmp_path):
+    def factory(clock=None):
+        with patch("src.amadeus_client.AMADEUS_API_KEY", "key"), \
+                patch("src.amadeus_client.AMADEUS_API_SECRET", "secret"), \
+                patch("src.amadeus_client.Client"):
+            client = AmadeusClient(
+                cache=PersistentCache(tmp_path / "cache.json"),
+                breaker=CircuitBreaker(failure_threshold=1, reset_timeout=60, clock=clock or FakeClock()),
+            )
+        client.client = Mock()
+        return client
+    return factory
+
+
+class TestStaleFallback:
+    def test_failure_without_cache_raises(self, make_client):
+        client = make_client()
+        client.client.shopping.flight_offers_search.get.side_effect = RuntimeError("timeout")
+
+        with pytest.raises(AmadeusUnavailableError):
+            client.search_flights("MAD", "BCN", "2026-01-26")
+
+    def test_open_circuit_serves_stale_cache_without_calling(self, make_client):
+        client = make_client()
+        api = client.client.shopping.flight_offers_search.get
+        api.return_value = Mock(data=[make_offer(7, 50)])
+        fresh = client.search_flights("MAD", "BCN", "2026-01-26")
+        assert fresh[0].stale_since is None
+
+        api.side_effect = RuntimeError("timeout")
+        stale = client.search_flights("MAD", "BCN", "2026-01-26")
+        assert stale[0].price == 50.0
+        assert isinstance(stale[0].stale_since, datetime)
+
+        calls = api.call_count
+        again = client.search_flights("MAD", "BCN", "2026-01-26")
+        assert api.call_count == calls  # Circuito abierto: no se llama
+        assert again[0].stale_since is not None
+
+    def test_half_open_revalidates_in_background(self, make_client):
+        clock = FakeClock()
+        client = make_client(clock)
+        api = client.client.shopping.flight_offers_search.get
+        api.return_value = Mock(data=[make_offer(7, 50)])
+        client.search_flights("MAD", "BCN", "2026-01-26")
+        api.side_effect = RuntimeError("timeout")
+        client.search_flights("MAD", "BCN", "2026-01-26")
+
+        clock.now = 60
+        api.side_effect = None
+        api.return_value = Mock(data=[make_offer(7, 40)])
+        served = client.search_flights("MAD", "BCN", "2026-01-26")
+        client.wait_for_revalidations(timeout=5)
+
+        assert served[0].price == 50.0  # Respuesta inmediata con la cache
+        assert client.breaker.state == CircuitBreaker.CLOSED
+        assert client.search_flights("MAD", "BCN", "2026-01-26")[0].price == 40.0
+
+    def test_half_open_revalidates_round_trips(self, make_client):
+        clock = FakeClock()
+        client = make_client(clock)
+        api = client.client.shopping.flight_offers_search.get
+        round_trip = make_offer(7, 100)
+        round_trip["itineraries"].append(make_offer(18, 0)["itineraries"][0])
+        api.return_value = Mock(data=[round_trip])
+        client.search_round_trips("MAD", "BCN", "2026-01-26", "2026-01-27")
+        api.side_effect = RuntimeError("timeout")
+        client.search_round_trips("MAD", "BCN", "2026-01-26", "2026-01-27")
+
+        clock.now = 60
+        api.side_effect = None
+        round_trip["price"]["total"] = "80"
+        served = client.search_round_trips("MAD", "BCN", "2026-01-26", "2026-01-27")
+        client.wait_for_revalidations(timeout=5)
+
+        assert served[0].price == 100.0
+        assert served[0].outbound.stale_since is not None
+        assert client.breaker.state == CircuitBreaker.CLOSED
+        assert client.search_round_trips("MAD", "BCN", "2026-01-26", "2026-01-27")[0].price == 80.0
+
+    def test_half_open_revalidates_destinations(self, make_client):
+        clock = FakeClock()
+        client = make_client(clock)
+        api = client.client.shopping.flight_destinations.get
+        quote = {"origin": "MAD", "destination": "LIS", "departureDate": "2026-01-26", "price": {"total": "90"}}
+        api.return_value = Mock(data=[quote])
+        client.search_destinations("MAD", "2026-01-26", "2")
+        api.side_effect = RuntimeError("timeout")
+        client.search_destinations("MAD", "2026-01-26", "2")
+
+        clock.now = 60
+        api.side_effect = None
+        api.return_value = Mock(data=[dict(quote, price={"total": "70"})])
+        served = client.search_destinations("MAD", "2026-01-26", "2")
+        client.wait_for_revalidations(timeout=5)
+
+        assert served[0].price == 90.0
+        assert client.breaker.state == CircuitBreaker.CLOSED
+        assert client.search_destinations("MAD", "2026-01-26", "2")[0].price == 70.0
+
+
+class TestFreshCache:
+    def test_recent_cache_is_served_without_calling(self, make_client):
+        client = make_client()
+        api = client.client.shopping.flight_offers_search.get
+        api.return_value = Mock(data=[make_offer(7, 50)])
+        client.search_flights("MAD", "BCN", "2026-01-26")
+
+        client.max_cache_age = timedelta(hours=1)
+        options = client.search_flights("MAD", "BCN", "2026-01-26")
+
+        assert api.call_count == 1
+        assert options[0].price == 50.0
+        assert options[0].stale_since is None
@@ -0,0 +1,81 @@
+"""Tests for mixed-route combos."""
+
+from datetime import date, datetime, time
+
+from src.amadeus_client import FlightOption
+from src.combos import find_mixed_trips
+from src.offer_index import OfferIndex
+
+
+def make_flight(origin, dest, hour, price, flight_date):
+    return FlightOption(
+        origin=origin,
+        destination=dest,
+        departure_time=datetime(flight_date.year, flight_date.month, flight_date.day, hour, 0),
+        arrival_time=datetime(flight_date.year, flight_date.month, flight_date.day, hour + 1, 15),
+        price=price,
+        carrier_code="VY",
+        carrier_name="Vueling",
+        flight_number="1234",
+    )
+
+
+WEEK_START = date(2026, 1, 26)  # Monday
+MONDAY = date(2026, 1, 26)
+TUESDAY = date(2026, 1, 27)
+
+
+class TestOfferIndex:
+    def test_cheapest_per_date(self):
+        index = OfferIndex()
+        index.add("MAD", "BCN", MONDAY, [
+            make_flight("MAD", "BCN", 7, 60.0, MONDAY),
+            make_flight("MAD", "BCN", 8, 40.0, MONDAY),
+        ])
+        assert index.cheapest("MAD", "BCN", MONDAY).price == 40.0
+        assert index.cheapest("MAD", "BCN", TUESDAY) is None
+
+    def test_empty_search_has_no_cheapest(self):
+        index = OfferIndex()
+        index.add("MAD", "BCN", MONDAY, [])
+        assert ("MAD", "BCN", MONDAY) in index
+        assert index.cheapest("MAD", "BCN", MONDAY) is None
+
+    def test_filtered_cheapest_is_refreshed_when_offers_change(self):
+        index = OfferIndex()
+        index.add("MAD", "BCN", MONDAY, [make_flight("MAD", "BCN", 7, 60.0, MONDAY)])
+        assert index.cheapest("MAD", "BCN", MONDAY, max_arrival_time=time(9, 0)).price == 60.0
+
+        index.add("MAD", "BCN", MONDAY, [
+            make_flight("MAD", "BCN", 7, 50.0, MONDAY),
+            make_flight("MAD", "BCN", 12, 20.0, MONDAY),
+        ])
+
+        assert index.cheapest("MAD", "BCN", MONDAY, max_arrival_time=time(9, 0)).price == 50.0
+        assert index.cheapest("MAD", "BCN", MONDAY).price == 20.0
+
+
+class TestFindMixedTrips:
+    def test_combines_outbound_and_return_from_different_origins(self):
+        index = OfferIndex()
+        index.add("MAD", "BCN", MONDAY, [make_flight("MAD", "BCN", 7, 30.0, MONDAY)])
+        index.add("OVD", "BCN", MONDAY, [make_flight("OVD", "BCN", 7, 80.0, MONDAY)])
+        index.add("BCN", "MAD", TUESDAY, [make_flight("BCN", "MAD", 18, 70.0, TUESDAY)])
+        index.add("BCN", "OVD", TUESDAY, [make_flight("BCN", "OVD", 18, 40.0, TUESDAY)])
+
+        trips = find_mixed_trips(index, ["MAD", "OVD"], "BCN", WEEK_START, day_pairs=[(0, 1)])
+
+        assert len(trips) == 2
+        best = trips[0]
+        assert best.outbound.origin == "MAD"
+        assert best.return_flight.destination == "OVD"
+        assert best.total_price == 70.0
+
+    def test_skips_same_origin_trips(self):
+        index = OfferIndex()
+        index.add("MAD", "BCN", MONDAY, [make_flight("MAD", "BCN", 7, 30.0, MONDAY)])
+        index.add("BCN", "MAD", TUESDAY, [make_flight("BCN", "MAD", 18, 30.0, TUESDAY)])
+
+        trips = find_mixed_trips(index, ["MAD", "OVD"], "BCN", WEEK_START, day_pairs=[(0, 1)])
+
+        assert trips == []
@@ -1,9 +1,10 @@
 # tests/test_formatter.py
 """Tests for message formatter."""
 
-from datetime import date, datetime
+from datetime import date, datetime, timedelta
 
-from src.formatter import format_telegram_message
+from src.formatter import SECTIONS, format_route_message, format_summary_message, format_telegram_message
+from src.price_history import PriceHistory
 from src.search import RouteResult, TripOption
 from src.amadeus_client import FlightOption
 
@@ -130,3 +131,158 @@ class TestFormatTelegramMessage:
 
         assert "Ida suelta" in message
         assert "40" in message
+
+    def test_mixed_trips_section(self):
+        outbound = make_flight("MAD", "BCN", 7, 30.0, date(2026, 1, 27))
+        return_flight = make_flight("BCN", "OVD", 18, 40.0, date(2026, 1, 28))
+        mixed = TripOption(
+            outbound=outbound,
+            return_flight=return_flight,
+            outbound_date=date(2026, 1, 27),
+            return_date=date(2026, 1, 28),
+        )
+        empty = dict(
+            best_combo=None,
+            best_outbound=None,
+            best_return=None,
+            week_start=date(2026, 1, 27),
+        )
+        mad_result = RouteResult(origin="MAD", destination="BCN", **empty)
+        ovd_result = RouteResult(origin="OVD", destination="BCN", **empty)
+
+        message = format_telegram_message(mad_result, ovd_result, mixed_trips=[mixed])
+
+        assert "VIAJES MIXTOS" in message
+        assert "MAD→BCN→OVD: 70€" in message
+
+    def test_mixed_trip_with_train_leg(self):
+        train = make_flight("MAD", "BCN", 7, 25.0, date(2026, 1, 27))
+        train.mode = "rail"
+        mixed = TripOption(
+            outbound=train,
+            return_flight=make_flight("BCN", "OVD", 18, 40.0, date(2026, 1, 28)),
+            outbound_date=date(2026, 1, 27),
+            return_date=date(2026, 1, 28),
+        )
+        empty = dict(best_combo=None, best_outbound=None, best_return=None, week_start=date(2026, 1, 27))
+        mad_result = RouteResult(origin="MAD", destination="BCN", **empty)
+        ovd_result = RouteResult(origin="OVD", destination="BCN", **empty)
+
+        message = format_telegram_message(mad_result, ovd_result, mixed_trips=[mixed])
+
+        assert "🚄 MAD→BCN" in message
+        assert "thetrainline.com" in message
+        assert message.count("skyscanner") == 1
+
+    def test_single_leg_annotated_with_history(self):
+        history = PriceHistory()
+        for week, price in enumerate([60.0, 70.0, 80.0]):
+            history.record("MAD", "BCN", date(2026, 1, 27) - timedelta(weeks=week + 1), price,
+                           date(2026, 1, 18) - timedelta(weeks=week + 1))
+        single_leg = make_flight("MAD", "BCN", 7, 40.0, date(2026, 1, 27))
+        empty = dict(best_combo=None, best_return=None, week_start=date(2026, 1, 26))
+        mad_result = RouteResult(origin="MAD", destination="BCN", best_outbound=single_leg, **empty)
+        ovd_result = RouteResult(origin="OVD", destination="BCN", best_outbound=None, **empty)
+
+        message = format_telegram_message(mad_result, ovd_result, history=history, as_of=date(2026, 1, 18))
+
+        assert "43% por debajo de lo habitual" in message
+
+
+class TestStreamingMessages:
+    def test_route_message_has_single_route(self):
+        result = RouteResult(
+            origin="OVD",
+            destination="BCN",
+            best_combo=None,
+            best_outbound=None,
+            best_return=None,
+            week_start=date(2026, 1, 26),
+        )
+
+        message = format_route_message(result, include_single_legs=False)
+
+        assert "OVIEDO ↔ BARCELONA" in message
+        assert "MADRID" not in message
+
+    def test_summary_lists_every_route(self):
+        combo = TripOption(
+            outbound=make_flight("MAD", "BCN", 7, 50.0, date(2026, 1, 27)),
+            return_flight=make_flight("BCN", "MAD", 18, 60.0, date(2026, 1, 28)),
+            outbound_date=date(2026, 1, 27),
+            return_date=date(2026, 1, 28),
+        )
+        empty = dict(best_outbound=None, best_return=None, week_start=date(2026, 1, 26))
+        results = [
+            RouteResult(origin="MAD", destination="BCN", best_combo=combo, **empty),
+            RouteResult(origin="OVD", destination="BCN", best_combo=None, **empty),
+        ]
+
+        message = format_summary_message(results)
+
+        assert "MAD↔BCN: 110€" in message
+        assert "OVD↔BCN: sin opciones" in message
+
+
+class TestRoundTripCombo:
+    def test_round_trip_combo_shows_only_total_price(self):
+        combo = TripOption(
+            outbound=make_flight("MAD", "BCN", 7, 40.0, date(2026, 1, 27)),
+            return_flight=make_flight("BCN", "MAD", 18, 40.0, date(2026, 1, 28)),
+            outbound_date=date(2026, 1, 27),
+            return_date=date(2026, 1, 28),
+            bundle_price=80.0,
+        )
+        result = RouteResult(
+            origin="MAD", destination="BCN", best_combo=combo,
+            best_outbound=None, best_return=None, week_start=date(2026, 1, 26),
+        )
+
+        message = format_route_message(result, include_single_legs=False)
+
+        assert "Mejor combo: 80€ (ida y vuelta juntas)" in message
+        assert "(Vueling) 40€" not in message
+
+
+class TestSectionCache:
+    def make_result(self, origin, price):
+        combo = TripOption(
+            outbound=make_flight(origin, "BCN", 7, price, date(2026, 1, 27)),
+            return_flight=make_flight("BCN", origin, 18, 60.0, date(2026, 1, 28)),
+            outbound_date=date(2026, 1, 27),
+            return_date=date(2026, 1, 28),
+        )
+        return RouteResult(
+            origin=origin, destination="BCN", best_combo=combo,
+            best_outbound=None, best_return=None, week_start=date(2026, 1, 26),
+        )
+
+    def test_same_content_reuses_sections(self):
+        SECTIONS.clear()
+        first = format_telegram_message(self.make_result("MAD", 50.0), self.make_result("OVD", 40.0))
+
+        # Objetos nuevos con los mismos datos (otro chat, otra ejecucion)
+        second = format_telegram_message(self.make_result("MAD", 50.0), self.make_result("OVD", 40.0))
+
+        assert second == first
+        assert SECTIONS.misses == 2
+        assert SECTIONS.hits == 2
+
+    def test_only_changed_section_is_rendered_again(self):
+        SECTIONS.clear()
+        format_telegram_message(self.make_result("MAD", 50.0), self.make_result("OVD", 40.0))
+
+        message = format_telegram_message(self.make_result("MAD", 45.0), self.make_result("OVD", 40.0))
+
+        assert "Mejor combo: 105€" in message
+        assert SECTIONS.misses == 3
+        assert SECTIONS.hits == 1
+
+    def test_route_message_shares_sections_with_full_message(self):
+        SECTIONS.clear()
+        format_telegram_message(self.make_result("MAD", 50.0), self.make_result("OVD", 40.0))
+
+        message = format_route_message(self.make_result("OVD", 40.0), include_single_legs=False)
+
+        assert "Mejor combo: 100€" in message
+        assert SECTIONS.hits == 1
@@ -0,0 +1,116 @@
+"""Tests for the raw-HTTP Amadeus transport."""
+
+import json
+from unittest.mock import Mock, patch
+
+import pytest
+import requests
+
+from src.amadeus_client import AmadeusClient
+from src.cache import PersistentCache
+from src.http_transport import AmadeusHttpTransport
+
+OFFER = {
+    "price": {"total": "45.50"},
+    "itineraries": [{"segments": [{
+        "carrierCode": "VY",
+        "number": "1001",
+        "departure": {"iataCode": "MAD", "at": "2026-01-26T07:00:00"},
+        "arrival": {"iataCode": "BCN", "at": "2026-01-26T08:15:00"},
+    }]}],
+}
+BODY = {"data": [OFFER], "dictionaries": {"carriers": {"VY": "VUELING AIRLINES"}}}
+
+
+def http_response(status, payload):
+    response = Mock(status_code=status, content=json.dumps(payload).encode("utf-8"))
+    if status >= 400:
+        response.raise_for_status.side_effect = requests.HTTPError(str(status))
+    return response
+
+
+def make_session(*offer_responses):
+    session = Mock(headers={})
+    session.post.return_value = http_response(200, {"access_token": "abc", "expires_in": 1799})
+    session.get.side_effect = list(offer_responses)
+    return session
+
+
+class TestAmadeusHttpTransport:
+    def test_only_parsed_fields_are_kept(self):
+        full = dict(OFFER, id="1", travelerPricings=[{"fareDetailsBySegment": []}])
+        segment = dict(OFFER["itineraries"][0]["segments"][0], aircraft={"code": "320"})
+        full["itineraries"] = [{"duration": "PT1H15M", "segments": [segment]}]
+        broken = {"price": {"total": "10"}, "itineraries": []}
+        body = dict(BODY, data=[full, broken], meta={"count": 2})
+        session = make_session(http_response(200, body))
+        transport = AmadeusHttpTransport("key", "secret", base_url="http://amadeus", session=session)
+
+        result = transport.flight_offers("MAD", "BCN", "2026-01-26")
+
+        assert result == {"data": [OFFER, broken], "dictionaries": BODY["dictionaries"]}
+
+    def test_token_is_reused_between_queries(self):
+        session = make_session(http_response(200, BODY), http_response(200, BODY))
+        transport = AmadeusHttpTransport("key", "secret", base_url="http://amadeus", session=session)
+
+        transport.flight_offers("MAD", "BCN", "2026-01-26")
+        result = transport.flight_offers("MAD", "BCN", "2026-01-27")
+
+        assert result == BODY
+        assert session.post.call_count == 1
+        params = session.get.call_args.kwargs["params"]
+        assert params["nonStop"] == "true"
+        assert params["departureDate"] == "2026-01-27"
+        assert session.get.call_args.kwargs["headers"] == {"Authorization": "Bearer abc"}
+        assert session.headers["Accept-Encoding"] == "gzip"
+
+    def test_return_date_asks_for_round_trips(self):
+        session = make_session(http_response(200, BODY))
+        transport = AmadeusHttpTransport("key", "secret", base_url="http://amadeus", session=session)
+
+        transport.flight_offers("MAD", "BCN", "2026-01-26", return_date="2026-01-27")
+
+        assert session.get.call_args.kwargs["params"]["returnDate"] == "2026-01-27"
+
+    def test_expired_token_is_renewed(self):
+        now = [0.0]
+        session = make_session(http_response(200, BODY), http_response(200, BODY))
+        transport = AmadeusHttpTransport("key", "secret", base_url="http://amadeus", session=session,
+                                         clock=lambda: now[0])
+
+        transport.flight_offers("MAD", "BCN", "2026-01-26")
+        now[0] = 1800
+        transport.flight_offers("MAD", "BCN", "2026-01-26")
+
+        assert session.post.call_count == 2
+
+    def test_unauthorized_retries_once_with_new_token(self):
+        session = make_session(http_response(401, {}), http_response(200, BODY))
+        transport = AmadeusHttpTransport("key", "secret", base_url="http://amadeus", session=session)
+
+        assert transport.flight_offers("MAD", "BCN", "2026-01-26") == BODY
+        assert session.post.call_count == 2
+
+    def test_http_errors_raise(self):
+        session = make_session(http_response(500, {}))
+        transport = AmadeusHttpTransport("key", "secret", base_url="http://amadeus", session=session)
+
+        with pytest.raises(requests.HTTPError):
+            transport.flight_offers("MAD", "BCN", "2026-01-26")
+
+
+class TestClientWithTransport:
+    def test_same_options_as_sdk(self, tmp_path):
+        with patch("src.amadeus_client.AMADEUS_API_KEY", "key"), \
+                patch("src.amadeus_client.AMADEUS_API_SECRET", "secret"), \
+                patch("src.amadeus_client.Client"):
+            sdk = AmadeusClient(cache=PersistentCache(tmp_path / "sdk.json"))
+            transport = Mock()
+            transport.flight_offers.return_value = BODY
+            fast = AmadeusClient(cache=PersistentCache(tmp_path / "fast.json"), transport=transport)
+        sdk.client = Mock()
+        sdk.client.shopping.flight_offers_search.get.return_value = Mock(data=[OFFER], result=BODY)
+
+        assert fast.search_flights("MAD", "BCN", "2026-01-26") == sdk.search_flights("MAD", "BCN", "2026-01-26")
+        fast.client.shopping.flight_offers_search.get.assert_not_called()
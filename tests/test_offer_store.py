@@ -0,0 +1,98 @@
+"""Tests for stored offers and replay client."""
+
+from datetime import date, datetime, time
+
+from src.amadeus_client import FlightOption, RoundTripOffer
+from src.offer_index import OfferIndex
+from src.offer_store import load_runs, save_offers
+from src.replay import ReplayClient
+
+MONDAY = date(2026, 1, 26)
+
+
+def make_flight(origin, dest, hour, price):
+    return FlightOption(
+        origin=origin,
+        destination=dest,
+        departure_time=datetime(2026, 1, 26, hour, 0),
+        arrival_time=datetime(2026, 1, 26, hour + 1, 15),
+        price=price,
+        carrier_code="VY",
+        carrier_name="Vueling",
+        flight_number="1234",
+    )
+
+
+TUESDAY = date(2026, 1, 27)
+ROUND_TRIPS = {
+    ("MAD", "BCN", MONDAY, TUESDAY): [
+        RoundTripOffer(make_flight("MAD", "BCN", 7, 45.0), make_flight("BCN", "MAD", 18, 45.0), 90.0),
+        RoundTripOffer(make_flight("MAD", "BCN", 9, 35.0), make_flight("BCN", "MAD", 19, 35.0), 70.0),
+    ],
+}
+
+
+def make_index():
+    index = OfferIndex()
+    index.add("MAD", "BCN", MONDAY, [make_flight("MAD", "BCN", 7, 60.0), make_flight("MAD", "BCN", 12, 20.0)])
+    index.add("OVD", "BCN", MONDAY, [])
+    return index
+
+
+class TestOfferStore:
+    def test_round_trip(self, tmp_path):
+        save_offers(make_index(), date(2026, 1, 18), MONDAY, tmp_path)
+
+        runs = load_runs(tmp_path)
+
+        assert len(runs) == 1
+        assert runs[0].week_start == MONDAY
+        offers = runs[0].index.get("MAD", "BCN", MONDAY)
+        assert [o.price for o in offers] == [60.0, 20.0]
+        assert offers[0].departure_time == datetime(2026, 1, 26, 7, 0)
+        assert runs[0].index.get("OVD", "BCN", MONDAY) == []
+        assert runs[0].round_trips == {}
+
+    def test_round_trip_offers_are_stored(self, tmp_path):
+        save_offers(make_index(), date(2026, 1, 18), MONDAY, tmp_path, round_trips=ROUND_TRIPS)
+
+        runs = load_runs(tmp_path)
+
+        assert len(runs) == 1
+        assert runs[0].round_trips == ROUND_TRIPS
+
+    def test_rerun_without_round_trips_drops_old_ones(self, tmp_path):
+        save_offers(make_index(), date(2026, 1, 18), MONDAY, tmp_path, round_trips=ROUND_TRIPS)
+        save_offers(make_index(), date(2026, 1, 18), MONDAY, tmp_path)
+
+        assert load_runs(tmp_path)[0].round_trips == {}
+
+    def test_truncated_snapshot_is_skipped(self, tmp_path):
+        path = save_offers(make_index(), date(2026, 1, 18), MONDAY, tmp_path)
+        save_offers(make_index(), date(2026, 1, 19), MONDAY, tmp_path)
+        path.write_bytes(path.read_bytes()[:10])
+
+        runs = load_runs(tmp_path)
+
+        assert [run.search_date for run in runs] == [date(2026, 1, 19)]
+
+
+class TestReplayClient:
+    def test_applies_time_filters(self):
+        client = ReplayClient(make_index())
+
+        options = client.search_flights("MAD", "BCN", "2026-01-26", max_arrival_time=time(10, 0))
+
+        assert [o.price for o in options] == [60.0]
+
+    def test_unknown_query_returns_empty(self):
+        client = ReplayClient(make_index())
+        assert client.search_flights("MAD", "BCN", "2026-01-27") == []
+
+    def test_round_trips_sorted_by_price(self):
+        client = ReplayClient(make_index(), ROUND_TRIPS)
+
+        offers = client.search_round_trips("MAD", "BCN", "2026-01-26", "2026-01-27")
+
+        assert [o.price for o in offers] == [70.0, 90.0]
+        assert client.search_round_trips("MAD", "BCN", "2026-01-26", "2026-01-28") == []
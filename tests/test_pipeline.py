@@ -0,0 +1,79 @@
+"""Tests for the streaming pipeline."""
+
+import threading
+import time
+from datetime import date
+
+from src.pipeline import run_pipeline
+from src.search import RouteResult
+
+
+def make_result(origin):
+    return RouteResult(
+        origin=origin,
+        destination="BCN",
+        best_combo=None,
+        best_outbound=None,
+        best_return=None,
+        week_start=date(2026, 1, 26),
+    )
+
+
+class TestRunPipeline:
+    def test_first_route_delivered_before_slowest_finishes(self):
+        slow_release = threading.Event()
+        sent = []
+
+        def search(route):
+            if route[0] == "OVD":
+                slow_release.wait(timeout=5)
+            return make_result(route[0])
+
+        def send(text):
+            sent.append(text)
+            if text == "MAD":
+                slow_release.set()  # La ruta lenta solo termina tras enviar la rapida
+            return True
+
+        results, sent_count = run_pipeline(
+            search=search,
+            routes=[("MAD", "BCN"), ("OVD", "BCN")],
+            write_log=lambda result: None,
+            render=lambda result: result.origin,
+            send=send,
+        )
+
+        assert sent == ["MAD", "OVD"]
+        assert sent_count == 2
+        assert [r.origin for r in results] == ["MAD", "OVD"]
+
+    def test_failing_route_does_not_block_others(self):
+        def search(route):
+            if route[0] == "OVD":
+                raise RuntimeError("boom")
+            return make_result(route[0])
+
+        logged = []
+        results, sent_count = run_pipeline(
+            search=search,
+            routes=[("MAD", "BCN"), ("OVD", "BCN")],
+            write_log=logged.append,
+            render=lambda result: result.origin,
+            send=lambda text: True,
+        )
+
+        assert [r.origin for r in results] == ["MAD"]
+        assert [r.origin for r in logged] == ["MAD"]
+        assert sent_count == 1
+
+    def test_failed_send_not_counted(self):
+        results, sent_count = run_pipeline(
+            search=lambda route: make_result(route[0]),
+            routes=[("MAD", "BCN")],
+            write_log=lambda result: None,
+            render=lambda result: result.origin,
+            send=lambda text: False,
+        )
+
+        assert len(results) == 1
+        assert sent_count == 0
@@ -0,0 +1,96 @@
+"""Tests for historical price index."""
+
+from datetime import date, datetime, time
+
+from src.amadeus_client import FlightOption
+from src.offer_index import OfferIndex
+from src.price_history import PriceHistory
+
+AS_OF = date(2026, 1, 18)       # Sunday
+FLIGHT_DATE = date(2026, 1, 27)  # Tuesday, 9 days ahead
+
+
+def record_weeks(history, prices):
+    """Registra un precio por semana con la misma antelacion."""
+    for week, price in enumerate(prices):
+        offset = 7 * week
+        history.record(
+            "MAD", "BCN",
+            date.fromordinal(FLIGHT_DATE.toordinal() + offset),
+            price,
+            date.fromordinal(AS_OF.toordinal() + offset),
+        )
+
+
+class TestPriceHistory:
+    def test_rolling_median_and_quantiles(self):
+        history = PriceHistory()
+        record_weeks(history, [40.0, 50.0, 60.0])
+
+        stats = history.stats("MAD", "BCN", FLIGHT_DATE, AS_OF)
+        assert stats.median == 50.0
+        assert stats.p25 == 45.0
+        assert stats.p75 == 55.0
+        assert stats.count == 3
+
+    def test_window_is_bounded(self):
+        history = PriceHistory()
+        record_weeks(history, [100.0] * 20 + [10.0])
+
+        stats = history.stats("MAD", "BCN", FLIGHT_DATE, AS_OF)
+        assert len(stats.window) == 12
+        assert stats.count == 21
+
+    def test_not_enough_samples(self):
+        history = PriceHistory()
+        record_weeks(history, [40.0, 50.0])
+
+        assert history.stats("MAD", "BCN", FLIGHT_DATE, AS_OF) is None
+        assert history.compare([("MAD", "BCN", FLIGHT_DATE)], 30.0, AS_OF) is None
+
+    def test_compare_flags_cheap_and_expensive(self):
+        history = PriceHistory()
+        record_weeks(history, [40.0, 50.0, 60.0])
+        legs = [("MAD", "BCN", FLIGHT_DATE)]
+
+        cheap = history.compare(legs, 40.0, AS_OF)
+        assert cheap.level == "cheap"
+        assert round(cheap.pct_vs_median, 2) == -0.2
+
+        assert history.compare(legs, 70.0, AS_OF).level == "expensive"
+        assert history.compare(legs, 50.0, AS_OF).level == "normal"
+
+    def test_save_and_load(self, tmp_path):
+        history = PriceHistory()
+        record_weeks(history, [40.0, 50.0, 60.0])
+        path = tmp_path / "history.json"
+        history.save(path)
+
+        loaded = PriceHistory.load(path)
+        assert loaded.stats("MAD", "BCN", FLIGHT_DATE, AS_OF).median == 50.0
+
+    def test_record_run_uses_strict_filters(self):
+        index = OfferIndex()
+        index.add("MAD", "BCN", FLIGHT_DATE, [
+            FlightOption("MAD", "BCN", datetime(2026, 1, 27, 7), datetime(2026, 1, 27, 8), 60.0, "VY", "Vueling", "1"),
+            FlightOption("MAD", "BCN", datetime(2026, 1, 27, 12), datetime(2026, 1, 27, 13), 20.0, "VY", "Vueling", "2"),
+        ])
+        history = PriceHistory()
+
+        recorded = history.record_run(index, [("MAD", "BCN")], AS_OF, time(10, 0), time(17, 0))
+
+        assert recorded == 1
+        assert history._entries["MAD-BCN|1|9"].window == [60.0]
+
+    def test_record_run_ignores_trains(self):
+        index = OfferIndex()
+        index.add("MAD", "BCN", FLIGHT_DATE, [
+            FlightOption("MAD", "BCN", datetime(2026, 1, 27, 6), datetime(2026, 1, 27, 9), 25.0, "avlo", "Avlo", "6011",
+                         mode="rail"),
+            FlightOption("MAD", "BCN", datetime(2026, 1, 27, 7), datetime(2026, 1, 27, 8), 60.0, "VY", "Vueling", "1"),
+        ])
+        history = PriceHistory()
+
+        history.record_run(index, [("MAD", "BCN")], AS_OF, time(10, 0), time(17, 0))
+
+        assert history._entries["MAD-BCN|1|9"].window == [60.0]
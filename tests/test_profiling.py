@@ -0,0 +1,45 @@
+"""Tests for run profiling reports."""
+
+import pstats
+from concurrent.futures import ThreadPoolExecutor
+
+from src.profiling import profile_run
+
+
+def build_offers():
+    return [{"price": float(i)} for i in range(5000)]
+
+
+def build_offers_in_worker(_):
+    return build_offers()
+
+
+class TestProfileRun:
+    def test_writes_cpu_memory_and_stats_reports(self, tmp_path):
+        with profile_run(tmp_path, top=10) as report:
+            offers = build_offers()
+
+        assert len(offers) == 5000
+        assert "build_offers" in report.cpu.read_text(encoding="utf-8")
+        memory = report.memory.read_text(encoding="utf-8")
+        assert "Pico:" in memory
+        assert "test_profiling.py" in memory
+        assert pstats.Stats(str(report.stats)).total_calls > 0
+
+    def test_worker_threads_are_profiled(self, tmp_path):
+        with profile_run(tmp_path, top=20) as report:
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                results = list(executor.map(build_offers_in_worker, range(4)))
+
+        assert len(results) == 4
+        assert "build_offers_in_worker" in report.cpu.read_text(encoding="utf-8")
+
+    def test_reports_written_when_run_fails(self, tmp_path):
+        try:
+            with profile_run(tmp_path) as report:
+                raise RuntimeError("boom")
+        except RuntimeError:
+            pass
+
+        assert report.cpu.exists()
+        assert report.memory.exists()
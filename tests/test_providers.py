@@ -0,0 +1,112 @@
+"""Tests for transport providers."""
+
+import json
+from datetime import date, datetime
+from unittest.mock import Mock
+
+import pytest
+
+from src.amadeus_client import AmadeusUnavailableError, FlightOption
+from src.checkpoint import RunCheckpoint
+from src.providers import ProviderUnavailableError, RailTimetableProvider
+from src.search import FlightSearcher
+
+
+def write_timetable(path):
+    path.write_text(json.dumps({"services": [
+        {"origin": "MAD", "destination": "BCN", "operator": "iryo", "train_number": "6011",
+         "departure": "06:35", "arrival": "09:20", "weekdays": [0, 1, 2, 3, 4], "price": 25.0},
+        {"origin": "MAD", "destination": "BCN", "operator": "AVE", "train_number": "03063",
+         "departure": "09:30", "arrival": "12:09", "weekdays": [0, 1, 2, 3, 4], "price": 20.0},
+        {"origin": "BCN", "destination": "MAD", "operator": "iryo", "train_number": "6028",
+         "departure": "17:30", "arrival": "20:15", "weekdays": [5, 6], "price": 15.0},
+    ]}))
+    return path
+
+
+def flight(origin, destination, search_date, hour, price):
+    day = date.fromisoformat(search_date)
+    return FlightOption(
+        origin=origin,
+        destination=destination,
+        departure_time=datetime(day.year, day.month, day.day, hour, 0),
+        arrival_time=datetime(day.year, day.month, day.day, hour + 1, 15),
+        price=price,
+        carrier_code="VY",
+        carrier_name="Vueling",
+        flight_number="1234",
+    )
+
+
+class TestRailTimetableProvider:
+    def test_filters_by_route_weekday_and_time(self, tmp_path):
+        provider = RailTimetableProvider(path=write_timetable(tmp_path / "rail.json"))
+
+        trains = provider.search_flights("MAD", "BCN", "2026-01-26", max_arrival_time=datetime(1, 1, 1, 10).time())
+        weekend_only = provider.search_flights("BCN", "MAD", "2026-01-26")
+
+        assert [(t.carrier_name, t.mode) for t in trains] == [("iryo", "rail")]
+        assert weekend_only == []
+
+    def test_unreadable_timetable_raises(self, tmp_path):
+        provider = RailTimetableProvider(path=tmp_path / "missing.json")
+        with pytest.raises(ProviderUnavailableError):
+            provider.search_flights("MAD", "BCN", "2026-01-26")
+
+
+class TestMixedProviders:
+    def test_train_out_flight_back_combo(self, tmp_path):
+        amadeus = Mock()
+        amadeus.search_flights.side_effect = lambda origin, destination, search_date, **kw: (
+            [flight(origin, destination, search_date, 7, 60.0)] if origin == "MAD"
+            else [flight(origin, destination, search_date, 18, 40.0)]
+        )
+        rail = RailTimetableProvider(path=write_timetable(tmp_path / "rail.json"))
+
+        searcher = FlightSearcher(client=amadeus, providers=[amadeus, rail], day_pairs=[(0, 1)])
+        result = searcher.search_route("MAD", "BCN", date(2026, 1, 26))
+
+        assert result.best_combo.outbound.mode == "rail"
+        assert result.best_combo.return_flight.mode == "flight"
+        assert result.best_combo.total_price == 65.0
+        # Los legs sueltos siguen siendo solo vuelos
+        assert result.best_return.mode == "flight"
+
+    def test_failed_provider_with_no_other_options_is_unavailable(self, tmp_path):
+        amadeus = Mock()
+        amadeus.search_flights.side_effect = AmadeusUnavailableError("down")
+        rail = RailTimetableProvider(path=tmp_path / "missing.json")
+
+        searcher = FlightSearcher(client=amadeus, providers=[amadeus, rail], day_pairs=[(0, 1)])
+        result = searcher.search_route("OVD", "BCN", date(2026, 1, 26))
+
+        assert result.api_unavailable is True
+
+    def test_failed_provider_makes_answer_partial(self, tmp_path):
+        amadeus = Mock()
+        amadeus.search_flights.side_effect = AmadeusUnavailableError("down")
+        rail = RailTimetableProvider(path=write_timetable(tmp_path / "rail.json"))
+        checkpoint = RunCheckpoint.open(tmp_path, "run", date(2026, 1, 26))
+
+        searcher = FlightSearcher(
+            client=amadeus, providers=[amadeus, rail], day_pairs=[(0, 1)], checkpoint=checkpoint,
+        )
+        result = searcher.search_route("MAD", "BCN", date(2026, 1, 26))
+
+        assert result.api_unavailable is True
+        assert ("MAD", "BCN", date(2026, 1, 26)) not in searcher.offer_index
+        assert {o.mode for o in searcher.partial[("MAD", "BCN", date(2026, 1, 26))]} == {"rail"}
+        assert len(RunCheckpoint.load(checkpoint.path).queries) == 0
+
+    def test_rail_outage_makes_answer_partial(self, tmp_path):
+        amadeus = Mock()
+        amadeus.search_flights.side_effect = lambda origin, destination, search_date, **kw: [
+            flight(origin, destination, search_date, 7, 60.0),
+        ]
+        rail = RailTimetableProvider(path=tmp_path / "missing.json")
+
+        searcher = FlightSearcher(client=amadeus, providers=[amadeus, rail], day_pairs=[(0, 1)])
+        result = searcher.search_route("MAD", "BCN", date(2026, 1, 26))
+
+        assert result.api_unavailable is True
+        assert ("MAD", "BCN", date(2026, 1, 26)) in searcher.partial
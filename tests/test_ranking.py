@@ -0,0 +1,28 @@
+"""Tests for Pareto ranking."""
+
+from src.ranking import dominates, pareto_front
+
+
+class TestDominates:
+    def test_better_in_all(self):
+        assert dominates((1, 1), (2, 2))
+
+    def test_equal_does_not_dominate(self):
+        assert not dominates((1, 1), (1, 1))
+
+    def test_trade_off_does_not_dominate(self):
+        assert not dominates((1, 3), (2, 2))
+
+
+class TestParetoFront:
+    def test_keeps_only_non_dominated(self):
+        points = [(3, 1), (1, 3), (2, 2), (3, 3), (2, 4)]
+        front = pareto_front(points, lambda p: p)
+        assert front == [(1, 3), (2, 2), (3, 1)]
+
+    def test_duplicates_kept_once(self):
+        front = pareto_front([(1, 1), (1, 1)], lambda p: p)
+        assert front == [(1, 1)]
+
+    def test_empty(self):
+        assert pareto_front([], lambda p: p) == []
@@ -0,0 +1,85 @@
+"""Tests for reference data (carriers, airports, rail cities)."""
+
+import json
+from unittest.mock import Mock
+
+from src.cache import PersistentCache
+from src.reference_data import Airport, ReferenceIndex
+
+
+def write_reference(path):
+    path.write_text(json.dumps({
+        "version": 1,
+        "airlines": {"IB": "Iberia", "VY": "Vueling"},
+        "airports": {"MAD": ["Madrid", "Europe/Madrid"], "BCN": ["Barcelona", "Europe/Madrid"]},
+        "rail": {"MAD": "madrid", "BCN": "barcelona"},
+    }))
+    return path
+
+
+class TestBundledData:
+    def test_lookups(self, tmp_path):
+        index = ReferenceIndex(path=write_reference(tmp_path / "ref.json"))
+
+        assert index.carrier_name("IB") == "Iberia"
+        assert index.airport("BCN") == Airport(city="Barcelona", timezone="Europe/Madrid")
+        assert index.city_name("MAD") == "Madrid"
+        assert index.rail_slug("BCN") == "barcelona"
+        assert index.carrier_name("XX") is None
+        assert index.rail_slug("OVD") is None
+
+    def test_repo_file_covers_configured_routes(self):
+        index = ReferenceIndex()
+
+        for code in ("MAD", "BCN", "OVD"):
+            assert index.city_name(code)
+        for code in ("IB", "VY", "UX", "I2", "FR"):
+            assert index.carrier_name(code)
+        # Oviedo no tiene enlace de Trainline
+        assert index.rail_slug("OVD") is None
+
+    def test_missing_file_returns_none(self, tmp_path):
+        index = ReferenceIndex(path=tmp_path / "missing.json")
+
+        assert index.carrier_name("IB") is None
+
+
+class TestLearning:
+    def test_learned_carriers_persist_in_cache(self, tmp_path):
+        path = write_reference(tmp_path / "ref.json")
+        cache_path = tmp_path / "cache.json"
+        index = ReferenceIndex(path=path, cache=PersistentCache(cache_path))
+
+        index.learn_carriers({"IB": "IBERIA AIRLINES", "V7": "VOLOTEA"})
+
+        assert index.carrier_name("IB") == "Iberia"
+        fresh = ReferenceIndex(path=path, cache=PersistentCache(cache_path))
+        assert fresh.carrier_name("V7") == "Volotea"
+
+    def test_refresh_only_queries_unknown_codes(self, tmp_path):
+        path = write_reference(tmp_path / "ref.json")
+        cache_path = tmp_path / "cache.json"
+        index = ReferenceIndex(path=path, cache=PersistentCache(cache_path))
+        client = Mock()
+        client.lookup_airlines.return_value = {"U2": "EASYJET"}
+        client.lookup_airport.return_value = Airport(city="Lisboa", timezone="+01:00")
+
+        index.refresh(client, carriers=["IB", "U2"], airports=["MAD", "LIS"])
+
+        client.lookup_airlines.assert_called_once_with(["U2"])
+        client.lookup_airport.assert_called_once_with("LIS")
+        assert index.carrier_name("U2") == "Easyjet"
+
+        fresh = ReferenceIndex(path=path, cache=PersistentCache(cache_path))
+        assert fresh.city_name("LIS") == "Lisboa"
+        fresh.refresh(client, airports=["LIS"])
+        assert client.lookup_airport.call_count == 1
+
+    def test_refresh_failure_is_not_fatal(self, tmp_path):
+        index = ReferenceIndex(path=write_reference(tmp_path / "ref.json"))
+        client = Mock()
+        client.lookup_airport.side_effect = RuntimeError("timeout")
+
+        index.refresh(client, airports=["LIS"])
+
+        assert index.city_name("LIS") is None
@@ -0,0 +1,63 @@
+"""Tests for the rendered section cache."""
+
+from datetime import date, datetime
+
+from src.amadeus_client import FlightOption
+from src.render_cache import RenderCache, content_key
+
+
+def make_flight(price):
+    return FlightOption(
+        origin="MAD",
+        destination="BCN",
+        departure_time=datetime(2026, 1, 27, 7, 30),
+        arrival_time=datetime(2026, 1, 27, 8, 45),
+        price=price,
+        carrier_code="VY",
+        carrier_name="Vueling",
+        flight_number="1234",
+    )
+
+
+class TestContentKey:
+    def test_equal_content_gives_equal_key(self):
+        assert content_key(make_flight(50.0)) == content_key(make_flight(50.0))
+        assert hash(content_key([make_flight(50.0)])) == hash(content_key([make_flight(50.0)]))
+
+    def test_any_field_change_changes_key(self):
+        changed = make_flight(50.0)
+        changed.carrier_name = "Iberia"
+
+        assert content_key(changed) != content_key(make_flight(50.0))
+        assert content_key(make_flight(51.0)) != content_key(make_flight(50.0))
+
+    def test_nested_values(self):
+        key = content_key({"legs": [make_flight(50.0)], "day": date(2026, 1, 27)})
+
+        assert hash(key) == hash(content_key({"day": date(2026, 1, 27), "legs": [make_flight(50.0)]}))
+
+
+class TestRenderCache:
+    def test_renders_once_per_key(self):
+        cache = RenderCache(maxsize=4)
+        calls = []
+
+        def render():
+            calls.append(1)
+            return ("linea",)
+
+        assert cache.get_or_render("a", render) == ("linea",)
+        assert cache.get_or_render("a", render) == ("linea",)
+        assert len(calls) == 1
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_evicts_least_recently_used(self):
+        cache = RenderCache(maxsize=2)
+        cache.get_or_render("a", lambda: "A")
+        cache.get_or_render("b", lambda: "B")
+        cache.get_or_render("a", lambda: "A")
+        cache.get_or_render("c", lambda: "C")
+
+        assert len(cache) == 2
+        assert cache.get_or_render("a", lambda: "nuevo") == "A"
+        assert cache.get_or_render("b", lambda: "nuevo") == "nuevo"
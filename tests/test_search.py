@@ -8,7 +8,8 @@ from unittest.mock import Mock, patch
 import pytest
 
 from src.search import RouteResult, TripOption, FlightSearcher
-from src.amadeus_client import FlightOption
+from src.amadeus_client import AmadeusUnavailableError, FlightOption, RoundTripOffer
+from src.replay import ReplayClient
 
 
 def make_flight(origin, dest, hour, price, day_offset=0):
@@ -39,6 +40,17 @@ class TestTripOption:
         )
         assert trip.total_price == 110.0
 
+    def test_bundle_price_is_the_total(self):
+        trip = TripOption(
+            outbound=make_flight("MAD", "BCN", 7, 45.0),
+            return_flight=make_flight("BCN", "MAD", 18, 45.0),
+            outbound_date=date(2026, 1, 27),
+            return_date=date(2026, 1, 28),
+            bundle_price=89.99,
+        )
+        assert trip.total_price == 89.99
+        assert trip.is_bundle
+
 
 class TestRouteResult:
     def test_has_single_legs(self):
@@ -85,3 +97,142 @@ class TestFlightSearcher:
         # OVD should not have single legs even if price < threshold
         assert result.best_outbound is None
         assert result.best_return is None
+
+    def test_relaxed_pass_reuses_fetched_offers(self):
+        mock_client = Mock()
+        mock_client.search_flights.return_value = []
+
+        searcher = FlightSearcher(client=mock_client)
+        result = searcher.search_route("MAD", "BCN", date(2026, 1, 27))
+
+        assert result.relaxed_filters is True
+        # Una llamada por (ruta, fecha), sin repetir en la pasada relajada
+        assert mock_client.search_flights.call_count == 8
+
+    def test_pareto_options_include_out_of_window_trade_offs(self):
+        def fake_search(origin, destination, search_date, **kwargs):
+            day = date.fromisoformat(search_date)
+            offset = (day - date(2026, 1, 27)).days
+            if origin == "MAD":
+                return [
+                    make_flight("MAD", "BCN", 7, 60.0, offset),   # llega 08:15
+                    make_flight("MAD", "BCN", 9, 20.0, offset),   # llega 10:15 (relajado)
+                    make_flight("MAD", "BCN", 12, 5.0, offset),   # llega 13:15 (fuera)
+                ]
+            return [make_flight("BCN", "MAD", 18, 50.0, offset)]
+
+        mock_client = Mock()
+        mock_client.search_flights.side_effect = fake_search
+
+        searcher = FlightSearcher(client=mock_client)
+        result = searcher.search_route("MAD", "BCN", date(2026, 1, 27))
+
+        prices = [t.total_price for t in result.pareto_options]
+        assert result.best_combo.total_price == 110.0
+        assert prices[0] == 110.0  # Primero el mejor en horario estricto
+        assert 70.0 in prices
+        assert 55.0 not in prices
+
+    def test_api_down_is_not_reported_as_no_flights(self):
+        mock_client = Mock()
+        mock_client.search_flights.side_effect = AmadeusUnavailableError("down")
+
+        searcher = FlightSearcher(client=mock_client)
+        result = searcher.search_route("MAD", "BCN", date(2026, 1, 27))
+
+        assert result.api_unavailable is True
+        assert result.best_combo is None
+        # Sin reintentos en la pasada relajada
+        assert mock_client.search_flights.call_count == 8
+
+
+def make_round_trip(origin, price, out_offset, ret_offset, out_hour=7, ret_hour=18):
+    outbound = make_flight(origin, "BCN", out_hour, price / 2, out_offset)
+    return_flight = make_flight("BCN", origin, ret_hour, price / 2, ret_offset)
+    return RoundTripOffer(outbound=outbound, return_flight=return_flight, price=price)
+
+
+class TestQueryPlans:
+    def make_client(self, one_way_price, round_trip_price):
+        def fake_search(origin, destination, search_date, **kwargs):
+            offset = (date.fromisoformat(search_date) - date(2026, 1, 27)).days
+            hour = 7 if destination == "BCN" else 18
+            return [make_flight(origin, destination, hour, one_way_price, offset)]
+
+        def fake_round_trips(origin, destination, departure_date, return_date):
+            out_offset = (date.fromisoformat(departure_date) - date(2026, 1, 27)).days
+            ret_offset = (date.fromisoformat(return_date) - date(2026, 1, 27)).days
+            return [make_round_trip(origin, round_trip_price, out_offset, ret_offset)]
+
+        client = Mock()
+        client.search_flights.side_effect = fake_search
+        client.search_round_trips.side_effect = fake_round_trips
+        return client
+
+    def test_round_trip_plan_makes_one_call_per_day_pair(self):
+        client = self.make_client(one_way_price=30.0, round_trip_price=80.0)
+        searcher = FlightSearcher(client=client, query_plan="roundtrip")
+
+        result = searcher.search_route("MAD", "BCN", date(2026, 1, 27))
+
+        assert client.search_round_trips.call_count == 4
+        client.search_flights.assert_not_called()
+        assert result.best_combo.is_bundle
+        assert result.best_combo.total_price == 80.0
+        assert result.best_outbound is None  # Sin busquedas de ida no hay legs sueltos
+        assert searcher.calls == {"roundtrip": 4}
+
+    def test_mixed_plan_picks_cheaper_plan_for_single_leg_routes(self):
+        client = self.make_client(one_way_price=30.0, round_trip_price=50.0)
+        searcher = FlightSearcher(client=client, query_plan="mixed")
+
+        mad = searcher.search_route("MAD", "BCN", date(2026, 1, 27))
+        ovd = searcher.search_route("OVD", "BCN", date(2026, 1, 27))
+
+        assert mad.best_combo.is_bundle
+        assert mad.plan_prices == {"oneway": 60.0, "roundtrip": 50.0}
+        assert mad.best_outbound is not None
+        assert ovd.plan_prices == {"roundtrip": 50.0}
+        assert searcher.calls == {"oneway": 8, "roundtrip": 8}
+
+    def test_mixed_plan_keeps_one_way_combo_when_cheaper(self):
+        client = self.make_client(one_way_price=20.0, round_trip_price=50.0)
+        searcher = FlightSearcher(client=client, query_plan="mixed")
+
+        result = searcher.search_route("MAD", "BCN", date(2026, 1, 27))
+
+        assert not result.best_combo.is_bundle
+        assert result.best_combo.total_price == 40.0
+
+    def test_round_trip_outside_filters_is_ignored(self):
+        client = Mock()
+        client.search_round_trips.return_value = [make_round_trip("MAD", 40.0, 0, 1, out_hour=12)]
+        searcher = FlightSearcher(client=client, query_plan="roundtrip")
+
+        result = searcher.search_route("MAD", "BCN", date(2026, 1, 27))
+
+        assert result.best_combo is None
+        # Sin repetir llamadas en la pasada con filtros relajados
+        assert client.search_round_trips.call_count == 4
+
+    def test_client_without_round_trips_falls_back_to_one_way(self):
+        client = Mock(spec=["search_flights"])
+
+        searcher = FlightSearcher(client=client, query_plan="mixed")
+
+        assert searcher.query_plan == "oneway"
+
+    def test_replayed_round_trips_give_the_same_combo(self):
+        client = self.make_client(one_way_price=30.0, round_trip_price=50.0)
+        searcher = FlightSearcher(client=client, query_plan="mixed")
+        original = searcher.search_route("MAD", "BCN", date(2026, 1, 27))
+
+        replay = ReplayClient(searcher.offer_index, searcher.round_trip_offers())
+        replayed = FlightSearcher(client=replay, query_plan="mixed").search_route("MAD", "BCN", date(2026, 1, 27))
+
+        assert replayed.best_combo == original.best_combo
+        assert replayed.plan_prices == original.plan_prices
+
+    def test_unknown_plan_is_rejected(self):
+        with pytest.raises(ValueError):
+            FlightSearcher(client=Mock(), query_plan="multicity")
@@ -0,0 +1,101 @@
+"""Tests for binary offer snapshots."""
+
+from datetime import date, datetime
+
+import pytest
+
+from src.amadeus_client import FlightOption
+from src.offer_index import OfferIndex
+from src.snapshot import HEADER, RECORD, OfferSnapshot, SnapshotIndex, write_snapshot
+
+MONDAY = date(2026, 1, 26)
+
+
+def make_index():
+    index = OfferIndex()
+    index.add("MAD", "BCN", MONDAY, [
+        FlightOption("MAD", "BCN", datetime(2026, 1, 26, 7, 30), datetime(2026, 1, 26, 8, 45),
+                     49.99, "UX", "Air Europa", "6015"),
+        FlightOption("MAD", "BCN", datetime(2026, 1, 26, 23, 30), datetime(2026, 1, 27, 0, 40),
+                     19.5, "VY", "Vueling", "1003"),
+    ])
+    index.add("BCN", "OVD", MONDAY, [])
+    return index
+
+
+class TestSnapshot:
+    def test_round_trip(self, tmp_path):
+        path = write_snapshot(make_index(), date(2026, 1, 18), MONDAY, tmp_path / "offers.bin")
+
+        with OfferSnapshot(path) as snapshot:
+            index = snapshot.to_index()
+            assert snapshot.search_date == date(2026, 1, 18)
+            assert snapshot.week_start == MONDAY
+
+        assert index.get("MAD", "BCN", MONDAY) == make_index().get("MAD", "BCN", MONDAY)
+        assert index.get("BCN", "OVD", MONDAY) == []
+
+    def test_stale_offers_stay_stale(self, tmp_path):
+        index = make_index()
+        stale = index.get("MAD", "BCN", MONDAY)
+        for offer in stale:
+            offer.stale_since = datetime(2026, 1, 12, 9, 30)
+        path = write_snapshot(index, date(2026, 1, 18), MONDAY, tmp_path / "offers.bin")
+
+        with OfferSnapshot(path) as snapshot:
+            loaded = snapshot.to_index().get("MAD", "BCN", MONDAY)
+            cheapest = SnapshotIndex(snapshot).cheapest("MAD", "BCN", MONDAY)
+
+        assert [o.stale_since for o in loaded] == [datetime(2026, 1, 12, 9, 30)] * 2
+        assert cheapest.stale_since == datetime(2026, 1, 12, 9, 30)
+
+    def test_fixed_width_records(self, tmp_path):
+        path = write_snapshot(make_index(), date(2026, 1, 18), MONDAY, tmp_path / "offers.bin")
+
+        with OfferSnapshot(path) as snapshot:
+            assert len(snapshot) == 3  # 2 ofertas + 1 consulta vacia
+            strings_size = HEADER.unpack_from(path.read_bytes())[-1]
+        assert path.stat().st_size == HEADER.size + 3 * RECORD.size + strings_size
+
+    def test_rejects_other_files(self, tmp_path):
+        path = tmp_path / "offers.bin"
+        path.write_bytes(b"x" * 64)
+
+        with pytest.raises(ValueError):
+            OfferSnapshot(path)
+
+    def test_lazy_index_decodes_only_requested_queries(self, tmp_path):
+        path = write_snapshot(make_index(), date(2026, 1, 18), MONDAY, tmp_path / "offers.bin")
+
+        index = SnapshotIndex(OfferSnapshot(path))
+        assert sorted(index.keys()) == sorted(make_index().keys())
+        assert index._decoded == {}
+
+        assert index.get("MAD", "BCN", MONDAY) == make_index().get("MAD", "BCN", MONDAY)
+        assert index.get("BCN", "OVD", MONDAY) == []
+        assert index.get("OVD", "BCN", MONDAY) is None
+        assert len(index._decoded) == 2
+        index.close()
+
+    def test_lazy_cheapest_decodes_one_record(self, tmp_path):
+        path = write_snapshot(make_index(), date(2026, 1, 18), MONDAY, tmp_path / "offers.bin")
+
+        index = SnapshotIndex(OfferSnapshot(path))
+        cheapest = index.cheapest("MAD", "BCN", MONDAY)
+
+        assert cheapest == make_index().cheapest("MAD", "BCN", MONDAY)
+        assert index.cheapest("BCN", "OVD", MONDAY) is None
+        assert index.cheapest("OVD", "BCN", MONDAY) is None
+        assert index._decoded == {}
+        index.close()
+
+    def test_numpy_view(self, tmp_path):
+        np = pytest.importorskip("numpy")
+        path = write_snapshot(make_index(), date(2026, 1, 18), MONDAY, tmp_path / "offers.bin")
+
+        snapshot = OfferSnapshot(path)
+        array = snapshot.as_array()
+        assert list(array["price_cents"][:2]) == [4999, 1950]
+        assert not array.flags.owndata
+        del array
+        snapshot.close()
@@ -0,0 +1,66 @@
+"""Tests for offline what-if scans."""
+
+from datetime import date, datetime, time
+
+from src.amadeus_client import FlightOption
+from src.offer_index import OfferIndex
+from src.offer_store import save_offers
+from src.whatif import BASELINE, build_grid, format_table, run_whatif
+
+MONDAY = date(2026, 1, 26)
+TUESDAY = date(2026, 1, 27)
+
+
+def make_flight(origin, dest, flight_date, hour, price):
+    return FlightOption(
+        origin=origin,
+        destination=dest,
+        departure_time=datetime(flight_date.year, flight_date.month, flight_date.day, hour, 0),
+        arrival_time=datetime(flight_date.year, flight_date.month, flight_date.day, hour + 1, 15),
+        price=price,
+        carrier_code="VY",
+        carrier_name="Vueling",
+        flight_number=str(hour),
+    )
+
+
+def store_run(store_dir):
+    index = OfferIndex()
+    index.add("MAD", "BCN", MONDAY, [
+        make_flight("MAD", "BCN", MONDAY, 7, 60.0),   # llega 08:15
+        make_flight("MAD", "BCN", MONDAY, 10, 30.0),  # llega 11:15
+    ])
+    index.add("BCN", "MAD", TUESDAY, [make_flight("BCN", "MAD", TUESDAY, 18, 50.0)])
+    save_offers(index, date(2026, 1, 18), MONDAY, store_dir)
+
+
+class TestWhatIf:
+    def test_later_arrival_changes_chosen_trip(self, tmp_path):
+        store_run(tmp_path)
+        later = build_grid([time(12, 0)], [time(17, 0)], [45], [((0, 1),)])
+
+        results = run_whatif(later, tmp_path, workers=1)
+
+        base_mad = [o for o in results[BASELINE] if o.origin == "MAD"][0]
+        later_mad = [o for o in results[later[1]] if o.origin == "MAD"][0]
+        assert base_mad.combo_price == 110.0
+        assert later_mad.combo_price == 80.0
+        assert later_mad.combo_id != base_mad.combo_id
+
+    def test_process_pool_matches_inline(self, tmp_path):
+        store_run(tmp_path)
+        grid = build_grid([time(9, 0), time(12, 0)], [time(17, 0)], [45], [((0, 1),)])
+
+        inline = run_whatif(grid, tmp_path, workers=1)
+        pooled = run_whatif(grid, tmp_path, workers=2)
+
+        assert inline == pooled
+
+    def test_table_lists_every_setting(self, tmp_path):
+        store_run(tmp_path)
+        grid = build_grid([time(12, 0)], [time(17, 0)], [45], [((0, 1),)])
+
+        table = format_table(run_whatif(grid, tmp_path, workers=1), BASELINE)
+
+        assert "llegada<=12:00" in table
+        assert "MAD-BCN" in table
@@ -0,0 +1,180 @@
+"""Tests for the SQLite work queue."""
+
+import sqlite3
+import threading
+from datetime import date, datetime
+from unittest.mock import Mock
+
+from src.amadeus_client import AmadeusUnavailableError, FlightOption
+from src.work_queue import DONE, FAILED, SCHEMA, WorkQueue, plan_jobs, reduce_run, run_worker
+
+MONDAY = date(2026, 1, 26)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def fake_flights(origin, destination, search_date, **kwargs):
+    day = date.fromisoformat(search_date)
+    hour = 7 if origin in ("MAD", "OVD") else 18
+    return [FlightOption(
+        origin=origin,
+        destination=destination,
+        departure_time=datetime(day.year, day.month, day.day, hour, 0),
+        arrival_time=datetime(day.year, day.month, day.day, hour + 1, 15),
+        price=30.0,
+        carrier_code="VY",
+        carrier_name="Vueling",
+        flight_number="1234",
+    )]
+
+
+class TestPlanJobs:
+    def test_outbound_and_return_queries_without_duplicates(self):
+        jobs = plan_jobs([("MAD", "BCN")], MONDAY, day_pairs=[(0, 1), (1, 2)])
+
+        assert jobs == [
+            ("MAD", "BCN", date(2026, 1, 26)),
+            ("BCN", "MAD", date(2026, 1, 27)),
+            ("MAD", "BCN", date(2026, 1, 27)),
+            ("BCN", "MAD", date(2026, 1, 28)),
+        ]
+
+
+class TestWorkQueue:
+    def test_enqueue_is_idempotent(self, tmp_path):
+        queue = WorkQueue(tmp_path / "queue.sqlite")
+        jobs = plan_jobs([("MAD", "BCN")], MONDAY)
+
+        assert queue.enqueue("run", jobs) == len(jobs)
+        assert queue.enqueue("run", jobs) == 0
+        assert queue.progress("run") == {"pending": len(jobs)}
+
+    def test_expired_lease_is_claimed_again(self, tmp_path):
+        clock = FakeClock()
+        queue = WorkQueue(tmp_path / "queue.sqlite", lease_seconds=60, clock=clock)
+        queue.enqueue("run", [("MAD", "BCN", MONDAY)])
+
+        crashed = queue.claim("run", "worker-a")
+        assert queue.claim("run", "worker-b") is None
+
+        clock.now += 61
+        retaken = queue.claim("run", "worker-b")
+        assert retaken.id == crashed.id
+        assert retaken.attempts == 2
+
+        assert not queue.complete(crashed, fake_flights("MAD", "BCN", "2026-01-26"))
+        assert queue.complete(retaken, fake_flights("MAD", "BCN", "2026-01-26"))
+        assert queue.progress("run") == {DONE: 1}
+
+    def test_failed_job_gives_up_after_max_attempts(self, tmp_path):
+        clock = FakeClock()
+        queue = WorkQueue(tmp_path / "queue.sqlite", max_attempts=2, clock=clock)
+        queue.enqueue("run", [("MAD", "BCN", MONDAY)])
+
+        queue.fail(queue.claim("run", "w"), "timeout")
+        clock.now += 3600
+        queue.fail(queue.claim("run", "w"), "timeout")
+        clock.now += 3600
+
+        assert queue.claim("run", "w") is None
+        assert queue.progress("run") == {FAILED: 1}
+
+    def test_failed_job_waits_before_retry(self, tmp_path):
+        clock = FakeClock()
+        queue = WorkQueue(tmp_path / "queue.sqlite", max_attempts=3, retry_seconds=30, clock=clock)
+        queue.enqueue("run", [("MAD", "BCN", MONDAY)])
+
+        queue.fail(queue.claim("run", "w"), "circuito abierto")
+        clock.now += 29
+        assert queue.claim("run", "w") is None
+        clock.now += 1
+        retried = queue.claim("run", "w")
+        assert retried.attempts == 2
+
+        queue.fail(retried, "circuito abierto")
+        clock.now += 59
+        assert queue.claim("run", "w") is None
+        clock.now += 1
+        assert queue.claim("run", "w").attempts == 3
+
+
+class TestWorkersAndReducer:
+    def test_workers_share_the_queue_and_reducer_builds_results(self, tmp_path):
+        path = tmp_path / "queue.sqlite"
+        setup = WorkQueue(path)
+        jobs = plan_jobs([("MAD", "BCN"), ("OVD", "BCN")], MONDAY)
+        setup.enqueue("run", jobs)
+        client = Mock()
+        client.search_flights.side_effect = fake_flights
+        counts = []
+
+        def work(name):
+            queue = WorkQueue(path)
+            counts.append(run_worker(queue, client, "run", owner=name, poll_seconds=0.01))
+            queue.close()
+
+        threads = [threading.Thread(target=work, args=(f"w{i}",)) for i in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=10)
+
+        assert sum(counts) == len(jobs)
+        assert client.search_flights.call_count == len(jobs)
+
+        searcher, week_start = reduce_run(setup, "run")
+        result = searcher.search_route("MAD", "BCN", week_start)
+        assert week_start == MONDAY
+        assert searcher.query_plan == "oneway"
+        assert result.best_combo.total_price == 60.0
+        assert not result.api_unavailable
+
+    def test_failed_queries_are_reported_as_unavailable(self, tmp_path):
+        queue = WorkQueue(tmp_path / "queue.sqlite", max_attempts=1)
+        queue.enqueue("run", plan_jobs([("MAD", "BCN")], MONDAY, day_pairs=[(0, 1)]))
+        client = Mock()
+        client.search_flights.side_effect = AmadeusUnavailableError("down")
+
+        run_worker(queue, client, "run", owner="w")
+        searcher, week_start = reduce_run(queue, "run")
+        searcher.day_pairs = [(0, 1)]
+
+        assert searcher.search_route("MAD", "BCN", week_start).api_unavailable
+
+    def test_stale_offers_stay_stale_after_reduce(self, tmp_path):
+        queue = WorkQueue(tmp_path / "queue.sqlite")
+        queue.enqueue("run", plan_jobs([("MAD", "BCN")], MONDAY, day_pairs=[(0, 1)]))
+        since = datetime(2026, 1, 12, 8, 0)
+
+        def stale_flights(*args, **kwargs):
+            options = fake_flights(*args, **kwargs)
+            for option in options:
+                option.stale_since = since
+            return options
+
+        client = Mock()
+        client.search_flights.side_effect = stale_flights
+        run_worker(queue, client, "run", owner="w")
+        searcher, week_start = reduce_run(queue, "run")
+        searcher.day_pairs = [(0, 1)]
+
+        assert searcher.search_route("MAD", "BCN", week_start).stale_since == since
+
+    def test_queue_from_before_stale_since_is_upgraded(self, tmp_path):
+        path = tmp_path / "queue.sqlite"
+        db = sqlite3.connect(path)
+        db.executescript(SCHEMA.replace("    stale_since TEXT,\n", "").replace("    not_before REAL,\n", ""))
+        db.close()
+
+        queue = WorkQueue(path)
+        queue.enqueue("run", plan_jobs([("MAD", "BCN")], MONDAY, day_pairs=[(0, 1)]))
+        client = Mock()
+        client.search_flights.side_effect = fake_flights
+
+        assert run_worker(queue, client, "run", owner="w") == 2